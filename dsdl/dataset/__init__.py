@@ -1,11 +1,20 @@
 from .base_dataset import Dataset
 from .demo_dataset import DemoDataset
+from .index import IndexQuery, SampleIndex
+from .streaming_dataset import StreamingDataset
+from .utils.collate import StructCollate
 from .utils.commons import Util
 from .utils.visualizer import ImageVisualizePipeline
+from .validation import ValidationRecord
 
 __all__ = [
     "Dataset",
     "DemoDataset",
     "ImageVisualizePipeline",
+    "IndexQuery",
+    "SampleIndex",
+    "StreamingDataset",
+    "StructCollate",
     "Util",
+    "ValidationRecord",
 ]
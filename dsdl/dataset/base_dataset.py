@@ -1,22 +1,39 @@
-from typing import Any, Callable, Dict, List, Optional, Union
+import io
+import os
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
 
+import numpy as np
 import torch.utils.data
 
-import dsdl.objectio as objectio
 from dsdl.dataset.utils import Util
 
 from ..geometry import STRUCT
-from ..types import Struct
+from ..geometry.utils import bytes_to_numpy
+from ..parser import dsdl_parse
+from ..types import VALIDATION_LEVELS, Struct
+from .cache import DatasetCache, handles_to_state, import_files, state_to_handles
+from .columnar import ColumnarSampleList, StructTable
+from .index import IndexQuery, SampleIndex
+from .parallel import encode_samples_parallel, fork_available
+from .profile import FieldProfiler
+from .sample_list import LazySampleList
+from .validation import ValidationRecord
 
 try:
     from yaml import CSafeLoader as YAMLSafeLoader
 except ImportError:
     from yaml import SafeLoader as YAMLSafeLoader
 
+from yaml import load as yaml_load
+
 
 class Dataset(torch.utils.data.Dataset):
     # PALETTE用来存储每个类别的颜色（用于可视化）
     PALETTE = {}
+    # get_batch中并发读取媒体文件的线程数量
+    MEDIA_READ_WORKERS = 8
 
     def __init__(
             self,
@@ -24,63 +41,259 @@ class Dataset(torch.utils.data.Dataset):
             sample_type: Union[str, Struct],
             location_config: dict,
             pipeline: Optional[Callable[[Dict], Dict]] = None,
+            lazy: bool = False,
+            cache_size: Optional[Union[int, str]] = "auto",
+            columnar: bool = False,
+            num_workers: int = 0,
+            definition: Optional[str] = None,
+            batched: bool = False,
+            fields: Optional[List[str]] = None,
+            compact: bool = False,
+            validation: str = "strict",
+            validation_record: Optional[Union[str, ValidationRecord]] = None,
+            profile: bool = False,
     ):
         self.location_config = location_config
         self.pipeline = pipeline  # 处理样本的函数
         self.samples = samples  # 样本所在的yaml文件路径
+        self.lazy = lazy  # 是否在第一次访问样本时才进行校验和解析
+        # lazy/compact模式下缓存的已解析样本数量（LRU）：0表示不缓存（每次访问都重新加载），None表示不限制数量，
+        # 默认的"auto"在lazy模式下不限制数量（每个样本只在第一次访问时校验一次），在compact模式下不缓存（样本已经校验过）
+        if cache_size == "auto":
+            cache_size = None if lazy else 0
+        self.cache_size = cache_size
+        self.columnar = columnar  # 是否将样本以列式（NumPy数组）的形式存储
+        self.num_workers = num_workers  # 校验样本时使用的进程数量，小于等于1时在当前进程中串行校验
+        self.definition = definition  # dsdl生成的python代码，在新的进程中反序列化数据集时用来重新定义Struct
+        self.batched = batched  # 为True时，DataLoader通过__getitems__一次性取出整个batch的按字段组织的数组
+        self._media_executor = None  # get_batch中读取媒体文件的线程池，在第一次使用时创建
+        self._media_executor_pid = None
+        self.fields = fields  # 字段投影（如 ["image", "objects/label"]），不在其中的字段不做校验，也不会被加载
+        self._index = None  # 类别/属性到样本下标的倒排索引，在第一次使用时建立
+        self.compact = compact  # 是否以紧凑的StructRecord保存校验后的样本，在访问时才转换为 `_parse_struct` 的结构
+        # 校验级别（strict/fast/trusted，参考 `Struct`），trusted只能用于validation_record中记录的strict校验通过的数据
+        self.validation = validation
+        if isinstance(validation_record, str):
+            validation_record = ValidationRecord(validation_record)
+        self.validation_record = validation_record
+        self.profile = profile  # 是否统计每个字段的值数量、内存占用和校验时间（参考 `profile_fields`）
+        if sum([lazy, columnar, compact]) > 1:
+            raise ValueError("Only one of `lazy`, `columnar` and `compact` can be enabled.")
+        if batched and (pipeline is not None or type(self).process_sample is not Dataset.process_sample):
+            raise ValueError("`batched=True` returns the arrays of `get_batch`, which bypasses `process_sample` and "
+                             "`pipeline`.")
+        if validation not in VALIDATION_LEVELS:
+            raise ValueError(f"Unknown validation level '{validation}', expect one of {VALIDATION_LEVELS}.")
         sample_type = Util.extract_sample_type(sample_type)
         if isinstance(sample_type, str):
             self.sample_type = STRUCT.get(sample_type)
         else:
             self.sample_type = sample_type
+        self.projection = None if fields is None else self.sample_type.compile_projection(fields)
         self.file_reader = self._load_file_reader(location_config)  # 样本的路径配置（如本地路径或是阿里云路径）
+        if validation == "trusted":
+            if validation_record is None:
+                raise ValueError("`validation='trusted'` requires the `validation_record` of a strict validation.")
+            validation_record.verify(self.samples, self.sample_type, self.projection)
+        self._profiler = FieldProfiler(self.sample_type) if profile else None
         self.sample_list = self._load_sample()  # 将yaml文件中的样本内容加载到self.sample_list中
+        # lazy模式下样本在访问时才校验，加载完成时还不能记录为strict校验通过
+        if validation == "strict" and validation_record is not None and not self.lazy:
+            validation_record.save(self.samples, self.sample_type, fields)
+        if isinstance(self.sample_list, ColumnarSampleList):
+            # 列式存储时不再引用原始的样本字典，fork出的DataLoader子进程之间可以共享样本所在的内存页
+            self.samples = self.sample_list
+
+    @classmethod
+    def from_yaml(
+            cls,
+            dsdl_yaml: str,
+            location_config: dict,
+            dsdl_library_path: str = "dsdl/dsdl_library",
+            cache_dir: Optional[str] = None,
+            **kwargs,
+    ):
+        """
+        根据dsdl yaml文件创建数据集：读取样本、解析dsdl定义并执行生成的代码。
+
+        指定cache_dir时，生成的代码和校验后的列式样本会缓存到磁盘中（参考 `DatasetCache`），
+        dsdl yaml、`$import` 的文件和样本文件均未变化时，直接以mmap的方式打开缓存，不再解析和校验样本。
+        缓存时使用的字段投影（`fields`）与本次不同，或本次为strict校验而缓存的样本没有经过strict校验时，重新加载样本并覆盖缓存。
+        缓存的样本总是以columnar模式加载，不能与 `lazy`、`compact` 或 `columnar=False` 同时指定。
+        加载缓存时会执行其中的代码并反序列化其中的pickle文件，cache_dir只能是可信的、其他用户不可写的目录。
+
+        validation_record为路径时，数据的指纹为dsdl yaml、`$import` 的文件和样本文件内容的摘要，参考 `ValidationRecord`。
+        """
+        fields = kwargs.get("fields")
+        fields = None if fields is None else list(fields)
+        validation = kwargs.get("validation", "strict")
+        if isinstance(kwargs.get("validation_record"), str):
+            kwargs["validation_record"] = ValidationRecord.from_yaml(kwargs["validation_record"], dsdl_yaml,
+                                                                     dsdl_library_path)
+        cache = DatasetCache(cache_dir) if cache_dir is not None else None
+        if cache is not None:
+            conflicts = [name for name in ("lazy", "compact") if kwargs.get(name)]
+            if not kwargs.get("columnar", True):
+                conflicts.append("columnar=False")
+            if conflicts:
+                raise ValueError(f"`cache_dir` stores the dataset in columnar mode and cannot be combined with "
+                                 f"{', '.join(f'`{name}`' for name in conflicts)}.")
+            kwargs["columnar"] = True
+            entry = cache.load(dsdl_yaml, dsdl_library_path)
+            if (entry is not None and entry["fields"] == fields
+                    and (entry["validation"] == "strict" or validation != "strict")):
+                exec(entry["definition"], {})
+                sample_type = entry["sample_type"]
+                struct_cls = STRUCT.get(Util.extract_sample_type(sample_type))
+                projection = None if fields is None else struct_cls.compile_projection(fields)
+                sample_list = ColumnarSampleList(struct_cls, None, projection=projection)
+                sample_list.table.load_state(entry["state"])
+                return cls(sample_list, sample_type, location_config, definition=entry["definition"], **kwargs)
+
+        with open(dsdl_yaml, "r") as f:
+            desc = yaml_load(f, Loader=YAMLSafeLoader)
+        sample_type = desc["data"]["sample-type"]
+        sample_path = desc["data"]["sample-path"]
+        if sample_path == "$local" or sample_path == "local":
+            samples = desc["data"]["samples"]
+        else:
+            samples = []
+            for path in Util.list_sample_files(dsdl_yaml, sample_path):
+                samples.extend(Util.load_sample_file(path))
+        definition = dsdl_parse(dsdl_yaml, dsdl_library_path)
+        exec(definition, {})
+        dataset = cls(samples, sample_type, location_config, definition=definition, **kwargs)
+        if cache is not None:
+            cache.save(dsdl_yaml, dsdl_library_path, definition, sample_type, sample_path,
+                       import_files(desc, dsdl_library_path), dataset.sample_list.table.state(), fields, validation)
+        return dataset
 
     @staticmethod
     def _load_file_reader(config):
-        config = config.copy()
-        type_ = config.pop("type")
-        cls = getattr(objectio, type_)
-        try:
-            reader = cls(**config)
-        except Exception as e:
-            print(f"raise exception {e} whe parse the location config {config}.")
-            raise e
-        return reader
+        return Util.load_file_reader(config)
 
     def _load_sample(self):
         """
         该函数的作用是将yaml文件中的样本转换为Struct对象，并存储到sample_list列表中
+        lazy模式下只保存原始样本，在第一次访问时才进行转换；columnar模式下将校验后的样本按字段写入连续的数组中；
+        compact模式下保存校验后的StructRecord，在访问时才转换为 `_parse_struct` 的结构
         """
+        if isinstance(self.samples, ColumnarSampleList):  # 已经编译好的样本（如从磁盘缓存中读取）
+            self.samples.file_reader = self.file_reader
+            return self.samples
+        if self.lazy:
+            loader = self._build_sample if self._profiler is None else self._profiler.wrap(self._build_sample)
+            return LazySampleList(self.samples, loader, self.cache_size)
+        if self._profiler is not None:
+            with self._profiler:
+                return self._load_validated_sample()
+        return self._load_validated_sample()
+
+    def _load_validated_sample(self):
+        if self.compact:
+            record_type = self.sample_type.record_type()
+            records = [record_type(file_reader=self.file_reader, projection=self.projection,
+                                   validation=self.validation, **sample) for sample in self.samples]
+            return LazySampleList(records, self._parse_struct, self.cache_size)
+        if self._use_parallel():
+            return self._load_sample_parallel()
+        if self.columnar:
+            structs = (self._build_struct(sample) for sample in self.samples)
+            return ColumnarSampleList.from_structs(structs, self.sample_type, self.file_reader,
+                                                   projection=self.projection)
         sample_list = []
         for sample in self.samples:
-            sample_list.append(self._parse_struct(self.sample_type(file_reader=self.file_reader, **sample)))
+            sample_list.append(self._build_sample(sample))
         return sample_list
 
+    def _use_parallel(self):
+        # 统计字段时需要在当前进程中校验
+        if self.num_workers <= 1 or len(self.samples) <= 1 or self.compact or self._profiler is not None:
+            return False
+        # 并行校验的结果以列式数组的形式传回主进程，只能重建出默认的 `_parse_struct` 结构
+        if not self.columnar and type(self)._parse_struct is not Dataset._parse_struct:
+            return False
+        if not fork_available():
+            warnings.warn("Parallel sample validation requires the 'fork' start method, fall back to serial validation.")
+            return False
+        return True
+
+    def _load_sample_parallel(self):
+        """
+        在num_workers个进程中并行校验样本，结果与串行校验完全一致（包括样本顺序和校验失败时的异常信息）。
+        columnar模式下直接拼接各进程返回的列式数组，否则将其重建为与 `_parse_struct` 相同的样本字典。
+        """
+        exact = not self.columnar
+        states = encode_samples_parallel(self.samples, self.sample_type, self.file_reader, self.num_workers,
+                                         np.float32, exact, projection=self.projection, validation=self.validation)
+        sample_list = ColumnarSampleList.from_states(states, self.sample_type, self.file_reader, np.float32, exact,
+                                                     self.projection)
+        if self.columnar:
+            return sample_list
+        return list(sample_list)
+
+    def _build_struct(self, sample):
+        return self.sample_type(file_reader=self.file_reader, projection=self.projection, validation=self.validation,
+                                **sample)
+
+    def _build_sample(self, sample):
+        return self._parse_struct(self._build_struct(sample))
+
     def _parse_struct(self, sample):
-        if isinstance(sample, Struct):
-            data_item = {}
-            struct_mapping = sample.get_mapping()
-            for key in sample.keys():
-                if key.startswith("$"):  # attributes
-                    field_key = key
-                    key = key.replace("$", "")
-                    if field_key in data_item:
-                        data_item[field_key][key] = getattr(sample, field_key)
-                    else:
-                        data_item[field_key] = {key: getattr(sample, field_key)}
-                else:
-                    field_key = Util.extract_key(struct_mapping[key])
-                    if field_key in data_item:
-                        data_item[field_key][key] = self._parse_struct(getattr(sample, key))
-                    else:
-                        data_item[field_key] = {key: self._parse_struct(getattr(sample, key))}
-            return data_item
-
-        elif isinstance(sample, list):
-            return [self._parse_struct(item) for item in sample]
+        return Util.parse_struct(sample, self._parse_struct)
+
+    def __getstate__(self):
+        """
+        pickle时只保留样本数组（mmap打开的数组只保留文件句柄）和file_reader的配置，不包含file_reader本身，
+        从而可以使用spawn方式启动DataLoader的子进程。非列式存储时在反序列化后重新加载原始样本。
+        location_config中显式配置的密钥（如AliOSSFileReader的access_key_secret）会以明文保存在pickle中，
+        应改为从环境变量中读取（参考 `AliOSSFileReader`）。
+        """
+        state = self.__dict__.copy()
+        state.pop("file_reader")
+        state["_profiler"] = None
+        state["_index"] = None
+        state["_media_executor"] = None
+        state["_media_executor_pid"] = None
+        state["sample_type"] = self.sample_type.__name__
+        sample_list = state.pop("sample_list")
+        if isinstance(sample_list, ColumnarSampleList):
+            state["samples"] = None
+            state["columnar_state"] = state_to_handles(sample_list.table.state())
+        else:
+            state["columnar_state"] = None
+        return state
+
+    def __setstate__(self, state):
+        columnar_state = state.pop("columnar_state")
+        self.__dict__.update(state)
+        if self.sample_type not in STRUCT and self.definition is not None:
+            exec(self.definition, {})
+        self.sample_type = STRUCT.get(self.sample_type)
+        self.file_reader = self._load_file_reader(self.location_config)
+        if columnar_state is not None:
+            self.samples = ColumnarSampleList(self.sample_type, self.file_reader, projection=self.projection)
+            self.samples.table.load_state(handles_to_state(columnar_state))
+        self.sample_list = self._load_sample()
+
+    def profile_fields(self) -> Dict[str, Dict[str, float]]:
+        """
+        返回每个字段路径（如 `image`、`objects/bbox`、`objects/label`）的统计结果，按字段定义的顺序排列：
+        count为数据集中保存的值数量，bytes为这些值占用的内存（嵌套字段的值只计入其自身的路径，列式存储时为列数组的大小），
+        time为校验该字段的累计时间（秒，包含其中嵌套的字段，从缓存中读取时为0）。
+        需要在创建数据集时指定 `profile=True`，count和bytes在调用时才计算；lazy模式下只包含缓存中的样本。
+        """
+        if self._profiler is None:
+            raise RuntimeError("Field profiling is disabled, create the dataset with `profile=True`.")
+        if isinstance(self.sample_list, ColumnarSampleList):
+            self._profiler.measure_table(self.sample_list.table)
+        elif isinstance(self.sample_list, LazySampleList):
+            # compact模式下保存的是StructRecord，lazy模式下只有缓存中的样本被保留
+            items = self.sample_list._samples if self.compact else list(self.sample_list._cache.values())
+            self._profiler.measure_samples(items)
         else:
-            return sample
+            self._profiler.measure_samples(self.sample_list)
+        return self._profiler.report()
 
     def process_sample(self, sample):
         return sample
@@ -95,6 +308,86 @@ class Dataset(torch.utils.data.Dataset):
             data = self.pipeline(data)
         return data
 
+    def __getitems__(self, indices):
+        """
+        DataLoader一次性取出整个batch时调用。batched为False时返回 `__getitem__` 的结果组成的列表，
+        为True时返回 `get_batch` 的结果（不调用process_sample和pipeline），
+        此时DataLoader的collate_fn需要接受该字典（如 `StructCollate`），默认的collate_fn不能处理这种输入。
+        """
+        if not self.batched:
+            return [self[idx] for idx in indices]
+        return self.get_batch(indices)
+
+    def get_batch(self, indices):
+        """
+        一次性取出indices对应的样本，返回以字段路径为键、按字段组织的批量数据（参考 `StructTable.take`），如：
+        {
+            "image": [img_array, img_array],                 # 媒体文件通过file_reader并发读取并解码为numpy数组
+            "objects/$offsets": array([0, 3, 5]),            # 第i个样本的objects为 [offsets[i], offsets[i+1])
+            "objects/bbox": float32 array of shape (5, 4),
+            "objects/label": int32 array of shape (5,),      # Label在类别域中的序号（从1开始），缺失时为0
+            "objects/label/$mask": bool array of shape (5,), # 仅当存在缺失该字段的样本时返回
+        }
+        该方法不会调用process_sample和pipeline。非columnar模式下会对这些样本一起重新进行校验和编码。
+        """
+        table, rows = self._batch_table(indices)
+        executor = self._get_media_executor()
+
+        def read_media(locations):
+            return list(executor.map(self._read_media, locations))
+
+        batch = {}
+        table.take(rows, "", batch, read_media)
+        return batch
+
+    def _get_media_executor(self):
+        # fork出的子进程（如DataLoader的worker）中父进程的线程已经不存在，需要重新创建线程池
+        if self._media_executor is None or self._media_executor_pid != os.getpid():
+            self._media_executor = ThreadPoolExecutor(self.MEDIA_READ_WORKERS)
+            self._media_executor_pid = os.getpid()
+        return self._media_executor
+
+    def _batch_table(self, indices):
+        length = len(self)
+        rows = np.asarray(indices, dtype=np.int64).reshape(-1)
+        rows = np.where(rows < 0, rows + length, rows)
+        if rows.size and (rows.min() < 0 or rows.max() >= length):
+            raise IndexError("sample index out of range")
+        if isinstance(self.sample_list, ColumnarSampleList):
+            return self.sample_list.table, rows
+        table = StructTable(self.sample_type, projection=self.projection)
+        for idx in rows:
+            table.append(self._build_struct(self.samples[idx]))
+        table.finalize()
+        return table, np.arange(len(rows), dtype=np.int64)
+
+    def _read_media(self, location):
+        with self.file_reader.load(location) as f:
+            return bytes_to_numpy(io.BytesIO(f.read()))
+
+    def build_index(self, rebuild: bool = False) -> SampleIndex:
+        """
+        建立（并缓存）从类别和属性值到样本下标的倒排索引，参考 `SampleIndex`。
+        columnar模式下直接在列式数组上建立，否则需要遍历一次所有样本。
+        """
+        if self._index is None or rebuild:
+            if isinstance(self.sample_list, ColumnarSampleList):
+                self._index = SampleIndex.from_table(self.sample_list.table)
+            else:
+                self._index = SampleIndex.from_items(self.sample_list)
+        return self._index
+
+    @property
+    def index(self) -> SampleIndex:
+        return self.build_index()
+
+    def subset(self, query: Union[IndexQuery, Sequence[int]]) -> torch.utils.data.Subset:
+        """
+        返回只包含query中的样本的子集（不复制样本），如：
+        dataset.subset(dataset.index.label("person") & ~dataset.index.attribute("is_crowd", True))
+        """
+        return torch.utils.data.Subset(self, np.asarray(query, dtype=np.int64))
+
     def get_sample_list(self):
         return self.sample_list
 
@@ -0,0 +1,260 @@
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..__version__ import __version__
+from .columnar import object_array
+from .utils import Util
+
+# 缓存格式发生变化时需要修改该版本号，使旧的缓存失效
+CACHE_FORMAT_VERSION = "2"
+
+MANIFEST_FILE = "manifest.json"
+DEFINITION_FILE = "dsdl.py"
+ARRAY_DIR = "arrays"
+
+
+def import_files(desc: Dict[str, Any], dsdl_library_path: str) -> List[str]:
+    """
+    dsdl yaml中 `$import` 的文件路径。
+    """
+    return [os.path.join(dsdl_library_path, p.strip() + ".yaml") for p in desc.get("$import", [])]
+
+
+def hash_files(paths: List[str], hasher=None):
+    """
+    按顺序计算多个文件内容的sha256摘要。文件数量、每个文件名和文件内容之前都写入其长度，
+    使不同的文件列表（如内容在两个文件之间移动）不会得到相同的摘要。
+    """
+    hasher = hasher or hashlib.sha256()
+    hasher.update(_length(len(paths)))
+    for path in paths:
+        name = os.path.basename(path).encode("utf-8")
+        hasher.update(_length(len(name)))
+        hasher.update(name)
+        with open(path, "rb") as f:
+            hasher.update(_length(os.fstat(f.fileno()).st_size))
+            for block in iter(lambda: f.read(1 << 20), b""):
+                hasher.update(block)
+    return hasher
+
+
+def _length(size: int) -> bytes:
+    return size.to_bytes(8, "little")
+
+
+def definition_key(key: str, definition: str) -> str:
+    """
+    生成的代码与缓存key的摘要，加载时检查 `dsdl.py` 与manifest中的记录一致后才会执行其中的代码。
+    """
+    return hashlib.sha256(f"{key}/{definition}".encode("utf-8")).hexdigest()
+
+
+class DatasetCache:
+    """
+    编译后数据集的磁盘缓存：保存dsdl yaml生成的python代码以及校验后的列式样本数组（每个数组一个.npy文件，可以通过mmap打开）。
+
+    缓存目录为 `<cache_dir>/<dsdl yaml的摘要>/`，其中 `manifest.json` 记录了缓存的key，即dsdl yaml、`$import` 的文件和
+    所有样本文件内容的摘要；任意一个输入文件发生变化时key随之变化，缓存失效。
+
+    加载缓存时会执行其中保存的python代码，并通过pickle读取无法保存为数组的字段值（`ObjectColumn`），
+    因此cache_dir必须是可信的目录：能写入该目录的用户都可以在加载数据集的进程中执行任意代码，
+    不要使用多个用户共享的或其他用户可写的目录。代码与manifest中记录的摘要不一致时缓存视为失效，
+    这只能发现不完整或不匹配的文件，不能防止有意的篡改。
+
+    Arguments:
+        cache_dir: 缓存的根目录。
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    def entry_dir(self, dsdl_yaml: str, dsdl_library_path: str) -> str:
+        hasher = hash_files([dsdl_yaml])
+        hasher.update(os.path.abspath(dsdl_library_path).encode("utf-8"))
+        hasher.update(f"{__version__}/{CACHE_FORMAT_VERSION}".encode("utf-8"))
+        return os.path.join(self.cache_dir, hasher.hexdigest())
+
+    @staticmethod
+    def content_key(dsdl_yaml: str, import_files: List[str], sample_files: List[str]) -> str:
+        hasher = hash_files([dsdl_yaml])
+        hash_files(import_files, hasher)
+        hash_files(sample_files, hasher)
+        return hasher.hexdigest()
+
+    @staticmethod
+    def sample_files(dsdl_yaml: str, sample_path) -> List[str]:
+        if sample_path == "$local" or sample_path == "local":
+            return []
+        return Util.list_sample_files(dsdl_yaml, sample_path)
+
+    def load(self, dsdl_yaml: str, dsdl_library_path: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存，缓存不存在或已失效时返回None。
+
+        Returns:
+            包含 `definition`（生成的python代码）、`sample_type`、`fields`（缓存样本时的字段投影）、
+            `validation`（缓存样本时的校验级别）和
+            `state`（`StructTable.state()`，数组均为只读的mmap）的字典。
+        """
+        entry_dir = self.entry_dir(dsdl_yaml, dsdl_library_path)
+        manifest_path = os.path.join(entry_dir, MANIFEST_FILE)
+        if not os.path.isfile(manifest_path):
+            return None
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+        try:
+            key = self.content_key(dsdl_yaml, manifest["import_files"],
+                                   self.sample_files(dsdl_yaml, manifest["sample_path"]))
+        except OSError:
+            return None
+        if key != manifest["key"]:
+            return None
+        with open(os.path.join(entry_dir, DEFINITION_FILE), "r", encoding="utf-8") as f:
+            definition = f.read()
+        if manifest.get("definition") != definition_key(key, definition):
+            return None
+        return {
+            "definition": definition,
+            "sample_type": manifest["sample_type"],
+            "fields": manifest.get("fields"),
+            "validation": manifest.get("validation", "strict"),
+            "state": _load_state(manifest["state"], os.path.join(entry_dir, ARRAY_DIR)),
+        }
+
+    def save(
+            self,
+            dsdl_yaml: str,
+            dsdl_library_path: str,
+            definition: str,
+            sample_type: str,
+            sample_path,
+            import_files: List[str],
+            state: Dict[str, Any],
+            fields: Optional[List[str]] = None,
+            validation: str = "strict",
+    ):
+        """
+        写入缓存：先写到临时目录中，完成后再替换旧的缓存目录，避免其他进程读到不完整的缓存。
+        """
+        entry_dir = self.entry_dir(dsdl_yaml, dsdl_library_path)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix=".tmp-")
+        try:
+            os.makedirs(os.path.join(tmp_dir, ARRAY_DIR))
+            key = self.content_key(dsdl_yaml, import_files, self.sample_files(dsdl_yaml, sample_path))
+            manifest = {
+                "key": key,
+                "definition": definition_key(key, definition),
+                "sample_type": sample_type,
+                "sample_path": sample_path,
+                "import_files": import_files,
+                "fields": fields,
+                "validation": validation,
+                "state": _dump_state(state, os.path.join(tmp_dir, ARRAY_DIR), [0]),
+            }
+            with open(os.path.join(tmp_dir, DEFINITION_FILE), "w", encoding="utf-8") as f:
+                f.write(definition)
+            with open(os.path.join(tmp_dir, MANIFEST_FILE), "w") as f:
+                json.dump(manifest, f)
+            if os.path.isdir(entry_dir):
+                shutil.rmtree(entry_dir)
+            os.replace(tmp_dir, entry_dir)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+
+def _dump_state(state, array_dir, counter):
+    """
+    将 `StructTable.state()` 中的数组写入array_dir，返回可以json序列化的结构描述。
+    """
+    if isinstance(state, np.ndarray) and state.dtype.hasobject:
+        # 超出int64范围的整数列为object数组，无法mmap，与ObjectColumn一样整体pickle
+        name = f"{counter[0]:06d}.pkl"
+        counter[0] += 1
+        with open(os.path.join(array_dir, name), "wb") as f:
+            pickle.dump(state.tolist(), f)
+        return {"$objects": name}
+    if isinstance(state, np.ndarray):
+        name = f"{counter[0]:06d}.npy"
+        counter[0] += 1
+        np.save(os.path.join(array_dir, name), state)
+        return {"$array": name}
+    if isinstance(state, list):
+        # ObjectColumn中的Python对象无法以数组的形式保存
+        name = f"{counter[0]:06d}.pkl"
+        counter[0] += 1
+        with open(os.path.join(array_dir, name), "wb") as f:
+            pickle.dump(state, f)
+        return {"$pickle": name}
+    if isinstance(state, dict):
+        return {"$dict": {k: _dump_state(v, array_dir, counter) for k, v in state.items()}}
+    return state
+
+
+def _load_state(desc, array_dir):
+    if isinstance(desc, dict):
+        if "$array" in desc:
+            return np.load(os.path.join(array_dir, desc["$array"]), mmap_mode="r")
+        if "$objects" in desc:
+            with open(os.path.join(array_dir, desc["$objects"]), "rb") as f:
+                return object_array(pickle.load(f))
+        if "$pickle" in desc:
+            with open(os.path.join(array_dir, desc["$pickle"]), "rb") as f:
+                return pickle.load(f)
+        return {k: _load_state(v, array_dir) for k, v in desc["$dict"].items()}
+    return desc
+
+
+class MappedArray:
+    """
+    以mmap方式打开的数组的句柄（文件路径、偏移量、类型和形状），pickle时代替数组本身，反序列化后重新mmap该文件。
+    """
+
+    def __init__(self, filename, offset, dtype, shape, order):
+        self.filename = filename
+        self.offset = offset
+        self.dtype = dtype
+        self.shape = shape
+        self.order = order
+
+    @classmethod
+    def from_array(cls, arr: np.memmap):
+        order = "F" if arr.flags.f_contiguous and not arr.flags.c_contiguous else "C"
+        return cls(arr.filename, arr.offset, arr.dtype.str, arr.shape, order)
+
+    def open(self):
+        return np.memmap(self.filename, dtype=np.dtype(self.dtype), mode="r", offset=self.offset, shape=self.shape,
+                         order=self.order)
+
+
+def _is_file_mapped(arr):
+    # 只有直接由文件映射得到的数组才能用句柄代替，切片等视图的偏移量与文件不一致
+    return isinstance(arr, np.memmap) and isinstance(arr.base, mmap.mmap) and arr.filename is not None and arr.size > 0
+
+
+def state_to_handles(state):
+    """
+    将 `StructTable.state()` 中以mmap方式打开的数组替换为 `MappedArray` 句柄，使pickle后的体积与样本数量无关。
+    """
+    if isinstance(state, np.ndarray):
+        return MappedArray.from_array(state) if _is_file_mapped(state) else state
+    if isinstance(state, dict):
+        return {k: state_to_handles(v) for k, v in state.items()}
+    return state
+
+
+def handles_to_state(state):
+    if isinstance(state, MappedArray):
+        return state.open()
+    if isinstance(state, dict):
+        return {k: handles_to_state(v) for k, v in state.items()}
+    return state
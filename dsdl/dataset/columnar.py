@@ -0,0 +1,784 @@
+from array import array
+from typing import List
+
+import numpy as np
+
+from ..geometry import Attributes, BBox, BBoxArray, ImageMedia, KeyPoints, Polygon, RlePolygon, SegmentationMap
+from ..types import (
+    BBoxField,
+    BoolField,
+    Coord3DField,
+    CoordField,
+    ImageField,
+    IntervalField,
+    IntField,
+    KeypointField,
+    LabelField,
+    ListField,
+    NumField,
+    PolygonField,
+    RlePolygonField,
+    SegMapField,
+    StrField,
+    Struct,
+)
+from ..types.unstructure import FileReader
+from .utils import Util
+
+
+class Column:
+    """
+    列的基类：加载阶段通过 `append` 逐个写入校验后的字段值，`finalize` 后转换为连续的NumPy数组，
+    访问时通过 `decode` 重建与 `Dataset._parse_struct` 相同的字段值。
+
+    `array_names` 为该列的全部数组，其中 `offset_names` 为偏移量数组（合并时需要平移）。
+    `state`/`load_state` 用于在进程之间或磁盘上传递这些数组，`merge_states` 用于按顺序拼接多个分块的数组。
+    `lossless` 为False的列在重建时不能保证与原始的Python对象完全一致（如float32坐标、整数形式的布尔值）。
+    """
+    array_names = ("values",)
+    offset_names = ()
+    lossless = True
+
+    def __init__(self, field, float_dtype=np.float32):
+        self.field = field
+        self.float_dtype = float_dtype
+
+    def append(self, value):
+        raise NotImplementedError
+
+    def finalize(self):
+        raise NotImplementedError
+
+    def decode(self, row, file_reader):
+        raise NotImplementedError
+
+    def state(self):
+        return {name: getattr(self, name) for name in self.array_names}
+
+    def load_state(self, state):
+        for name in self.array_names:
+            setattr(self, name, state[name])
+        self._pending = None
+
+    def merge_states(self, states):
+        merged = {}
+        for name in self.array_names:
+            parts = [_[name] for _ in states]
+            merged[name] = merge_offsets(parts) if name in self.offset_names else np.concatenate(parts)
+        return merged
+
+    def take(self, rows, path, out, present=None, read_media=None):
+        """
+        批量取出rows对应的值，以 `path` 为键写入out中。present不为None时表示部分样本缺失该字段，
+        此时结果与present对齐，缺失的位置填0，rows只包含存在该字段的样本在本列中的下标。
+        """
+        out[path] = fill_missing(self.values[rows], present)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.array_names)
+
+
+class ScalarColumn(Column):
+    typecode = "d"
+    dtype = np.float64
+
+    def __init__(self, field, float_dtype=np.float32):
+        super().__init__(field, float_dtype)
+        self._pending = array(self.typecode)
+        self.values = None
+
+    def append(self, value):
+        self._pending.append(value)
+
+    def finalize(self):
+        self.values = np.frombuffer(self._pending, dtype=self._pending_dtype()).astype(self.dtype)
+        self._pending = None
+
+    def _pending_dtype(self):
+        return np.dtype(self.typecode)
+
+    def decode(self, row, file_reader):
+        return self.values[row].item()
+
+
+class BoolColumn(ScalarColumn):
+    typecode = "b"
+    dtype = np.bool_
+    # BoolField 同样接受0/1，重建后会变为False/True
+    lossless = False
+
+    def _pending_dtype(self):
+        return np.int8
+
+
+class IntColumn(ScalarColumn):
+    """
+    整数列，存储为int64数组；出现超出int64范围的整数时整列改为Python int组成的object数组，保证重建结果不变。
+    """
+    typecode = "q"
+    dtype = np.int64
+
+    def append(self, value):
+        if isinstance(self._pending, list):
+            self._pending.append(value)
+            return
+        try:
+            self._pending.append(value)
+        except OverflowError:
+            self._pending = self._pending.tolist() + [value]
+
+    def finalize(self):
+        if isinstance(self._pending, list):
+            self.values = object_array(self._pending)
+            self._pending = None
+        else:
+            super().finalize()
+
+    def decode(self, row, file_reader):
+        value = self.values[row]
+        return value if isinstance(value, int) else value.item()
+
+
+class NumColumn(ScalarColumn):
+    typecode = "d"
+    dtype = np.float64
+
+
+class StrColumn(Column):
+    """
+    字符串组成的列：所有字符串保存在一块连续的utf-8字节缓冲区 `data` 中，`offsets` 记录每个字符串的范围，
+    避免为每个样本创建Python字符串对象。
+    """
+    array_names = ("data", "offsets")
+    offset_names = ("offsets",)
+
+    def __init__(self, field, float_dtype=np.float32):
+        super().__init__(field, float_dtype)
+        self._pending = []
+        self.data = None
+        self.offsets = None
+
+    def append(self, value):
+        self._pending.append(value.encode("utf-8"))
+
+    def finalize(self):
+        lengths = np.fromiter((len(_) for _ in self._pending), dtype=np.int64, count=len(self._pending))
+        self.offsets = np.zeros(len(self._pending) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.offsets[1:])
+        self.data = np.frombuffer(b"".join(self._pending), dtype=np.uint8)
+        self._pending = None
+
+    def get_str(self, row):
+        return self.data[self.offsets[row]:self.offsets[row + 1]].tobytes().decode("utf-8")
+
+    def decode(self, row, file_reader):
+        return self.get_str(row)
+
+    def take(self, rows, path, out, present=None, read_media=None):
+        out[path] = fill_missing_objects([self.get_str(row) for row in rows], present)
+
+
+class VectorColumn(Column):
+    """
+    定长数值列表（Coord/Coord3D/Interval）组成的列，存储为 (N, size) 的float64数组。
+    """
+    size = 2
+
+    def __init__(self, field, float_dtype=np.float32):
+        super().__init__(field, float_dtype)
+        self._pending = array("d")
+        self.values = None
+
+    def append(self, value):
+        self._pending.extend(value)
+
+    def finalize(self):
+        self.values = np.frombuffer(self._pending, dtype=np.float64).reshape(-1, self.size).copy()
+        self._pending = None
+
+    def decode(self, row, file_reader):
+        return self.values[row].tolist()
+
+
+class CoordColumn(VectorColumn):
+    size = 2
+
+
+class Coord3DColumn(VectorColumn):
+    size = 3
+
+
+class BBoxColumn(VectorColumn):
+    """
+    BBox组成的列，存储为 (N, 4) 的 `float_dtype` 数组。
+    """
+    size = 4
+
+    def append(self, value):
+        self._pending.extend(value.xywh)
+
+    def finalize(self):
+        self.values = np.frombuffer(self._pending, dtype=np.float64).reshape(-1, self.size).astype(self.float_dtype)
+        self._pending = None
+
+    def decode(self, row, file_reader):
+        return BBox(*self.values[row].tolist())
+
+    def decode_array(self, start, stop):
+        # float_dtype为float32时直接使用该数组的视图
+        return BBoxArray.from_array(self.values[start:stop].astype(np.float32, copy=False))
+
+
+class LabelColumn(Column):
+    """
+    Label组成的列，存储为该Label在类别域中的序号（从1开始，与 `ClassDomain.get_label(int)` 一致）。
+    """
+
+    def __init__(self, field, float_dtype=np.float32):
+        super().__init__(field, float_dtype)
+        self._labels = field.dom.get_labels()
+        self._name_to_id = field.dom.get_name_to_id()
+        self._pending = array("i")
+        self.values = None
+
+    def append(self, value):
+        self._pending.append(self._name_to_id[value.name])
+
+    def finalize(self):
+        self.values = np.frombuffer(self._pending, dtype=np.int32).copy()
+        self._pending = None
+
+    def decode(self, row, file_reader):
+        return self._labels[self.values[row] - 1]
+
+
+class ImageColumn(StrColumn):
+    """
+    非结构化对象（Image）组成的列，只保存其 `$loc`，访问时再与file_reader组合为媒体对象。
+    """
+    # 字典形式的值中除 `$loc` 以外的键不会保存
+    lossless = False
+
+    def append(self, value):
+        super().append(value.location)
+
+    def decode(self, row, file_reader):
+        location = self.get_str(row)
+        return ImageMedia(location, FileReader(file_reader, {"$loc": location}))
+
+    def take(self, rows, path, out, present=None, read_media=None):
+        locations = [self.get_str(row) for row in rows]
+        out[path] = fill_missing_objects(read_media(locations) if read_media else locations, present)
+
+
+class SegMapColumn(StrColumn):
+    lossless = False
+
+    def append(self, value):
+        super().append(value.location)
+
+    def decode(self, row, file_reader):
+        location = self.get_str(row)
+        return SegmentationMap(location, FileReader(file_reader, {"$loc": location}), self.field.dom)
+
+    def take(self, rows, path, out, present=None, read_media=None):
+        locations = [self.get_str(row) for row in rows]
+        out[path] = fill_missing_objects(read_media(locations) if read_media else locations, present)
+
+
+class PolygonColumn(Column):
+    """
+    Polygon组成的列：所有点存储在一个 (P, 2) 的 `float_dtype` 数组中，
+    `ring_offsets` 记录每个环的点的范围，`offsets` 记录每个样本的环的范围。
+    Polygon本身的坐标为float32，float_dtype为float32时重建的Polygon直接使用该数组的视图。
+    """
+    array_names = ("coords", "ring_offsets", "offsets")
+    offset_names = ("ring_offsets", "offsets")
+
+    def __init__(self, field, float_dtype=np.float32):
+        super().__init__(field, float_dtype)
+        self._pending_coords = []
+        self._pending_rings = []
+        self._pending = array("q")
+        self.coords = None
+        self.ring_offsets = None
+        self.offsets = None
+
+    def append(self, value):
+        self._pending_coords.append(value.coords)
+        self._pending_rings.append(np.diff(value.ring_offsets))
+        self._pending.append(len(value.ring_offsets) - 1)
+
+    def finalize(self):
+        self.coords = np.concatenate(self._pending_coords + [np.zeros((0, 2), dtype=np.float32)]).astype(
+            self.float_dtype)
+        self.ring_offsets = lengths_to_offsets(np.concatenate(self._pending_rings + [np.zeros(0, dtype=np.int64)]))
+        self.offsets = lengths_to_offsets(self._pending)
+        self._pending_coords = self._pending_rings = self._pending = None
+
+    def decode(self, row, file_reader):
+        first, last = self.offsets[row], self.offsets[row + 1]
+        ring_offsets = self.ring_offsets[first:last + 1]
+        start = ring_offsets[0]
+        coords = self.coords[start:ring_offsets[-1]]
+        return Polygon.from_arrays(coords.astype(np.float32, copy=False), ring_offsets - start)
+
+    def take(self, rows, path, out, present=None, read_media=None):
+        offsets, rings = ragged_take(self.offsets, rows, present)
+        ring_offsets, points = ragged_take(self.ring_offsets, rings)
+        out[path] = self.coords[points]
+        out[path + "/$ring_offsets"] = ring_offsets
+        out[path + "/$offsets"] = offsets
+
+
+class RlePolygonColumn(Column):
+    """
+    RlePolygon组成的列：所有游程拼接为一个uint32数组，`offsets` 记录每个RLE的游程的范围，`sizes` 为 (N, 2) 的 [height, width]。
+    重建的RlePolygon直接使用游程数组的视图。
+    """
+    array_names = ("counts", "offsets", "sizes")
+    offset_names = ("offsets",)
+
+    def __init__(self, field, float_dtype=np.float32):
+        super().__init__(field, float_dtype)
+        self._pending_counts = []
+        self._pending_sizes = array("q")
+        self._pending = array("q")
+        self.counts = None
+        self.offsets = None
+        self.sizes = None
+
+    def append(self, value):
+        self._pending_counts.append(value.counts)
+        self._pending_sizes.extend(value.size)
+        self._pending.append(len(value.counts))
+
+    def finalize(self):
+        self.counts = np.concatenate(self._pending_counts + [np.zeros(0, dtype=np.uint32)]).astype(np.uint32)
+        self.offsets = lengths_to_offsets(self._pending)
+        self.sizes = np.frombuffer(self._pending_sizes, dtype=np.int64).reshape(-1, 2).copy()
+        self._pending_counts = self._pending_sizes = self._pending = None
+
+    def decode(self, row, file_reader):
+        height, width = self.sizes[row].tolist()
+        return RlePolygon.from_counts(self.counts[self.offsets[row]:self.offsets[row + 1]], (height, width))
+
+    def take(self, rows, path, out, present=None, read_media=None):
+        offsets, indices = ragged_take(self.offsets, rows, present)
+        out[path] = self.counts[indices]
+        out[path + "/$offsets"] = offsets
+        out[path + "/$size"] = fill_missing(self.sizes[rows], present)
+
+
+class KeypointColumn(Column):
+    """
+    KeyPoints组成的列，存储为 (N, K, 3) 的 `float_dtype` 数组，K为关键点类别域的类别数量。
+    float_dtype为float32时重建的KeyPoints直接使用该数组的视图。
+    """
+
+    def __init__(self, field, float_dtype=np.float32):
+        super().__init__(field, float_dtype)
+        self._num_points = len(field.dom)
+        self._pending = []
+        self.values = None
+
+    def append(self, value):
+        self._pending.append(value.array)
+
+    def finalize(self):
+        empty = np.zeros((0, self._num_points, 3), dtype=np.float32)
+        self.values = np.concatenate([_[None] for _ in self._pending] + [empty]).astype(self.float_dtype)
+        self._pending = None
+
+    def decode(self, row, file_reader):
+        return KeyPoints.from_array(self.values[row].astype(np.float32, copy=False), self.field.dom)
+
+
+class ObjectColumn(Column):
+    """
+    无法列式存储的字段（如Date/Time或自定义的Field）退化为普通的Python对象列表。
+    """
+
+    def __init__(self, field, float_dtype=np.float32):
+        super().__init__(field, float_dtype)
+        self.values = []
+
+    def append(self, value):
+        self.values.append(value)
+
+    def finalize(self):
+        pass
+
+    def decode(self, row, file_reader):
+        return self.values[row]
+
+    def merge_states(self, states):
+        return {"values": [item for state in states for item in state["values"]]}
+
+    def take(self, rows, path, out, present=None, read_media=None):
+        out[path] = fill_missing_objects([self.values[row] for row in rows], present)
+
+    @property
+    def nbytes(self):
+        return 0
+
+
+class ListColumn(Column):
+    """
+    ListField组成的列：`offsets` 记录每个样本的元素在子列中的范围，子列为元素Field对应的列或元素Struct对应的StructTable。
+    ListField的as_array为True时，通过子列的 `decode_array` 重建元素组成的数组（如 `BBoxArray`）。
+    """
+    array_names = ("offsets",)
+    offset_names = ("offsets",)
+
+    def __init__(self, field, float_dtype=np.float32, exact=False, projection=None):
+        super().__init__(field, float_dtype)
+        if isinstance(field.ele_type, Struct):
+            self.child = StructTable(field.ele_type.__class__, float_dtype, exact, projection)
+        else:
+            self.child = build_column(field.ele_type, float_dtype, exact)
+        self._pending = array("q")
+        self.offsets = None
+
+    def append(self, value):
+        for item in value:
+            self.child.append(item)
+        self._pending.append(len(value))
+
+    def finalize(self):
+        self.child.finalize()
+        self.offsets = lengths_to_offsets(self._pending)
+        self._pending = None
+
+    def decode(self, row, file_reader):
+        if self.field.as_array:
+            return self.child.decode_array(self.offsets[row], self.offsets[row + 1])
+        return [self.child.decode(ind, file_reader) for ind in range(self.offsets[row], self.offsets[row + 1])]
+
+    def state(self):
+        state = super().state()
+        state["child"] = self.child.state()
+        return state
+
+    def load_state(self, state):
+        super().load_state(state)
+        self.child.load_state(state["child"])
+
+    def merge_states(self, states):
+        merged = super().merge_states(states)
+        merged["child"] = self.child.merge_states([_["child"] for _ in states])
+        return merged
+
+    def take(self, rows, path, out, present=None, read_media=None):
+        offsets, child_rows = ragged_take(self.offsets, rows, present)
+        out[path + "/$offsets"] = offsets
+        if isinstance(self.child, StructTable):
+            self.child.take(child_rows, path, out, read_media)
+        else:
+            self.child.take(child_rows, path, out, None, read_media)
+
+    @property
+    def nbytes(self):
+        return self.offsets.nbytes + self.child.nbytes
+
+
+class StructTable:
+    """
+    同一Struct类型的所有样本组成的表，每个字段对应一列；
+    对于存在缺失值的字段，额外用一个布尔数组记录每一行是否存在该字段。
+    指定projection（`Struct.compile_projection` 的返回值）时只保存投影中的字段。
+    """
+
+    def __init__(self, struct_cls, float_dtype=np.float32, exact=False, projection=None):
+        self.struct_cls = struct_cls
+        self.projection = projection
+        if exact:
+            float_dtype = np.float64
+        # 与Struct.__init__中的赋值顺序一致：先required，后optional
+        self._order = [
+            k for k in list(struct_cls.__required__) + list(struct_cls.__optional__)
+            if projection is None or k in projection
+        ]
+        self._mappings = struct_cls.__mappings__
+        self._attr = struct_cls.__attr__
+        self._field_keys = {k: Util.extract_key(v) for k, v in self._mappings.items()}
+        self.columns = {
+            k: build_column(self._mappings[k], float_dtype, exact, None if projection is None else projection[k])
+            for k in self._order
+        }
+        self._pending_presence = {k: array("b") for k in self._order}
+        self.presence = {}
+        self._positions = {}
+        self._length = 0
+
+    def append(self, struct):
+        keys = set(struct.keys())
+        for k in self._order:
+            if k in self._attr:
+                present = k in struct.attributes
+                value = struct.attributes[k] if present else None
+            else:
+                present = k in keys
+                value = struct[k] if present else None
+            self._pending_presence[k].append(present)
+            if present:
+                self.columns[k].append(value)
+        self._length += 1
+
+    def finalize(self):
+        for k in self._order:
+            self.columns[k].finalize()
+            presence = np.frombuffer(self._pending_presence[k], dtype=np.int8).astype(np.bool_)
+            # 字段在所有行中都存在时不保存presence数组，且行号即为列中的下标
+            self._set_presence(k, None if presence.all() else presence)
+        self._pending_presence = None
+
+    def _set_presence(self, key, mask):
+        self.presence[key] = mask
+        self._positions[key] = None if mask is None else np.cumsum(mask) - 1
+
+    def _column_row(self, key, row):
+        mask = self.presence[key]
+        if mask is None:
+            return row
+        if not mask[row]:
+            return None
+        return self._positions[key][row]
+
+    def decode(self, row, file_reader):
+        """
+        重建第row行对应的样本，结果与 `Dataset._parse_struct` 的返回值结构相同。
+        """
+        data_item = {}
+        attributes = Attributes()
+        for k in self._order:
+            column_row = self._column_row(k, row)
+            if column_row is None:
+                continue
+            value = self.columns[k].decode(column_row, file_reader)
+            if k in self._attr:
+                attributes[k] = value
+                continue
+            field_key = self._field_keys[k]
+            if field_key in data_item:
+                data_item[field_key][k] = value
+            else:
+                data_item[field_key] = {k: value}
+        data_item["$attributes"] = {"attributes": attributes}
+        if self.projection is not None:
+            return Util.project_data_item(data_item, self.struct_cls, self.projection)
+        return data_item
+
+    def take(self, rows, prefix, out, read_media=None):
+        """
+        批量取出rows对应的所有字段，结果以字段路径（如 `objects/bbox`）为键写入out中，参考 `Column.take`。
+        optional字段以及存在缺失的字段会额外返回 `<字段路径>/$mask`，缺失该字段的样本为False；
+        ListField和Polygon的嵌套用 `<字段路径>/$offsets` 表示。
+        """
+        for k in self._order:
+            path = f"{prefix}/{k}" if prefix else k
+            mask = self.presence[k]
+            if mask is None:
+                self.columns[k].take(rows, path, out, None, read_media)
+                if self._mappings[k].is_optional:
+                    out[path + "/$mask"] = np.ones(len(rows), dtype=np.bool_)
+                continue
+            present = mask[rows]
+            self.columns[k].take(self._positions[k][rows[present]], path, out, present, read_media)
+            out[path + "/$mask"] = present
+
+    def state(self):
+        return {
+            "length": self._length,
+            "presence": dict(self.presence),
+            "columns": {k: self.columns[k].state() for k in self._order},
+        }
+
+    def load_state(self, state):
+        self._length = state["length"]
+        for k in self._order:
+            self.columns[k].load_state(state["columns"][k])
+            self._set_presence(k, state["presence"][k])
+        self._pending_presence = None
+
+    def merge_states(self, states):
+        presence = {}
+        for k in self._order:
+            masks = [_["presence"][k] for _ in states]
+            if all(mask is None for mask in masks):
+                presence[k] = None
+            else:
+                presence[k] = np.concatenate([
+                    np.ones(state["length"], dtype=np.bool_) if mask is None else mask
+                    for state, mask in zip(states, masks)
+                ])
+        return {
+            "length": sum(_["length"] for _ in states),
+            "presence": presence,
+            "columns": {k: self.columns[k].merge_states([_["columns"][k] for _ in states]) for k in self._order},
+        }
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def nbytes(self):
+        total = 0
+        for k in self._order:
+            total += self.columns[k].nbytes
+            if self.presence[k] is not None:
+                total += self.presence[k].nbytes + self._positions[k].nbytes
+        return total
+
+
+class ColumnarSampleList:
+    """
+    列式存储的样本列表：每个叶子字段对应一个连续的NumPy数组（BBox为float32的 (N, 4) 数组，Label为int32的序号，
+    ListField的嵌套用偏移量数组表示，媒体文件的 `$loc` 保存在字符串表中），在访问时才重建嵌套的样本字典。
+
+    Arguments:
+        sample_type: 样本的Struct类型。
+        file_reader: 重建媒体对象时使用的file_reader。
+        float_dtype: BBox/Polygon/Keypoint等几何坐标的存储类型。
+        exact: 为True时几何坐标使用float64存储，且对无法无损重建的字段退化为对象列，保证重建结果与逐个解析的结果完全一致。
+        projection: 字段投影（`Struct.compile_projection` 的返回值），为None时保存所有字段。
+    """
+
+    def __init__(self, sample_type, file_reader, float_dtype=np.float32, exact=False, projection=None):
+        self.sample_type = sample_type
+        self.file_reader = file_reader
+        self.table = StructTable(sample_type, float_dtype, exact, projection)
+
+    @classmethod
+    def from_structs(cls, structs, sample_type, file_reader, float_dtype=np.float32, exact=False, projection=None):
+        sample_list = cls(sample_type, file_reader, float_dtype, exact, projection)
+        for struct in structs:
+            sample_list.table.append(struct)
+        sample_list.table.finalize()
+        return sample_list
+
+    @classmethod
+    def from_states(cls, states, sample_type, file_reader, float_dtype=np.float32, exact=False, projection=None):
+        """
+        按顺序拼接多个分块（如多个进程分别编码得到的 `table.state()`）得到完整的样本列表。
+        """
+        sample_list = cls(sample_type, file_reader, float_dtype, exact, projection)
+        sample_list.table.load_state(sample_list.table.merge_states(states))
+        return sample_list
+
+    @property
+    def nbytes(self):
+        return self.table.nbytes
+
+    def __len__(self):
+        return len(self.table)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        length = len(self)
+        if idx < 0:
+            idx += length
+        if not 0 <= idx < length:
+            raise IndexError("sample index out of range")
+        return self.table.decode(idx, self.file_reader)
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self.table.decode(idx, self.file_reader)
+
+
+COLUMN_TYPES = {
+    BoolField: BoolColumn,
+    IntField: IntColumn,
+    NumField: NumColumn,
+    StrField: StrColumn,
+    CoordField: CoordColumn,
+    Coord3DField: Coord3DColumn,
+    IntervalField: CoordColumn,
+    BBoxField: BBoxColumn,
+    LabelField: LabelColumn,
+    ImageField: ImageColumn,
+    SegMapField: SegMapColumn,
+    PolygonField: PolygonColumn,
+    RlePolygonField: RlePolygonColumn,
+    KeypointField: KeypointColumn,
+    ListField: ListColumn,
+}
+
+
+def build_column(field, float_dtype=np.float32, exact=False, projection=None) -> Column:
+    for cls in type(field).__mro__:
+        if cls in COLUMN_TYPES:
+            column_cls = COLUMN_TYPES[cls]
+            if column_cls is ListColumn:
+                return ListColumn(field, float_dtype, exact, projection)
+            if exact and not column_cls.lossless:
+                break
+            return column_cls(field, float_dtype)
+    return ObjectColumn(field, float_dtype)
+
+
+def ragged_take(offsets, rows, present=None):
+    """
+    从偏移量数组表示的嵌套列表中取出rows对应的元素。
+
+    Returns:
+        新的偏移量数组（present不为None时与present对齐，缺失的位置长度为0）以及被取出的元素在子列中的下标。
+    """
+    starts = offsets[rows]
+    lengths = offsets[rows + 1] - starts
+    if present is not None:
+        full_lengths = np.zeros(len(present), dtype=np.int64)
+        full_lengths[present] = lengths
+    else:
+        full_lengths = lengths
+    new_offsets = np.zeros(len(full_lengths) + 1, dtype=np.int64)
+    np.cumsum(full_lengths, out=new_offsets[1:])
+    element_offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=element_offsets[1:])
+    indices = np.arange(element_offsets[-1], dtype=np.int64) + np.repeat(starts - element_offsets[:-1], lengths)
+    return new_offsets, indices
+
+
+def fill_missing(values: np.ndarray, present=None) -> np.ndarray:
+    if present is None:
+        return values
+    full = np.zeros((len(present),) + values.shape[1:], dtype=values.dtype)
+    full[present] = values
+    return full
+
+
+def fill_missing_objects(values: list, present=None) -> list:
+    if present is None:
+        return values
+    full = [None] * len(present)
+    for ind, value in zip(np.flatnonzero(present), values):
+        full[ind] = value
+    return full
+
+
+def object_array(values: list) -> np.ndarray:
+    # np.array会尝试把嵌套的列表转换为多维数组，这里逐个填入以得到一维的object数组
+    result = np.empty(len(values), dtype=object)
+    result[:] = values
+    return result
+
+
+def lengths_to_offsets(lengths) -> np.ndarray:
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(np.frombuffer(lengths, dtype=np.int64), out=offsets[1:])
+    return offsets
+
+
+def merge_offsets(parts: List[np.ndarray]) -> np.ndarray:
+    """
+    拼接多个分块的偏移量数组，后一个分块的偏移量需要加上前面所有分块的总长度。
+    """
+    merged = [np.zeros(1, dtype=np.int64)]
+    shift = 0
+    for offsets in parts:
+        merged.append(offsets[1:] + shift)
+        shift += offsets[-1]
+    return np.concatenate(merged)
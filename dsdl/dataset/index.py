@@ -0,0 +1,265 @@
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from ..geometry import Label
+from .columnar import (
+    BoolColumn,
+    ImageColumn,
+    IntColumn,
+    LabelColumn,
+    ListColumn,
+    NumColumn,
+    ObjectColumn,
+    SegMapColumn,
+    StrColumn,
+    StructTable,
+)
+
+# 作为索引key的字段值类型（Bool/Int/Num/Str字段以及这些类型的属性），其余类型（如列表）的字段不建立索引
+INDEXABLE_TYPES = (bool, int, float, str)
+
+
+class IndexQuery:
+    """
+    倒排索引的查询结果：升序排列、不重复的样本下标数组。
+
+    查询结果之间可以通过 `&`（且）、`|`（或）、`-`（差）和 `~`（非）组合，可以直接作为DataLoader的sampler使用
+    （按下标顺序遍历），或通过 `Dataset.subset` 得到只包含这些样本的子集。
+    """
+
+    def __init__(self, indices: np.ndarray, length: int):
+        self.indices = indices
+        self.length = length  # 数据集的样本数量，用于计算补集
+
+    def __and__(self, other):
+        return IndexQuery(self.indices[_isin_sorted(self.indices, other.indices, self.length)], self.length)
+
+    def __or__(self, other):
+        return IndexQuery(_union_sorted(self.indices, other.indices, self.length), self.length)
+
+    def __sub__(self, other):
+        return IndexQuery(self.indices[~_isin_sorted(self.indices, other.indices, self.length)], self.length)
+
+    def __invert__(self):
+        mask = np.ones(self.length, dtype=np.bool_)
+        mask[self.indices] = False
+        return IndexQuery(np.flatnonzero(mask), self.length)
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __iter__(self):
+        return iter(self.indices.tolist())
+
+    def __array__(self, dtype=None, copy=None):
+        return self.indices if dtype is None else self.indices.astype(dtype)
+
+    def __repr__(self):
+        return f"IndexQuery({len(self)} of {self.length} samples)"
+
+
+def _is_dense(a, b, length):
+    return len(a) + len(b) > length // 8
+
+
+def _isin_sorted(a, b, length):
+    """
+    a、b均为升序排列的下标数组，返回a中每个元素是否在b中（稠密时查布尔数组，否则二分查找，均不需要重新排序）。
+    """
+    if len(b) == 0:
+        return np.zeros(len(a), dtype=np.bool_)
+    if _is_dense(a, b, length):
+        mask = np.zeros(length, dtype=np.bool_)
+        mask[b] = True
+        return mask[a]
+    pos = np.searchsorted(b, a)
+    np.minimum(pos, len(b) - 1, out=pos)
+    return b[pos] == a
+
+
+def _union_sorted(a, b, length):
+    if _is_dense(a, b, length):
+        # 结果较稠密时直接使用长度为length的布尔数组
+        mask = np.zeros(length, dtype=np.bool_)
+        mask[a] = True
+        mask[b] = True
+        return np.flatnonzero(mask)
+    merged = np.concatenate((a, b))
+    merged.sort()
+    if len(merged) == 0:
+        return merged
+    keep = np.empty(len(merged), dtype=np.bool_)
+    keep[0] = True
+    np.not_equal(merged[1:], merged[:-1], out=keep[1:])
+    return merged[keep]
+
+
+class SampleIndex:
+    """
+    从类别（`Label.registry_name`）和标量字段的值到样本下标的倒排索引，包含嵌套在ListField的Struct元素中的类别和字段。
+    标量字段为BoolField、IntField、NumField、StrField以及值为这些类型的属性（`is_attr`），统一以字段名作为属性名查询；
+    ListField中的标量元素（如 `ListField(ele_type=IntField())`）不建立索引。
+
+    Arguments:
+        length: 数据集的样本数量。
+        postings: key为 `("label", registry_name)` 或 `("attribute", 字段名, 字段值)`，value为升序排列的样本下标数组。
+    """
+
+    def __init__(self, length: int, postings: Dict[Tuple, np.ndarray]):
+        self.length = length
+        self.postings = postings
+        self._label_names = {}  # 类别名 -> registry_name，同名的类别可能属于不同的类别域
+        self._name_queries = {}
+        for key in postings:
+            if key[0] == "label":
+                self._label_names.setdefault(key[1].split("__", 1)[-1], []).append(key[1])
+
+    @classmethod
+    def from_table(cls, table: StructTable):
+        """
+        直接在列式存储的数组上建立索引，不需要重建样本。
+        """
+        builder = _PostingsBuilder()
+        _index_table(table, np.arange(len(table), dtype=np.int64), builder)
+        return cls(len(table), builder.build())
+
+    @classmethod
+    def from_items(cls, data_items: Iterable[dict]):
+        """
+        遍历 `Dataset._parse_struct` 结构的样本建立索引。
+        """
+        builder = _PostingsBuilder()
+        length = 0
+        for ind, data_item in enumerate(data_items):
+            _index_item(data_item, ind, builder)
+            length += 1
+        return cls(length, builder.build())
+
+    def _query(self, key):
+        return IndexQuery(self.postings.get(key, np.empty(0, dtype=np.int64)), self.length)
+
+    def label(self, name: str) -> IndexQuery:
+        """
+        包含该类别的样本，name可以是 `Label.registry_name`（`<类别域>__<类别名>`）或类别名（匹配所有类别域中的同名类别）。
+        """
+        if isinstance(name, Label):
+            name = name.registry_name
+        if ("label", name) in self.postings:
+            return self._query(("label", name))
+        if name not in self._name_queries:
+            result = self._query(None)
+            for registry_name in self._label_names.get(name, []):
+                result = result | self._query(("label", registry_name))
+            self._name_queries[name] = result
+        return self._name_queries[name]
+
+    def attribute(self, name: str, value) -> IndexQuery:
+        """
+        包含该字段值的样本（字段可以位于样本本身或ListField中的Struct元素上），如 `attribute("is_crowd", True)`。
+        """
+        return self._query(("attribute", name, value))
+
+    def all(self) -> IndexQuery:
+        return IndexQuery(np.arange(self.length, dtype=np.int64), self.length)
+
+    @property
+    def labels(self) -> List[str]:
+        return [key[1] for key in self.postings if key[0] == "label"]
+
+    @property
+    def attributes(self) -> List[Tuple]:
+        return [key[1:] for key in self.postings if key[0] == "attribute"]
+
+
+class _PostingsBuilder:
+
+    def __init__(self):
+        self._arrays = {}  # key -> [样本下标数组]
+        self._ids = {}  # key -> [样本下标]，逐个样本建立索引时使用
+
+    def add_array(self, key, sample_ids):
+        self._arrays.setdefault(key, []).append(sample_ids)
+
+    def add(self, key, sample_id):
+        self._ids.setdefault(key, []).append(sample_id)
+
+    def build(self):
+        postings = {}
+        for key in set(self._arrays) | set(self._ids):
+            parts = self._arrays.get(key, []) + [np.array(self._ids.get(key, []), dtype=np.int64)]
+            postings[key] = np.unique(np.concatenate(parts)).astype(np.int64)
+        return postings
+
+
+def _group_by(keys, sample_ids):
+    """
+    按keys分组，返回 (key, 该组的样本下标) 的迭代器。
+    """
+    if len(keys) == 0:
+        return
+    uniques, inverse = np.unique(keys, return_inverse=True)
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.searchsorted(inverse[order], np.arange(len(uniques) + 1))
+    for ind, key in enumerate(uniques):
+        yield key, sample_ids[order[bounds[ind]:bounds[ind + 1]]]
+
+
+def _index_column(column, name, sample_ids, builder, scalar=True):
+    # scalar为False时column为ListField的元素，只索引其中的类别
+    if isinstance(column, LabelColumn):
+        for label_id, ids in _group_by(column.values, sample_ids):
+            builder.add_array(("label", column._labels[label_id - 1].registry_name), ids)
+    elif isinstance(column, ListColumn):
+        child_ids = np.repeat(sample_ids, np.diff(column.offsets))
+        if isinstance(column.child, StructTable):
+            _index_table(column.child, child_ids, builder)
+        else:
+            _index_column(column.child, name, child_ids, builder, scalar=False)
+    elif not scalar or isinstance(column, (ImageColumn, SegMapColumn)):  # 媒体文件的路径不是字段值
+        return
+    elif isinstance(column, (BoolColumn, IntColumn, NumColumn, StrColumn)):
+        if isinstance(column, StrColumn):
+            values = np.array([column.get_str(row) for row in range(len(sample_ids))])
+        else:
+            values = column.values
+        for value, ids in _group_by(values, sample_ids):
+            # 超出int64范围的整数列为object数组，其中的值已经是Python int
+            builder.add_array(("attribute", name, value.item() if isinstance(value, np.generic) else value), ids)
+    elif isinstance(column, ObjectColumn):
+        for value, sample_id in zip(column.values, sample_ids.tolist()):
+            if isinstance(value, INDEXABLE_TYPES):
+                builder.add(("attribute", name, value), sample_id)
+
+
+def _index_table(table, sample_ids, builder):
+    for k in table._order:
+        mask = table.presence[k]
+        _index_column(table.columns[k], k, sample_ids if mask is None else sample_ids[mask], builder)
+
+
+def _index_item(data_item, sample_id, builder):
+    for field_key, group in data_item.items():
+        if field_key == "$attributes":
+            attributes = group["attributes"]
+            for name in attributes.keys():
+                value = attributes[name]
+                if isinstance(value, INDEXABLE_TYPES):
+                    builder.add(("attribute", name, value), sample_id)
+            continue
+        for name, value in group.items():
+            if isinstance(value, INDEXABLE_TYPES):
+                builder.add(("attribute", name, value), sample_id)
+            else:
+                _index_value(value, sample_id, builder)
+
+
+def _index_value(value, sample_id, builder):
+    # ListField中的标量元素不建立索引
+    if isinstance(value, Label):
+        builder.add(("label", value.registry_name), sample_id)
+    elif isinstance(value, list):
+        for item in value:
+            _index_value(item, sample_id, builder)
+    elif isinstance(value, dict):
+        _index_item(value, sample_id, builder)
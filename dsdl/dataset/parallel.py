@@ -0,0 +1,73 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from .columnar import StructTable
+
+# 子进程通过fork继承该上下文（样本、Struct类型、file_reader），因此任务中只需要传递样本的下标范围。
+# Struct类型由dsdl生成的代码动态定义，无法通过pickle传递到spawn方式启动的子进程中。
+_WORKER_CONTEXT = {}
+
+
+def _encode_chunk(start, stop):
+    samples = _WORKER_CONTEXT["samples"]
+    sample_type = _WORKER_CONTEXT["sample_type"]
+    file_reader = _WORKER_CONTEXT["file_reader"]
+    projection = _WORKER_CONTEXT["projection"]
+    validation = _WORKER_CONTEXT["validation"]
+    table = StructTable(sample_type, _WORKER_CONTEXT["float_dtype"], _WORKER_CONTEXT["exact"], projection)
+    for ind in range(start, stop):
+        table.append(sample_type(file_reader=file_reader, projection=projection, validation=validation, **samples[ind]))
+    table.finalize()
+    return table.state()
+
+
+def split_chunks(length, num_chunks):
+    """
+    将 [0, length) 尽量均匀地划分为num_chunks个连续的区间。
+    """
+    num_chunks = max(1, min(num_chunks, length))
+    step, remainder = divmod(length, num_chunks)
+    chunks = []
+    start = 0
+    for ind in range(num_chunks):
+        stop = start + step + (1 if ind < remainder else 0)
+        chunks.append((start, stop))
+        start = stop
+    return chunks
+
+
+def fork_available():
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def encode_samples_parallel(samples, sample_type, file_reader, num_workers, float_dtype, exact, chunks_per_worker=4,
+                            projection=None, validation="strict"):
+    """
+    在进程池中并行地校验样本，每个子进程将一段连续样本的校验结果编码为紧凑的列式数组（`StructTable.state()`）返回。
+    返回值按样本顺序排列；若某个样本校验失败，抛出的异常与串行校验时第一个失败样本的异常相同。
+
+    Arguments:
+        samples: 原始样本字典组成的列表。
+        sample_type: 样本的Struct类型。
+        file_reader: 样本的file_reader。
+        num_workers: 进程数量。
+        float_dtype: 几何坐标的存储类型。
+        exact: 是否保证重建结果与逐个解析的结果完全一致，参考 `ColumnarSampleList`。
+        chunks_per_worker: 每个进程平均处理的分块数量，用于平衡各进程的负载。
+        projection: 字段投影，参考 `Struct.compile_projection`。
+        validation: 校验级别，参考 `Struct`。
+
+    Returns:
+        各个分块的 `StructTable.state()` 组成的列表。
+    """
+    chunks = split_chunks(len(samples), num_workers * chunks_per_worker)
+    _WORKER_CONTEXT.update(
+        samples=samples, sample_type=sample_type, file_reader=file_reader, float_dtype=float_dtype, exact=exact,
+        projection=projection, validation=validation,
+    )
+    try:
+        with ProcessPoolExecutor(max_workers=num_workers, mp_context=multiprocessing.get_context("fork")) as executor:
+            # executor.map按提交顺序返回结果，遇到第一个失败的分块时重新抛出其中第一个失败样本的异常
+            return list(executor.map(_encode_chunk, *zip(*chunks)))
+    finally:
+        _WORKER_CONTEXT.clear()
@@ -0,0 +1,273 @@
+import sys
+from time import perf_counter
+from typing import Dict
+
+import numpy as np
+
+from ..geometry import Label
+from ..objectio.base import BaseFileReader
+from ..types import Struct, StructRecord
+from .columnar import ListColumn, ObjectColumn, StructTable
+from .utils import Util
+
+# 由类别域、file_reader等全局对象持有或共享、不属于数据集本身的对象，不计入字段的内存
+SHARED_TYPES = (type, Label, BaseFileReader)
+ATOMIC_TYPES = (str, bytes, int, float, bool, type(None))
+# 样本中不存在某个字段时 `_struct_value` 的返回值
+MISSING = object()
+
+
+def field_paths(struct_cls, prefix=""):
+    """
+    按定义的顺序返回Struct中所有字段的路径（如 `objects/bbox`）、Field对象，ListField中的Struct递归展开。
+    """
+    for k, field in struct_cls.__mappings__.items():
+        path = prefix + k
+        yield path, field
+        ele_type = getattr(field, "ele_type", None)
+        if isinstance(ele_type, Struct):
+            yield from field_paths(ele_type.__class__, path + "/")
+
+
+def sizeof(value, memo):
+    """
+    value占用的内存（字节），递归计算其中的容器、对象属性和NumPy数组（视图计算其底层数组）。
+    memo中已经出现过的对象（包括同一次统计中已经计入其他字段的值）不重复计算。
+    """
+    total = 0
+    stack = [value]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in memo or isinstance(obj, SHARED_TYPES):
+            continue
+        memo[id(obj)] = obj  # 保留引用，避免统计期间对象被回收后id被复用
+        total += sys.getsizeof(obj)
+        if isinstance(obj, ATOMIC_TYPES):
+            continue
+        if isinstance(obj, np.ndarray):
+            if obj.base is not None:
+                stack.append(obj.base)
+        elif isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        else:
+            if hasattr(obj, "__dict__"):
+                stack.append(obj.__dict__)
+            for cls in type(obj).__mro__:
+                slots = cls.__dict__.get("__slots__", ())
+                for name in (slots,) if isinstance(slots, str) else slots:
+                    if name != "__dict__" and hasattr(obj, name):
+                        stack.append(getattr(obj, name))
+    return total
+
+
+def column_bytes(column):
+    # ObjectColumn中是普通的Python对象，`Column.nbytes` 不包含它们
+    if isinstance(column, ObjectColumn):
+        return sizeof(column.values, {})
+    if isinstance(column, ListColumn):
+        return column.offsets.nbytes + column_bytes(column.child)
+    return column.nbytes
+
+
+def _struct_value(item, key, field_keys, attr):
+    """
+    从 `Dataset._parse_struct` 的结果、Struct或 `StructRecord` 中取出字段key的值，不存在时返回MISSING。
+    """
+    if isinstance(item, StructRecord):
+        return object.__getattribute__(item, key) if item._has(key) else MISSING
+    if isinstance(item, Struct):
+        if key in attr:
+            return item.attributes.container.get(key, MISSING)
+        return dict.get(item, key, MISSING)
+    if key in attr:
+        attributes = item.get("$attributes", {}).get("attributes")
+        return MISSING if attributes is None else attributes.container.get(key, MISSING)
+    return item.get(field_keys[key], {}).get(key, MISSING)
+
+
+class FieldStats:
+    __slots__ = ("count", "bytes", "time", "depth")
+
+    def __init__(self):
+        self.count = 0  # 数据集中保存的字段值数量
+        self.bytes = 0  # 这些值占用的内存
+        self.time = 0.0  # 校验该字段的累计时间（秒），包含其中嵌套的字段
+        self.depth = 0  # 正在校验该字段的层数，Field.coerce默认调用validate时不重复计时
+
+    def to_dict(self):
+        return {"count": self.count, "bytes": self.bytes, "time": self.time}
+
+
+class _Patch:
+    """
+    替换为计时版本的一个方法。多个FieldProfiler同时统计同一个Field（如两个数据集使用同一Struct类型）时
+    共享同一个包装函数，每次调用的时间计入其中所有生效的统计，最后一个统计结束时才恢复原来的方法。
+    """
+
+    def __init__(self, original, restore):
+        self.restore = restore
+        self.stats = []
+
+        def wrapper(*args, **kwargs):
+            active = [stats for stats in self.stats if not stats.depth]
+            if not active:
+                return original(*args, **kwargs)
+            for stats in active:
+                stats.depth += 1
+            start = perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                for stats in active:
+                    stats.time += elapsed
+                    stats.depth -= 1
+
+        wrapper.__wrapped__ = original
+        self.wrapper = wrapper
+
+
+# 当前被替换的方法：(对象的id, 属性名或converters中的key) -> _Patch
+_PATCHES = {}
+
+
+class FieldProfiler:
+    """
+    统计每个字段路径的值数量、内存占用和校验时间，参考 `Dataset.profile_fields`。
+
+    在 `with profiler:` 的范围内，Struct中所有Field对象的 `validate`/`coerce`（以及ListField批量校验的转换函数）
+    被替换为计时的版本，退出时（包括with中抛出异常时）恢复，因此未启用时不会给校验带来任何额外的开销。
+    多个profiler可以同时统计共享的Field对象，退出的顺序不限。
+    值数量和内存占用在需要时才根据数据集中保存的样本计算（`measure_samples`/`measure_table`），不影响加载的时间。
+    同一Struct类型出现在多个路径下时（共享同一组Field对象），其字段的校验时间统计在第一个路径下。
+    """
+
+    def __init__(self, struct_cls):
+        self.struct_cls = struct_cls
+        self.stats = {}
+        self._fields = {}
+        for path, field in field_paths(struct_cls):
+            self.stats[path] = FieldStats()
+            self._fields.setdefault(id(field), (path, field))
+        self._active = 0
+        self._patched = {}  # 本profiler替换的方法：_PATCHES的key -> FieldStats
+
+    def __enter__(self):
+        self._active += 1
+        if self._active > 1:
+            return self
+        try:
+            for path, field in self._fields.values():
+                stats = self.stats[path]
+                self._patch_attribute(field, "validate", stats)
+                self._patch_attribute(field, "coerce", stats)
+                ele_type = getattr(field, "ele_type", None)
+                if isinstance(ele_type, Struct):
+                    self._patch_batch_validator(ele_type.__class__, path + "/")
+        except BaseException:
+            self._active -= 1
+            self._restore()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._active -= 1
+        if not self._active:
+            self._restore()
+
+    def _patch(self, key, stats, original, install, restore):
+        if key in self._patched:
+            return
+        patch = _PATCHES.get(key)
+        if patch is None:
+            patch = _Patch(original, restore)
+            install(patch.wrapper)
+            _PATCHES[key] = patch
+        patch.stats.append(stats)
+        self._patched[key] = stats
+
+    def _restore(self):
+        for key, stats in reversed(list(self._patched.items())):
+            patch = _PATCHES[key]
+            patch.stats.remove(stats)
+            if not patch.stats:
+                del _PATCHES[key]
+                patch.restore()
+        self._patched.clear()
+
+    def _patch_attribute(self, field, name, stats):
+        # Field的方法通常定义在类中，恢复时删除实例属性即可；实例上原本就有的属性恢复为原来的值
+        saved = field.__dict__.get(name, MISSING)
+
+        def restore():
+            if saved is MISSING:
+                delattr(field, name)
+            else:
+                setattr(field, name, saved)
+
+        self._patch((id(field), name), stats, getattr(field, name), lambda wrapper: setattr(field, name, wrapper),
+                    restore)
+
+    def _patch_batch_validator(self, struct_cls, prefix):
+        validator = struct_cls.batch_validator()
+        if validator is None:
+            return
+        converters = validator.converters
+        for k, converter in list(converters.items()):
+            self._patch((id(converters), k), self.stats[prefix + k], converter,
+                        lambda wrapper, k=k: converters.__setitem__(k, wrapper),
+                        lambda k=k, converter=converter: converters.__setitem__(k, converter))
+
+    def wrap(self, function):
+        """
+        返回在统计范围内调用function的函数（如lazy模式下在访问时才校验样本的 `Dataset._build_sample`）。
+        """
+
+        def wrapper(*args, **kwargs):
+            with self:
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    def measure_samples(self, items, struct_cls=None, prefix="", memo=None):
+        """
+        根据保存的样本（`Dataset._parse_struct` 的结果、Struct或 `StructRecord`）计算各字段的值数量和内存占用。
+        嵌套的字段先于外层字段计算，因此外层字段（如 `objects`）只包含列表和元素容器本身的内存。
+        """
+        struct_cls = self.struct_cls if struct_cls is None else struct_cls
+        memo = {} if memo is None else memo
+        field_keys = {k: Util.extract_key(v) for k, v in struct_cls.__mappings__.items()}
+        for k, field in struct_cls.__mappings__.items():
+            path = prefix + k
+            values = [_struct_value(item, k, field_keys, struct_cls.__attr__) for item in items]
+            values = [value for value in values if value is not MISSING]
+            ele_type = getattr(field, "ele_type", None)
+            if isinstance(ele_type, Struct):
+                children = [child for value in values for child in value]
+                self.measure_samples(children, ele_type.__class__, path + "/", memo)
+            stats = self.stats[path]
+            stats.count = len(values)
+            stats.bytes = sum(sizeof(value, memo) for value in values)
+
+    def measure_table(self, table, prefix=""):
+        """
+        根据列式存储的StructTable计算各字段的值数量和内存占用（列数组以及缺失值的标记数组）。
+        """
+        for k in table._order:
+            path = prefix + k
+            stats = self.stats[path]
+            column = table.columns[k]
+            presence = table.presence[k]
+            stats.count = len(table) if presence is None else int(presence.sum())
+            stats.bytes = 0 if presence is None else presence.nbytes + table._positions[k].nbytes
+            if isinstance(column, ListColumn) and isinstance(column.child, StructTable):
+                stats.bytes += column.offsets.nbytes
+                self.measure_table(column.child, path + "/")
+            else:
+                stats.bytes += column_bytes(column)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {path: stats.to_dict() for path, stats in self.stats.items()}
@@ -0,0 +1,67 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+
+class LazySampleList:
+    """
+    延迟加载的样本列表：只保存yaml/json中的原始样本字典，在第一次被访问时才进行校验和解析。
+
+    Arguments:
+        samples: 原始样本字典组成的列表。
+        loader: 将单个原始样本转换为解析结果的函数（如 `Dataset._build_sample`）。
+        cache_size: 缓存的已解析样本的最大数量，采用LRU策略淘汰；为None（默认）时不限制数量，每个样本只加载一次；
+            为0时不缓存，每次访问都重新调用loader。
+    """
+
+    def __init__(
+            self,
+            samples: List[Dict[str, Any]],
+            loader: Callable[[Dict[str, Any]], Any],
+            cache_size: Optional[int] = None,
+    ):
+        if cache_size is not None and cache_size < 0:
+            raise ValueError(f"cache_size must be a non-negative integer or None, got {cache_size}.")
+        self._samples = samples
+        self._loader = loader
+        self._cache_size = cache_size
+        self._cache = OrderedDict()
+
+    @property
+    def cache_size(self):
+        return self._cache_size
+
+    def _normalize_index(self, idx):
+        length = len(self._samples)
+        if idx < 0:
+            idx += length
+        if not 0 <= idx < length:
+            raise IndexError("sample index out of range")
+        return idx
+
+    def _materialize(self, idx):
+        idx = self._normalize_index(idx)
+        if self._cache_size == 0:
+            return self._loader(self._samples[idx])
+        if idx in self._cache:
+            self._cache.move_to_end(idx)
+            return self._cache[idx]
+        sample = self._loader(self._samples[idx])
+        self._cache[idx] = sample
+        if self._cache_size is not None and len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return sample
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def __len__(self):
+        return len(self._samples)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._materialize(i) for i in range(*idx.indices(len(self)))]
+        return self._materialize(idx)
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self._materialize(idx)
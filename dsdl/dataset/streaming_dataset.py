@@ -0,0 +1,162 @@
+import warnings
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+import torch.utils.data
+
+from dsdl.dataset.utils import Util
+
+from ..geometry import STRUCT
+from ..parser import dsdl_parse
+from ..types import Struct
+
+try:
+    from yaml import CSafeLoader as YAMLSafeLoader
+except ImportError:
+    from yaml import SafeLoader as YAMLSafeLoader
+
+from yaml import load as yaml_load
+
+
+class StreamingDataset(torch.utils.data.IterableDataset):
+    """
+    按样本文件（分片）流式读取的数据集：每次只读取一个样本文件，逐个校验并返回其中的样本，不会在内存中保存完整的样本列表。
+
+    样本文件按 `rank * num_workers + worker_id` 以轮转的方式确定性地分配给各个进程（分布式训练的rank）和DataLoader的
+    worker，每个分片只会被其中一个worker读取。分片数量少于 `world_size * num_workers` 时部分worker不会产生样本，
+    各个rank上的样本数量也可能不同，需要在训练代码中自行处理。
+
+    Arguments:
+        sample_files: 样本文件（yaml/json）的路径列表，如 `Util.list_sample_files` 的返回值。
+        sample_type: 样本的Struct类型。
+        location_config: 媒体文件的路径配置。
+        pipeline: 处理样本的函数。
+        shuffle: 是否在每个epoch打乱分片的顺序（同一epoch中所有进程的打乱结果相同），分片内部的样本顺序不变。
+        seed: 打乱分片时使用的随机种子，实际的种子为 `seed + epoch`，参考 `set_epoch`。
+        rank: 当前进程在分布式训练中的rank，为None时从 `torch.distributed` 中获取。
+        world_size: 分布式训练的进程数量，为None时从 `torch.distributed` 中获取。
+        definition: dsdl生成的python代码，在spawn方式启动的worker中用来重新定义Struct。
+        fields: 字段投影，参考 `Dataset`。
+    """
+
+    def __init__(
+            self,
+            sample_files: List[str],
+            sample_type: Union[str, Struct],
+            location_config: dict,
+            pipeline: Optional[Callable[[Dict], Dict]] = None,
+            shuffle: bool = False,
+            seed: int = 0,
+            rank: Optional[int] = None,
+            world_size: Optional[int] = None,
+            definition: Optional[str] = None,
+            fields: Optional[List[str]] = None,
+    ):
+        super().__init__()
+        self.sample_files = list(sample_files)
+        self.location_config = location_config
+        self.pipeline = pipeline
+        self.shuffle = shuffle
+        self.seed = seed
+        self.rank = rank
+        self.world_size = world_size
+        self.definition = definition
+        self.fields = fields
+        self.epoch = 0
+        if isinstance(sample_type, str):
+            self.sample_type = STRUCT.get(Util.extract_sample_type(sample_type))
+        else:
+            self.sample_type = sample_type
+        self.projection = None if fields is None else self.sample_type.compile_projection(fields)
+        self.file_reader = self._load_file_reader(location_config)
+
+    @classmethod
+    def from_yaml(
+            cls,
+            dsdl_yaml: str,
+            location_config: dict,
+            dsdl_library_path: str = "dsdl/dsdl_library",
+            **kwargs,
+    ):
+        """
+        根据dsdl yaml文件创建数据集：解析dsdl定义并执行生成的代码，`sample-path` 中的样本文件在迭代时才读取。
+        """
+        with open(dsdl_yaml, "r") as f:
+            desc = yaml_load(f, Loader=YAMLSafeLoader)
+        sample_path = desc["data"]["sample-path"]
+        if sample_path == "$local" or sample_path == "local":
+            raise ValueError("StreamingDataset requires `sample-path` to point to sample files, use Dataset instead.")
+        definition = dsdl_parse(dsdl_yaml, dsdl_library_path)
+        exec(definition, {})
+        sample_files = Util.list_sample_files(dsdl_yaml, sample_path)
+        return cls(sample_files, desc["data"]["sample-type"], location_config, definition=definition, **kwargs)
+
+    @staticmethod
+    def _load_file_reader(config):
+        return Util.load_file_reader(config)
+
+    def _parse_struct(self, sample):
+        return Util.parse_struct(sample, self._parse_struct)
+
+    def set_epoch(self, epoch: int):
+        """
+        设置当前的epoch，shuffle为True时每个epoch的分片顺序不同。需要在创建DataLoader的迭代器之前调用。
+        """
+        self.epoch = epoch
+
+    def _distributed_info(self):
+        rank, world_size = self.rank, self.world_size
+        if rank is None or world_size is None:
+            initialized = torch.distributed.is_available() and torch.distributed.is_initialized()
+            if rank is None:
+                rank = torch.distributed.get_rank() if initialized else 0
+            if world_size is None:
+                world_size = torch.distributed.get_world_size() if initialized else 1
+        return rank, world_size
+
+    def shard_files(self) -> List[str]:
+        """
+        返回分配给当前进程（rank）和当前DataLoader worker的样本文件。
+        """
+        rank, world_size = self._distributed_info()
+        worker_info = torch.utils.data.get_worker_info()
+        worker_id, num_workers = (0, 1) if worker_info is None else (worker_info.id, worker_info.num_workers)
+        files = self.sample_files
+        if self.shuffle:
+            order = np.random.default_rng(self.seed + self.epoch).permutation(len(files))
+            files = [files[ind] for ind in order]
+        num_shards = world_size * num_workers
+        if len(files) < num_shards and rank == 0 and worker_id == 0:
+            warnings.warn(f"Only {len(files)} sample files for {num_shards} workers, some workers will be idle.")
+        return files[rank * num_workers + worker_id::num_shards]
+
+    def _build_sample(self, sample):
+        return self._parse_struct(self.sample_type(file_reader=self.file_reader, projection=self.projection, **sample))
+
+    def process_sample(self, sample):
+        return sample
+
+    def __iter__(self):
+        for path in self.shard_files():
+            for sample in Util.load_sample_file(path):
+                data = self.process_sample(self._build_sample(sample))
+                if self.pipeline is not None:
+                    data = self.pipeline(data)
+                yield data
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("file_reader")
+        state["sample_type"] = self.sample_type.__name__
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        if self.sample_type not in STRUCT and self.definition is not None:
+            exec(self.definition, {})
+        self.sample_type = STRUCT.get(self.sample_type)
+        self.file_reader = self._load_file_reader(self.location_config)
+
+    @property
+    def config(self):
+        return self.location_config
@@ -1,3 +1,4 @@
+from .collate import StructCollate
 from .commons import Util
 from .parser import Parser
 from .visualizer import VisualizerUtil
@@ -6,4 +7,5 @@ __all__ = [
     "Util",
     "VisualizerUtil",
     "Parser",
+    "StructCollate",
 ]
\ No newline at end of file
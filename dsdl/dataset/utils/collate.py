@@ -0,0 +1,297 @@
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from dsdl.types import (
+    BBoxField,
+    BoolField,
+    Coord3DField,
+    CoordField,
+    ImageField,
+    IntervalField,
+    IntField,
+    KeypointField,
+    LabelField,
+    ListField,
+    NumField,
+    SegMapField,
+    Struct,
+)
+
+from .commons import Util
+
+# 各个数组在batch缓冲区中的起始位置按该字节数对齐
+_ALIGNMENT = 64
+
+
+class _Leaf:
+    """
+    collate时的一个叶子字段。
+
+    Arguments:
+        path: 字段路径，如 `objects/bbox`。
+        name: 字段名。
+        field: 字段对应的Field对象。
+        list_path: 该字段所在的ListField的路径（不在ListField中时为None），结果会按该ListField的长度进行填充。
+        is_element: 该字段是否为ListField的元素本身（元素不是Struct时）。
+    """
+
+    def __init__(self, path, name, field, list_path=None, is_element=False):
+        self.path = path
+        self.name = name
+        self.field = field
+        self.list_path = list_path
+        self.is_element = is_element
+        self.field_key = Util.extract_key(field)
+        self.kind, self.shape, self.dtype = _leaf_kind(field)
+        if self.kind == "label":
+            self.name_to_id = field.dom.get_name_to_id()
+
+    def get(self, data_item):
+        """
+        从 `Dataset._parse_struct` 结构的样本中取出该字段的值，字段不存在时返回None。
+        """
+        if self.is_element:
+            return data_item
+        if self.field.is_attr:
+            attributes = data_item["$attributes"]["attributes"]
+            return attributes[self.name] if self.name in attributes else None
+        return data_item.get(self.field_key, {}).get(self.name)
+
+    def encode(self, value):
+        if self.kind == "bbox":
+            return value.xywh
+        if self.kind == "label":
+            return self.name_to_id[value.name]
+        if self.kind == "keypoint":
+            return value.array
+        return value
+
+
+def _leaf_kind(field):
+    if isinstance(field, BBoxField):
+        return "bbox", (4,), np.float32
+    if isinstance(field, LabelField):
+        return "label", (), np.int64
+    if isinstance(field, BoolField):
+        return "number", (), np.bool_
+    if isinstance(field, IntField):
+        return "number", (), np.int64
+    if isinstance(field, NumField):
+        return "number", (), np.float32
+    if isinstance(field, (CoordField, IntervalField)):
+        return "number", (2,), np.float32
+    if isinstance(field, Coord3DField):
+        return "number", (3,), np.float32
+    if isinstance(field, KeypointField):
+        return "keypoint", (len(field.dom), 3), np.float32
+    if isinstance(field, (ImageField, SegMapField)):
+        return "media", None, None
+    return "object", None, None
+
+
+class StructCollate:
+    """
+    根据Struct的定义（`get_mapping()`）将一个batch的样本整理为填充后的数组，可以直接作为DataLoader的collate_fn：
+
+    - Image/SegMap字段读取为数组，尺寸一致时堆叠为 (B, H, W, C)，否则返回数组列表；
+    - BBox、Label、Bool/Int/Num、Coord、Keypoint字段堆叠为 (B, ...) 的数组，Label为其在类别域中的序号（从1开始）；
+    - 由Struct组成的ListField中的上述字段按该batch中最长的列表填充为 (B, Nmax, ...)，填充的位置为0，
+      `<ListField路径>/$mask` 为 (B, Nmax) 的布尔数组，标记有效的元素；
+    - optional字段额外返回 `<字段路径>/$mask`；其余字段（如Polygon、Str）以列表的形式返回。
+
+    所有数值数组共享同一块为该batch预先分配的缓冲区，`to_tensor` 为True时通过 `torch.from_numpy` 零拷贝地转换为tensor。
+    输入既可以是 `Dataset.__getitem__` 返回的样本列表，也可以是 `Dataset.get_batch` 返回的按字段组织的字典。
+
+    Arguments:
+        sample_type: 样本的Struct类型。
+        to_tensor: 是否将数组转换为torch.Tensor。
+        fields: 字段投影，与 `Dataset` 的fields一致时只整理被加载的字段。
+    """
+
+    def __init__(self, sample_type, to_tensor: bool = True, fields: Optional[List[str]] = None):
+        self.sample_type = sample_type
+        self.to_tensor = to_tensor
+        self.leaves = []  # type: List[_Leaf]
+        self.list_paths = []
+        projection = None if fields is None else sample_type.compile_projection(fields)
+        self._build_plan(sample_type, "", None, projection)
+
+    def _build_plan(self, struct_cls, prefix, list_path, projection=None):
+        for name, field in struct_cls.__mappings__.items():
+            if projection is not None and name not in projection:
+                continue
+            sub_projection = None if projection is None else projection[name]
+            path = f"{prefix}/{name}" if prefix else name
+            if isinstance(field, ListField) and list_path is None:
+                self.list_paths.append(path)
+                if isinstance(field.ele_type, Struct):
+                    self._build_plan(field.ele_type.__class__, path, path, sub_projection)
+                else:
+                    self.leaves.append(_Leaf(path, name, field.ele_type, path, is_element=True))
+                continue
+            self.leaves.append(_Leaf(path, name, field, list_path))
+
+    def __call__(self, batch: Union[List[Dict], Dict[str, object]]):
+        if isinstance(batch, dict):
+            return self._collate_columns(batch)
+        return self._collate_samples(batch)
+
+    def _collate_samples(self, samples):
+        batch_size = len(samples)
+        lists = {}
+        for list_path in self.list_paths:
+            name = list_path.rsplit("/", 1)[-1]
+            lists[list_path] = [sample.get("$list", {}).get(name) or [] for sample in samples]
+        max_lens = {path: max([len(_) for _ in items], default=0) for path, items in lists.items()}
+
+        values = {}
+        for leaf in self.leaves:
+            if leaf.list_path is None:
+                values[leaf.path] = [leaf.get(sample) for sample in samples]
+            else:
+                values[leaf.path] = [leaf.get(item) for items in lists[leaf.list_path] for item in items]
+        for leaf in self.leaves:
+            if leaf.kind == "media":
+                values[leaf.path] = [None if _ is None else _.to_array() for _ in values[leaf.path]]
+
+        # 每个ListField中的元素在 (B, Nmax) 中的位置
+        positions = {}
+        for list_path, items in lists.items():
+            lengths = np.array([len(_) for _ in items], dtype=np.int64)
+            positions[list_path] = _ragged_positions(lengths)
+
+        specs = self._array_specs(batch_size, max_lens, values)
+        arrays = _allocate(specs)
+        result = {}
+        for list_path in self.list_paths:
+            batch_ind, item_ind = positions[list_path]
+            arrays[list_path + "/$mask"][batch_ind, item_ind] = True
+        for leaf in self.leaves:
+            leaf_values = values[leaf.path]
+            present = np.array([_ is not None for _ in leaf_values], dtype=np.bool_)
+            if leaf.list_path is None:
+                index = np.flatnonzero(present)
+            else:
+                batch_ind, item_ind = positions[leaf.list_path]
+                index = (batch_ind[present], item_ind[present])
+            if not leaf.is_element and leaf.path + "/$mask" in arrays:
+                arrays[leaf.path + "/$mask"][index] = True
+            if leaf.path not in arrays:
+                result[leaf.path] = leaf_values
+                continue
+            encoded = [leaf.encode(_) for _ in leaf_values if _ is not None]
+            if encoded:
+                target = arrays[leaf.path]
+                target[index] = np.asarray(encoded, dtype=target.dtype)
+        result.update(arrays)
+        return self._finalize(result)
+
+    def _collate_columns(self, batch):
+        result = {}
+        offsets = {path: batch[path + "/$offsets"] for path in self.list_paths if path + "/$offsets" in batch}
+        max_lens = {path: int(np.diff(off).max(initial=0)) for path, off in offsets.items()}
+        batch_size = _batch_size(batch, offsets)
+        positions = {path: _ragged_positions(np.diff(off)) for path, off in offsets.items()}
+        values = {leaf.path: batch.get(leaf.path) for leaf in self.leaves}
+
+        specs = self._array_specs(batch_size, max_lens, values)
+        arrays = _allocate(specs)
+        for list_path in offsets:
+            batch_ind, item_ind = positions[list_path]
+            arrays[list_path + "/$mask"][batch_ind, item_ind] = True
+        for leaf in self.leaves:
+            if leaf.path not in batch:
+                continue
+            index = slice(None) if leaf.list_path is None else positions.get(leaf.list_path)
+            # 没有 `$mask` 时该字段在这些样本中均存在；ListField元素的 `$mask` 为该ListField的填充掩码
+            if not leaf.is_element and leaf.path + "/$mask" in arrays:
+                arrays[leaf.path + "/$mask"][index] = batch.get(leaf.path + "/$mask", True)
+            if leaf.path in arrays:
+                arrays[leaf.path][index] = np.asarray(batch[leaf.path])
+            else:
+                result[leaf.path] = batch[leaf.path]
+        result.update(arrays)
+        return self._finalize(result)
+
+    def _array_specs(self, batch_size, max_lens, values):
+        specs = {}
+        for list_path, max_len in max_lens.items():
+            specs[list_path + "/$mask"] = ((batch_size, max_len), np.bool_)
+        for leaf in self.leaves:
+            if leaf.list_path is not None and leaf.list_path not in max_lens:
+                continue
+            lead = (batch_size,) if leaf.list_path is None else (batch_size, max_lens[leaf.list_path])
+            # 两种输入都按字段定义决定是否返回 `$mask`，与字段是否能堆叠为数组无关
+            if leaf.field.is_optional and not leaf.is_element:
+                specs[leaf.path + "/$mask"] = (lead, np.bool_)
+            if leaf.kind == "media":
+                shape, dtype = _stack_spec(values[leaf.path])
+                if shape is not None and leaf.list_path is None:
+                    specs[leaf.path] = (lead + shape, dtype)
+                continue
+            if leaf.kind == "object":
+                continue
+            specs[leaf.path] = (lead + leaf.shape, leaf.dtype)
+        return specs
+
+    def _finalize(self, result):
+        if not self.to_tensor:
+            return result
+        import torch
+
+        for path, value in result.items():
+            if isinstance(value, np.ndarray):
+                result[path] = torch.from_numpy(value)
+        return result
+
+
+def _batch_size(batch, offsets):
+    for value in offsets.values():
+        return len(value) - 1
+    for value in batch.values():
+        return len(value)
+    return 0
+
+
+def _ragged_positions(lengths):
+    """
+    返回长度为lengths的各个列表中的元素在 (B, Nmax) 数组中的下标。
+    """
+    batch_ind = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+    starts = np.zeros(len(lengths), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=starts[1:])
+    item_ind = np.arange(int(lengths.sum()), dtype=np.int64) - np.repeat(starts, lengths)
+    return batch_ind, item_ind
+
+
+def _stack_spec(arrays):
+    """
+    媒体数组尺寸和类型一致时返回堆叠后的尺寸和类型，否则返回 (None, None)。
+    """
+    if not arrays or any(_ is None for _ in arrays):
+        return None, None
+    first = arrays[0]
+    for arr in arrays[1:]:
+        if arr.shape != first.shape or arr.dtype != first.dtype:
+            return None, None
+    return first.shape, first.dtype
+
+
+def _allocate(specs) -> Dict[str, np.ndarray]:
+    """
+    为所有数组分配一块连续的、初始化为0的缓冲区，并返回其中各个数组的视图。
+    """
+    layout = {}
+    total = 0
+    for path, (shape, dtype) in specs.items():
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        layout[path] = (total, shape, dtype)
+        total += -(-nbytes // _ALIGNMENT) * _ALIGNMENT
+    buffer = np.zeros(total, dtype=np.uint8)
+    arrays = {}
+    for path, (offset, shape, dtype) in layout.items():
+        count = int(np.prod(shape, dtype=np.int64))
+        arrays[path] = buffer[offset:offset + count * dtype.itemsize].view(dtype).reshape(shape)
+    return arrays
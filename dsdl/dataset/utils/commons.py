@@ -1,9 +1,40 @@
+import json
+import os
 import re
+from typing import List, Sequence, Union
 
 from prettytable import PrettyTable
+from yaml import load as yaml_load
 
+import dsdl.objectio as objectio
+from dsdl.exception import FieldNotProjectedError
+from dsdl.types import Struct, StructRecord
 from dsdl.types.field import Field
 
+try:
+    from yaml import CSafeLoader as YAMLSafeLoader
+except ImportError:
+    from yaml import SafeLoader as YAMLSafeLoader
+
+YAML_VALID_SUFFIX = ('.yaml', '.YAML')
+JSON_VALID_SUFFIX = ('.json', '.JSON')
+VALID_SUFFIX = YAML_VALID_SUFFIX + JSON_VALID_SUFFIX
+
+
+class ProjectedDict(dict):
+    """
+    字段投影后的样本字典，访问被投影掉的字段时抛出 `FieldNotProjectedError`，而不是含义不明确的KeyError。
+    """
+
+    def __init__(self, *args, excluded=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.excluded = excluded or {}
+
+    def __missing__(self, key):
+        if key in self.excluded:
+            raise FieldNotProjectedError(self.excluded[key])
+        raise KeyError(key)
+
 
 class Util:
     @staticmethod
@@ -11,6 +42,83 @@ class Util:
         field_cls_name = field_obj.__class__.__name__
         return "$" + field_cls_name.replace("Field", "").lower()
 
+    @staticmethod
+    def parse_struct(sample, parse=None):
+        """
+        将Struct（或StructRecord）递归转换为按字段类型分组的样本字典，如 {"$image": {"image": ...}, "$list": {...}}，
+        `Dataset` 和 `StreamingDataset` 的 `_parse_struct` 均使用该函数。parse为转换嵌套的字段值时使用的函数，
+        默认为该函数本身，数据集的子类覆盖 `_parse_struct` 时嵌套的Struct同样使用覆盖后的实现。
+        """
+        parse = parse or Util.parse_struct
+        if isinstance(sample, (Struct, StructRecord)):
+            data_item = {}
+            struct_mapping = sample.get_mapping()
+            for key in sample.keys():
+                if key.startswith("$"):  # attributes
+                    field_key = key
+                    key = key.replace("$", "")
+                    if field_key in data_item:
+                        data_item[field_key][key] = getattr(sample, field_key)
+                    else:
+                        data_item[field_key] = {key: getattr(sample, field_key)}
+                else:
+                    field_key = Util.extract_key(struct_mapping[key])
+                    if field_key in data_item:
+                        data_item[field_key][key] = parse(getattr(sample, key))
+                    else:
+                        data_item[field_key] = {key: parse(getattr(sample, key))}
+            projection = sample.get_projection()
+            if projection is not None:
+                struct_cls = sample.__struct__ if isinstance(sample, StructRecord) else sample.__class__
+                return Util.project_data_item(data_item, struct_cls, projection)
+            return data_item
+
+        elif isinstance(sample, list):
+            return [parse(item) for item in sample]
+        else:
+            return sample
+
+    @staticmethod
+    def load_file_reader(config):
+        """
+        根据路径配置（如 `dict(type="LocalFileReader", working_dir=...)`）创建file_reader。
+        """
+        config = config.copy()
+        type_ = config.pop("type")
+        cls = getattr(objectio, type_)
+        try:
+            reader = cls(**config)
+        except Exception as e:
+            print(f"raise exception {e} whe parse the location config {config}.")
+            raise e
+        return reader
+
+    @staticmethod
+    def project_data_item(data_item, struct_cls, projection):
+        """
+        将 `_parse_struct` 结构的样本字典中与被投影掉的字段相关的层级替换为 `ProjectedDict`
+        """
+        mappings = struct_cls.__mappings__
+        groups = {}
+        for k, field in mappings.items():
+            if k not in struct_cls.__attr__:
+                groups.setdefault(Util.extract_key(field), []).append(k)
+        excluded = {}
+        for field_key, names in groups.items():
+            messages = {
+                k: f"Field '{k}' of struct '{struct_cls.__name__}' is not in the projection {list(projection)}."
+                for k in names if k not in projection
+            }
+            if not messages:
+                continue
+            if len(messages) == len(names):
+                excluded[field_key] = " ".join(messages.values())
+            elif field_key in data_item:
+                data_item[field_key] = ProjectedDict(data_item[field_key], excluded=messages)
+        if not excluded:
+            return data_item
+        return ProjectedDict(data_item, excluded=excluded)
+
     @staticmethod
     def get_first_item(dic):
         if len(dic) == 0:
@@ -26,6 +134,35 @@ class Util:
         else:
             return sample_type
 
+    @staticmethod
+    def list_sample_files(dsdl_path: str, path: Union[str, Sequence[str]]) -> List[str]:
+        """
+        返回dsdl yaml文件中 `sample-path` 对应的所有样本文件（yaml/json）的路径，路径相对于dsdl yaml文件所在的目录
+        """
+        paths = []
+        dsdl_dir = os.path.split(dsdl_path)[0]
+        if isinstance(path, str):
+            path = os.path.join(dsdl_dir, path)
+            if os.path.isdir(path):
+                paths = [os.path.join(path, _) for _ in sorted(os.listdir(path)) if _.endswith(VALID_SUFFIX)]
+            elif os.path.isfile(path):
+                if path.endswith(VALID_SUFFIX):
+                    paths = [path]
+        elif isinstance(path, (list, tuple)):
+            paths = [os.path.join(dsdl_dir, _) for _ in path if os.path.isfile(_) and _.endswith(VALID_SUFFIX)]
+        return paths
+
+    @staticmethod
+    def load_sample_file(path: str) -> List[dict]:
+        """
+        读取单个样本文件（yaml/json）中的 `samples` 字段
+        """
+        if path.endswith(YAML_VALID_SUFFIX):
+            with open(path, "r") as f:
+                return yaml_load(f, YAMLSafeLoader)['samples']
+        with open(path, "r") as f:
+            return json.load(f)['samples']
+
     @staticmethod
     def format_sample(samples):
         """
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import List, Optional
+
+from yaml import load as yaml_load
+
+from ..__version__ import __version__
+from ..exception import UntrustedDataError
+from .cache import DatasetCache, import_files
+
+try:
+    from yaml import CSafeLoader as YAMLSafeLoader
+except ImportError:
+    from yaml import SafeLoader as YAMLSafeLoader
+
+
+class ValidationRecord:
+    """
+    strict校验通过的数据的内容指纹记录（json文件）。`validation="strict"` 的数据集加载成功后写入记录，
+    `validation="trusted"` 时只有当前数据的指纹与记录一致才允许跳过校验，例如在CI中strict校验一次，训练任务中使用trusted。
+
+    指纹包括dsdl的版本和数据内容：从dsdl yaml创建时为dsdl yaml、`$import` 的文件和所有样本文件内容的摘要
+    （参考 `DatasetCache.content_key`），否则为样本字典序列化后的摘要。
+
+    Arguments:
+        path: 记录文件的路径。
+        fingerprint: 当前数据的指纹，为None时在使用时根据样本计算。
+    """
+
+    def __init__(self, path: str, fingerprint: Optional[str] = None):
+        self.path = path
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def from_yaml(cls, path: str, dsdl_yaml: str, dsdl_library_path: str):
+        with open(dsdl_yaml, "r") as f:
+            desc = yaml_load(f, Loader=YAMLSafeLoader)
+        sample_files = DatasetCache.sample_files(dsdl_yaml, desc["data"]["sample-path"])
+        key = DatasetCache.content_key(dsdl_yaml, import_files(desc, dsdl_library_path), sample_files)
+        return cls(path, _versioned(key))
+
+    @staticmethod
+    def fingerprint_samples(samples: List[dict]) -> str:
+        hasher = hashlib.sha256()
+        for sample in samples:
+            hasher.update(json.dumps(sample, sort_keys=True, default=str).encode("utf-8"))
+        return _versioned(hasher.hexdigest())
+
+    def _fingerprint(self, samples):
+        if self.fingerprint is None:
+            if not isinstance(samples, list):
+                raise ValueError("Can not compute the fingerprint of compiled samples, create the dataset from yaml.")
+            self.fingerprint = self.fingerprint_samples(samples)
+        return self.fingerprint
+
+    def save(self, samples, struct_cls, fields: Optional[List[str]] = None):
+        """
+        记录strict校验通过的数据的指纹、样本类型和校验的字段（fields为None时校验了所有字段）。
+        """
+        record = {
+            "fingerprint": self._fingerprint(samples),
+            "sample_type": struct_cls.__name__,
+            "fields": None if fields is None else list(fields),
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(record, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def verify(self, samples, struct_cls, projection=None):
+        """
+        检查数据在记录之后没有变化，并且strict校验时包含了本次加载的所有字段，否则抛出 `UntrustedDataError`。
+        """
+        if not os.path.isfile(self.path):
+            raise UntrustedDataError(f"Validation record {self.path} does not exist, run a strict validation first.")
+        with open(self.path, "r") as f:
+            record = json.load(f)
+        if record["fingerprint"] != self._fingerprint(samples):
+            raise UntrustedDataError(f"Samples have changed since the strict validation recorded in {self.path}.")
+        if record["sample_type"] != struct_cls.__name__:
+            raise UntrustedDataError(
+                f"Validation record {self.path} is for sample type '{record['sample_type']}', "
+                f"got '{struct_cls.__name__}'."
+            )
+        validated = None if record["fields"] is None else struct_cls.compile_projection(record["fields"])
+        if not _covers(validated, projection):
+            raise UntrustedDataError(
+                f"Fields {record['fields']} validated in {self.path} do not cover the fields to load."
+            )
+
+
+def _versioned(key):
+    # 校验规则可能随版本变化，不同版本的记录互不通用
+    return hashlib.sha256(f"{__version__}/{key}".encode("utf-8")).hexdigest()
+
+
+def _covers(validated, projection):
+    """
+    字段投影validated（None表示所有字段）是否包含projection中的所有字段。
+    """
+    if validated is None:
+        return True
+    if projection is None:
+        return False
+    for k, sub_projection in projection.items():
+        if k not in validated:
+            return False
+        if validated[k] is not None and not _covers(validated[k], sub_projection):
+            return False
+    return True
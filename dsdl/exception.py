@@ -22,3 +22,10 @@ class FileReadError(TypeError):
     pass
 
 
+class FieldNotProjectedError(KeyError):
+    def __str__(self):
+        return str(self.args[0]) if self.args else ""
+
+
+class UntrustedDataError(RuntimeError):
+    pass
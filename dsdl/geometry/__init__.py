@@ -1,20 +1,25 @@
 from .attrbutes import Attributes
-from .box import BBox
+from .box import BBox, BBoxArray
+from .box_ops import batched_nms, box_iou, iter_box_iou, match_boxes, nms, polygon_boxes
 from .class_domain import ClassDomain
 from .keypoint import Coord2D, KeyPoints
 from .label import Label, LabelList
 from .media import ImageMedia
-from .polygon import Polygon, PolygonItem
+from .polygon import Polygon, PolygonArray, PolygonItem
 from .registry import CLASSDOMAIN, LABEL, STRUCT
+from .rle import RlePolygon, decode_rle_masks
 from .segmap import SegmentationMap
 
 __all__ = [
     "BBox",
+    "BBoxArray",
     "Label",
     "ImageMedia",
     "LabelList",
     "Polygon",
     "PolygonItem",
+    "PolygonArray",
+    "RlePolygon",
     "Attributes",
     "SegmentationMap",
     "Coord2D",
@@ -23,4 +28,11 @@ __all__ = [
     "LABEL",
     "ClassDomain",
     "KeyPoints",
+    "box_iou",
+    "iter_box_iou",
+    "nms",
+    "batched_nms",
+    "match_boxes",
+    "polygon_boxes",
+    "decode_rle_masks",
 ]
@@ -19,6 +19,17 @@ class BBox(BaseGeometry):
     ):
         self._data = [x, y, width, height]
 
+    @classmethod
+    def from_array(cls, array: np.ndarray):
+        """
+        直接使用长度为4的 [x, y, width, height] 数组（如 `BBoxArray` 中的一行）创建BBox（不复制）。
+        """
+        if array.shape != (4,):
+            raise ValueError(f"Expect an array of shape (4,), got {array.shape}.")
+        bbox = cls.__new__(cls)
+        bbox._data = array
+        return bbox
+
     @property
     def x(self) -> _ELE_TYPE:
         return self._data[0]
@@ -86,4 +97,93 @@ class BBox(BaseGeometry):
         return image
 
     def __repr__(self):
+        if isinstance(self._data, np.ndarray):
+            return str([float(_) for _ in self.xyxy])
         return str(self.xyxy)
+
+
+class BBoxArray(BaseGeometry):
+    """
+    多个BBox组成的数组，保存为 (N, 4) 的float32数组（每行为 [x, y, width, height]），坐标转换、面积、裁剪和缩放都是向量化的。
+    按整数下标访问时返回共享该数组的 `BBox`，按切片、下标数组或布尔数组访问时返回新的BBoxArray。
+    """
+
+    def __init__(self, data):
+        self._data = np.asarray(data, dtype=np.float32).reshape(-1, 4)
+
+    @classmethod
+    def from_array(cls, array: np.ndarray):
+        """
+        直接使用 (N, 4) 的float32数组（xywh）创建BBoxArray（不复制）。
+        """
+        if array.dtype != np.float32 or array.ndim != 2 or array.shape[1] != 4:
+            raise ValueError(f"Expect a float32 array of shape (N, 4), got {array.dtype} array of shape {array.shape}.")
+        boxes = cls.__new__(cls)
+        boxes._data = array
+        return boxes
+
+    @classmethod
+    def from_bboxes(cls, bboxes: List[BBox]):
+        return cls([bbox.xywh for bbox in bboxes])
+
+    @classmethod
+    def from_xyxy(cls, data):
+        data = np.asarray(data, dtype=np.float32).reshape(-1, 4)
+        return cls.from_array(np.concatenate([data[:, :2], data[:, 2:] - data[:, :2]], axis=1))
+
+    @property
+    def array(self) -> np.ndarray:
+        return self._data
+
+    @property
+    def xywh(self) -> np.ndarray:
+        return self._data
+
+    @property
+    def xyxy(self) -> np.ndarray:
+        return np.concatenate([self._data[:, :2], self._data[:, :2] + self._data[:, 2:]], axis=1)
+
+    @property
+    def openmmlabformat(self) -> np.ndarray:
+        return self.xyxy
+
+    @property
+    def area(self) -> np.ndarray:
+        return self._data[:, 2] * self._data[:, 3]
+
+    def clip(self, width, height):
+        """
+        将所有box裁剪到 [0, width] x [0, height] 的图像范围内，返回新的BBoxArray。
+        """
+        xyxy = self.xyxy
+        np.clip(xyxy[:, 0::2], 0, width, out=xyxy[:, 0::2])
+        np.clip(xyxy[:, 1::2], 0, height, out=xyxy[:, 1::2])
+        return BBoxArray.from_xyxy(xyxy)
+
+    def scale(self, scale_x, scale_y=None):
+        """
+        将所有box的坐标和尺寸在x方向乘以scale_x，在y方向乘以scale_y（默认与scale_x相同），返回新的BBoxArray。
+        """
+        scale_y = scale_x if scale_y is None else scale_y
+        factors = np.array([scale_x, scale_y, scale_x, scale_y], dtype=np.float32)
+        return BBoxArray.from_array(self._data * factors)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            return BBox.from_array(self._data[item])
+        return BBoxArray.from_array(self._data[item])
+
+    def __iter__(self):
+        for row in self._data:
+            yield BBox.from_array(row)
+
+    def visualize(self, image, palette, **kwargs):
+        for bbox in self:
+            image = bbox.visualize(image, palette, **kwargs)
+        return image
+
+    def __repr__(self):
+        return f"BBoxArray({self.xyxy.tolist()})"
@@ -0,0 +1,287 @@
+from typing import Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from .box import BBox, BBoxArray
+from .polygon import Polygon, PolygonArray
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+# 分块计算IoU时每一块中的元素数量上限（约为 (行数, 列数)），用于限制上千个box时的内存占用
+CHUNK_ELEMENTS = 1 << 22
+# 贪心NMS每次处理的box数量
+NMS_BLOCK = 256
+
+Boxes = Union[BBoxArray, Sequence[BBox], Sequence[Polygon], PolygonArray, np.ndarray]
+
+
+def polygon_boxes(polygons: Sequence[Polygon]) -> BBoxArray:
+    """
+    计算每个Polygon（所有环）的外接矩形，没有点的Polygon对应的box为0。
+    """
+    return PolygonArray(polygons).bboxes
+
+
+def as_xyxy(boxes: Boxes) -> np.ndarray:
+    """
+    将BBoxArray、BBox列表、Polygon列表或PolygonArray（使用其外接矩形）或 (N, 4) 的xyxy数组转换为 (N, 4) 的float32 xyxy数组。
+    """
+    if isinstance(boxes, BBoxArray):
+        return boxes.xyxy
+    if isinstance(boxes, PolygonArray):
+        return boxes.bboxes.xyxy
+    if isinstance(boxes, np.ndarray):
+        return boxes.astype(np.float32, copy=False).reshape(-1, 4)
+    if len(boxes) == 0:
+        return np.zeros((0, 4), dtype=np.float32)
+    if isinstance(boxes[0], Polygon):
+        return polygon_boxes(boxes).xyxy
+    if isinstance(boxes[0], BBox):
+        return BBoxArray.from_bboxes(boxes).xyxy
+    return np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+
+
+def _area(xyxy):
+    return (xyxy[:, 2] - xyxy[:, 0]) * (xyxy[:, 3] - xyxy[:, 1])
+
+
+def _iou_block(xyxy1, area1, xyxy2, area2):
+    # 按坐标分量计算并尽量原地运算，每一块只分配少量 (rows, M) 的临时数组
+    inter = np.minimum(xyxy1[:, None, 2], xyxy2[None, :, 2])
+    inter -= np.maximum(xyxy1[:, None, 0], xyxy2[None, :, 0])
+    np.maximum(inter, 0, out=inter)
+    height = np.minimum(xyxy1[:, None, 3], xyxy2[None, :, 3])
+    height -= np.maximum(xyxy1[:, None, 1], xyxy2[None, :, 1])
+    np.maximum(height, 0, out=height)
+    inter *= height
+    union = np.add(area1[:, None], area2[None, :], out=height)
+    union -= inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def iter_box_iou(boxes1: Boxes, boxes2: Boxes, chunk_elements: int = CHUNK_ELEMENTS
+                 ) -> Iterator[Tuple[int, int, np.ndarray]]:
+    """
+    按boxes1的行分块计算IoU，依次返回 (start, stop, iou)，iou为boxes1[start:stop]与boxes2的 (stop - start, M) IoU矩阵。
+    每一块的元素数量不超过chunk_elements（至少一行），不需要完整的 (N, M) 矩阵时可以用来限制内存占用。
+    """
+    xyxy1, xyxy2 = as_xyxy(boxes1), as_xyxy(boxes2)
+    area1, area2 = _area(xyxy1), _area(xyxy2)
+    rows = max(1, chunk_elements // max(1, len(xyxy2)))
+    for start in range(0, len(xyxy1), rows):
+        stop = min(start + rows, len(xyxy1))
+        yield start, stop, _iou_block(xyxy1[start:stop], area1[start:stop], xyxy2, area2)
+
+
+def box_iou(boxes1: Boxes, boxes2: Boxes, chunk_elements: int = CHUNK_ELEMENTS) -> np.ndarray:
+    """
+    计算两组box两两之间的IoU，返回 (N, M) 的float32数组，参考 `iter_box_iou`。
+    Polygon列表按其外接矩形计算。
+    """
+    xyxy1, xyxy2 = as_xyxy(boxes1), as_xyxy(boxes2)
+    result = np.zeros((len(xyxy1), len(xyxy2)), dtype=np.float32)
+    for start, stop, iou in iter_box_iou(xyxy1, xyxy2, chunk_elements):
+        result[start:stop] = iou
+    return result
+
+
+def nms(boxes: Boxes, scores, iou_threshold: float = 0.5) -> np.ndarray:
+    """
+    贪心NMS：按分数从高到低保留box，并去掉与已保留的box的IoU大于iou_threshold的box。
+    按分数每 `NMS_BLOCK` 个box处理一次，先在块内贪心地保留，再用保留的box一次性抑制后续所有的box，
+    因此只需要 (NMS_BLOCK, N) 的IoU矩阵。
+
+    Returns:
+        保留的box的下标，按分数从高到低排列（分数相同时按原来的顺序）。
+    """
+    xyxy = as_xyxy(boxes)
+    order = np.argsort(-np.asarray(scores, dtype=np.float64), kind="stable")
+    xyxy = xyxy[order]
+    suppressed = np.zeros(len(xyxy), dtype=np.bool_)
+    keep = []  # type: List[np.ndarray]
+    for start in range(0, len(xyxy), NMS_BLOCK):
+        stop = min(start + NMS_BLOCK, len(xyxy))
+        candidates = np.flatnonzero(~suppressed[start:stop]) + start
+        if not len(candidates):
+            continue
+        overlap = box_iou(xyxy[candidates], xyxy[candidates]) > iou_threshold
+        alive = np.ones(len(candidates), dtype=np.bool_)
+        for ind in range(len(candidates)):
+            if alive[ind]:
+                alive[ind + 1:] &= ~overlap[ind, ind + 1:]
+        kept = candidates[alive]
+        keep.append(kept)
+        if stop < len(xyxy):
+            for _, _, iou in iter_box_iou(xyxy[kept], xyxy[stop:]):
+                suppressed[stop:] |= (iou > iou_threshold).any(axis=0)
+    keep = np.concatenate(keep) if keep else np.zeros(0, dtype=np.int64)
+    return order[keep]
+
+
+def batched_nms(boxes: Boxes, scores, groups, iou_threshold: float = 0.5) -> np.ndarray:
+    """
+    分组（如按类别）进行NMS，不同组的box之间不会相互抑制，参考 `nms`。
+
+    Returns:
+        保留的box的下标，按分数从高到低排列。
+    """
+    xyxy = as_xyxy(boxes)
+    scores = np.asarray(scores, dtype=np.float64)
+    groups = np.asarray(groups)
+    keep = [np.zeros(0, dtype=np.int64)]
+    for group in np.unique(groups):
+        indices = np.flatnonzero(groups == group)
+        keep.append(indices[nms(xyxy[indices], scores[indices], iou_threshold)])
+    keep = np.concatenate(keep)
+    return keep[np.lexsort((keep, -scores[keep]))]
+
+
+def match_boxes(gt: Boxes, pred: Boxes, iou_threshold: float = 0.5, scores=None, method: str = "greedy"
+                ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    将预测的box与标注的box一一匹配，只有IoU不小于iou_threshold的一对box才能匹配。
+
+    Arguments:
+        gt: 标注的box。
+        pred: 预测的box。
+        iou_threshold: IoU阈值。
+        scores: 预测的分数，greedy时按分数从高到低依次匹配，为None时按pred的顺序。
+        method: greedy（与COCO评测相同，每个预测与IoU最大的未匹配标注匹配）或
+            bipartite（使匹配的IoU之和最大；只在IoU不小于阈值的box组成的连通分量内求解，
+            安装了scipy时使用 `linear_sum_assignment`，否则使用NumPy实现的匈牙利算法）。
+
+    Returns:
+        匹配的标注下标、预测下标以及它们的IoU，按预测的下标排列。
+    """
+    gt_xyxy, pred_xyxy = as_xyxy(gt), as_xyxy(pred)
+    if method == "greedy":
+        gt_ind, pred_ind, ious = _match_greedy(gt_xyxy, pred_xyxy, iou_threshold, scores)
+    elif method == "bipartite":
+        gt_ind, pred_ind, ious = _match_bipartite(gt_xyxy, pred_xyxy, iou_threshold)
+    else:
+        raise ValueError(f"Unknown matching method '{method}', expect 'greedy' or 'bipartite'.")
+    order = np.argsort(pred_ind, kind="stable")
+    return gt_ind[order], pred_ind[order], ious[order]
+
+
+def _match_greedy(gt_xyxy, pred_xyxy, iou_threshold, scores):
+    if scores is None:
+        order = np.arange(len(pred_xyxy))
+    else:
+        order = np.argsort(-np.asarray(scores, dtype=np.float64), kind="stable")
+    matched = np.zeros(len(gt_xyxy), dtype=np.bool_)
+    gt_ind, pred_ind, ious = [], [], []
+    if len(gt_xyxy):
+        for start, stop, iou in iter_box_iou(pred_xyxy[order], gt_xyxy):
+            for row, pred in zip(iou, order[start:stop].tolist()):
+                row = np.where(matched, -1, row)
+                best = int(row.argmax())
+                if row[best] >= iou_threshold:
+                    matched[best] = True
+                    gt_ind.append(best)
+                    pred_ind.append(pred)
+                    ious.append(row[best])
+    return np.array(gt_ind, dtype=np.int64), np.array(pred_ind, dtype=np.int64), np.array(ious, dtype=np.float32)
+
+
+def _match_bipartite(gt_xyxy, pred_xyxy, iou_threshold):
+    # 只保留IoU不小于阈值的边，按连通分量分别求解，不需要完整的IoU矩阵
+    gt_ind, pred_ind, ious = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)], [np.zeros(0, np.float32)]
+    for start, _, iou in iter_box_iou(gt_xyxy, pred_xyxy):
+        rows, cols = np.nonzero(iou >= iou_threshold)
+        gt_ind.append(rows + start)
+        pred_ind.append(cols)
+        ious.append(iou[rows, cols])
+    gt_ind, pred_ind, ious = np.concatenate(gt_ind), np.concatenate(pred_ind), np.concatenate(ious)
+    components = _components(gt_ind, pred_ind + len(gt_xyxy), len(gt_xyxy) + len(pred_xyxy))[gt_ind]
+    matches = []
+    order = np.argsort(components, kind="stable")
+    for edges in np.split(order, np.flatnonzero(np.diff(components[order])) + 1):
+        if not len(edges):
+            continue
+        gts, gt_local = np.unique(gt_ind[edges], return_inverse=True)
+        preds, pred_local = np.unique(pred_ind[edges], return_inverse=True)
+        weight = np.zeros((len(gts), len(preds)))
+        weight[gt_local, pred_local] = ious[edges]
+        rows, cols = _maximum_assignment(weight)
+        valid = weight[rows, cols] > 0
+        rows, cols = rows[valid], cols[valid]
+        matches.append((gts[rows], preds[cols], weight[rows, cols]))
+    if not matches:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    gt_ind, pred_ind, ious = zip(*matches)
+    return np.concatenate(gt_ind), np.concatenate(pred_ind), np.concatenate(ious).astype(np.float32)
+
+
+def _components(left, right, num_nodes):
+    """
+    由边 (left[i], right[i]) 组成的图中每个节点所在连通分量的代表节点（并查集）。
+    """
+    parent = list(range(num_nodes))
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for a, b in zip(left.tolist(), right.tolist()):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_b] = root_a
+    return np.array([find(node) for node in range(num_nodes)], dtype=np.int64)
+
+
+def _maximum_assignment(weight):
+    if linear_sum_assignment is not None:
+        return linear_sum_assignment(-weight)
+    if weight.shape[0] <= weight.shape[1]:
+        return _linear_sum_assignment(-weight)
+    cols, rows = _linear_sum_assignment(-weight.T)
+    order = np.argsort(rows)
+    return rows[order], cols[order]
+
+
+def _linear_sum_assignment(cost):
+    """
+    没有scipy时使用的匈牙利算法（最短增广路径，对列向量化），cost为 (n, m) 且n <= m，返回总代价最小的行、列下标。
+    """
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=np.int64)  # p[j]为第j列匹配的行（从1开始，0表示未匹配）
+    way = np.zeros(m + 1, dtype=np.int64)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=np.bool_)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used
+            free[0] = False
+            current = np.full(m + 1, np.inf)
+            current[1:] = cost[i0 - 1] - u[i0] - v[1:]
+            update = free & (current < minv)
+            minv[update] = current[update]
+            way[update] = j0
+            j1 = int(np.where(free, minv, np.inf).argmin())
+            delta = minv[j1]
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[free] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    cols = np.flatnonzero(p[1:])
+    rows = p[1:][cols] - 1
+    order = np.argsort(rows)
+    return rows[order], cols[order]
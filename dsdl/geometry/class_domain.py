@@ -1,3 +1,8 @@
+from collections.abc import Sequence
+from types import MappingProxyType
+
+import numpy as np
+
 from .class_domain_attributes import Skeleton
 from .label import Label
 from .registry import CLASSDOMAIN, LABEL
@@ -14,16 +19,24 @@ class ClassDomainMeta(type):
         if not parents:
             return super_new(mcs, name, bases, attributes)
 
+        names = attributes.pop('Names', None)
         classes = attributes.pop('Classes', [])
-        classes = [_ for _ in classes if isinstance(_, Label)]
-        mapping = {}
-        for label in classes:
-            label.set_domain(name)
-            mapping[label.name] = label
-            LABEL.registry(label)
-
-        attributes["__mapping__"] = mapping
-        attributes["__list__"] = classes
+        if names is not None:
+            # 只给出类别名列表的类别域（如上万类的类别体系）不逐个创建和注册Label，参考 `_compact_tables`
+            attributes.update(_compact_tables(name, names))
+        else:
+            classes = [_ for _ in classes if isinstance(_, Label)]
+            mapping = {}
+            for ind, label in enumerate(classes, start=1):
+                label.set_domain(name, ind)
+                mapping[label.name] = label
+                LABEL.registry(label)
+
+            attributes["__mapping__"] = mapping
+            attributes["__list__"] = classes
+            attributes["__label_names__"] = [label.name for label in classes]
+            attributes.update(_lookup_tables(classes))
+            attributes.update(_hierarchy_tables(classes))
         attr_dic = {attr_k: CLASSDOMAIN_ATTRIBUTES[attr_k](attributes.pop(attr_k)) for attr_k in
                                         CLASSDOMAIN_ATTRIBUTES if attr_k in attributes}
         for attr_k in attr_dic:
@@ -36,7 +49,7 @@ class ClassDomainMeta(type):
         return new_cls
 
     def __contains__(cls, item):
-        container = getattr(cls, "__mapping__")
+        container = getattr(cls, "__name_to_id__")
         if isinstance(item, str):
             return item in container
         elif hasattr(item, "category_name"):
@@ -48,6 +61,207 @@ class ClassDomainMeta(type):
         container = getattr(cls, "__list__")
         return len(container)
 
+    def __getattr__(cls, item):
+        # 由类别名列表创建的类别域中，需要所有Label的查找表和排序的查找表在第一次访问时才计算
+        builder = _DEFERRED_TABLES.get(item)
+        if builder is None or not isinstance(cls.__dict__.get("__list__"), _LazyLabelList):
+            raise AttributeError(f"type object '{cls.__name__}' has no attribute '{item}'")
+        tables = builder(cls)
+        for k, v in tables.items():
+            type.__setattr__(cls, k, v)
+        return tables[item]
+
+
+class _LazyLabelList(Sequence):
+    """
+    由类别名列表创建的类别域中的Label序列（对应 `__list__`），第i个Label在第一次被访问时才创建、注册并缓存，
+    已经创建的Label同时加入 `lookup`（即类别域的 `__lookup__`）。
+    """
+
+    def __init__(self, domain_name, names, name_to_id):
+        self._domain_name = domain_name
+        self._names = names
+        self._name_to_id = name_to_id
+        self._array = np.empty(len(names) + 1, dtype=object)  # 序号 -> Label，未创建的为None
+        self.lookup = {}
+
+    def __len__(self):
+        return len(self._names)
+
+    def __getitem__(self, ind):
+        if isinstance(ind, slice):
+            return [self[_] for _ in range(len(self))[ind]]
+        label_id = range(1, len(self._names) + 1)[ind]
+        label = self._array[label_id]
+        return self._create(label_id) if label is None else label
+
+    def __iter__(self):
+        for ind in range(len(self._names)):
+            yield self[ind]
+
+    def take(self, ids):
+        """
+        序号数组（从1开始，0对应None）对应的Label组成的object数组，只创建其中还未创建的Label。
+        """
+        labels = self._array[ids]
+        missing = np.equal(labels, None) & (ids != 0)
+        if missing.any():
+            for label_id in np.unique(ids[missing]).tolist():
+                self._create(label_id)
+            labels = self._array[ids]
+        return labels
+
+    def _create(self, label_id):
+        name = self._names[label_id - 1]
+        label = Label(name)
+        label.set_domain(self._domain_name, label_id)
+        self._array[label_id] = label
+        self.lookup[label_id] = label
+        if self._name_to_id[name] == label_id:
+            self.lookup[name] = label
+        LABEL.registry(label)
+        return label
+
+
+def _readonly(arr):
+    arr.flags.writeable = False
+    return arr
+
+
+_EMPTY_IDS = _readonly(np.zeros(0, dtype=np.int32))
+
+
+def _lookup_tables(classes):
+    """
+    类别域的只读查找表，类别的序号从1开始，0保留给缺失的类别：
+
+    - `__name_to_id__`: 类别名 -> 序号；
+    - `__label_array__`: 序号 -> Label 的object数组，第0项为None；
+    - `__vocabulary__`: 序号 -> 类别名 的数组，第0项为空字符串；
+    - `__sorted_names__` / `__sorted_ids__`: 按类别名排序的类别名和序号，用于批量查找；
+    - `__lookup__`: 序号和类别名 -> Label，与 `ClassDomain.get_label` 的结果一致；
+    - `__color_lut__`: 序号 -> 可视化颜色 的 (N + 1, 3) uint8数组，第0项为黑色。
+    """
+    name_to_id = {label.name: ind for ind, label in enumerate(classes, start=1)}
+    label_array = np.empty(len(classes) + 1, dtype=object)
+    label_array[1:] = classes
+    vocabulary = np.array([""] + [label.name for label in classes])
+    lookup = dict(enumerate(classes, start=1))
+    lookup.update((name, classes[ind - 1]) for name, ind in name_to_id.items())
+    return {
+        "__name_to_id__": MappingProxyType(name_to_id),
+        "__label_array__": _readonly(label_array),
+        "__vocabulary__": _readonly(vocabulary),
+        **_sorted_tables(name_to_id, vocabulary.dtype),
+        "__lookup__": MappingProxyType(lookup),
+        "__color_lut__": _readonly(_color_lut(len(classes) + 1)),
+    }
+
+
+def _sorted_tables(name_to_id, dtype):
+    sorted_names = np.array(sorted(name_to_id), dtype=dtype)
+    return {
+        "__sorted_names__": _readonly(sorted_names),
+        "__sorted_ids__": _readonly(np.array([name_to_id[name] for name in sorted_names.tolist()], dtype=np.int32)),
+    }
+
+
+def _compact_tables(domain_name, names):
+    """
+    只给出类别名列表（list、tuple或numpy字符串数组）的类别域的查找表，与 `_lookup_tables` 和 `_hierarchy_tables` 的含义相同，
+    但不创建任何Label：`__list__` 为 `_LazyLabelList`，`__lookup__` 中只有已经创建的Label，
+    需要所有Label的 `__mapping__`、`__label_array__` 以及排序的查找表在第一次访问时才计算（参考 `_DEFERRED_TABLES`）。
+    这样的类别域中没有上级类别。
+    """
+    names = names.tolist() if isinstance(names, np.ndarray) else list(map(str, names))
+    num = len(names) + 1
+    name_to_id = dict(zip(names, range(1, num)))
+    labels = _LazyLabelList(domain_name, names, name_to_id)
+    return {
+        "__list__": labels,
+        "__label_names__": names,
+        "__name_to_id__": MappingProxyType(name_to_id),
+        "__vocabulary__": _readonly(np.array([""] + names)),
+        "__lookup__": MappingProxyType(labels.lookup),
+        "__color_lut__": _readonly(_color_lut(num)),
+        "__ancestor_offsets__": _readonly(np.zeros(num + 1, dtype=np.int64)),
+        "__ancestor_labels__": _readonly(np.empty(0, dtype=object)),
+        "__descendants__": MappingProxyType({}),
+        "__roll_up__": MappingProxyType({}),
+    }
+
+
+def _deferred_mapping(cls):
+    labels = cls.__list__
+    return {"__mapping__": {name: labels[ind - 1] for name, ind in cls.__name_to_id__.items()}}
+
+
+def _deferred_label_array(cls):
+    return {"__label_array__": _readonly(cls.__list__.take(np.arange(len(cls.__list__) + 1)))}
+
+
+def _deferred_sorted_tables(cls):
+    return _sorted_tables(cls.__name_to_id__, cls.__vocabulary__.dtype)
+
+
+# 按类别名列表创建的类别域中推迟计算的查找表 -> 计算函数（返回包含该表的若干个表）
+_DEFERRED_TABLES = {
+    "__mapping__": _deferred_mapping,
+    "__label_array__": _deferred_label_array,
+    "__sorted_names__": _deferred_sorted_tables,
+    "__sorted_ids__": _deferred_sorted_tables,
+}
+
+
+def _hierarchy_tables(classes):
+    """
+    类别层级的闭包表，在创建类别域时一次性计算（上级类别所在的类别域必须已经创建）：
+
+    - `__ancestor_offsets__` / `__ancestor_labels__`: CSR格式的祖先表，序号i的所有上级类别（由近到远）为
+      `__ancestor_labels__[__ancestor_offsets__[i]:__ancestor_offsets__[i + 1]]`；
+    - `__descendants__`: 上级类别的registry_name -> 本类别域中其所有下级类别的序号组成的int32数组；
+    - `__roll_up__`: 上级类别域名 -> (N + 1,) 的int32数组，第i项为序号i在该类别域中最近的上级类别的序号，没有时为0。
+    """
+    num = len(classes) + 1
+    offsets = np.zeros(num + 1, dtype=np.int64)
+    ancestor_labels = []
+    descendants = {}
+    roll_up = {}
+    for ind, label in enumerate(classes, start=1):
+        ancestors = label.ancestors
+        offsets[ind + 1] = offsets[ind] + len(ancestors)
+        ancestor_labels.extend(ancestors)
+        for ancestor in ancestors:
+            descendants.setdefault(ancestor.registry_name, []).append(ind)
+            if ancestor.domain_name is None or ancestor.label_id is None:
+                continue
+            if ancestor.domain_name not in roll_up:
+                roll_up[ancestor.domain_name] = np.zeros(num, dtype=np.int32)
+            table = roll_up[ancestor.domain_name]
+            if table[ind] == 0:
+                table[ind] = ancestor.label_id
+    labels = np.empty(len(ancestor_labels), dtype=object)
+    labels[:] = ancestor_labels
+    return {
+        "__ancestor_offsets__": _readonly(offsets),
+        "__ancestor_labels__": _readonly(labels),
+        "__descendants__": MappingProxyType(
+            {k: _readonly(np.array(v, dtype=np.int32)) for k, v in descendants.items()}),
+        "__roll_up__": MappingProxyType({k: _readonly(v) for k, v in roll_up.items()}),
+    }
+
+
+def _color_lut(num):
+    """
+    与PASCAL VOC相同的颜色表：将序号的二进制位依次交错地放到R、G、B的高位，序号不同颜色就不同，且相邻序号的颜色差别较大。
+    """
+    ids = np.arange(num, dtype=np.int64)
+    lut = np.zeros((num, 3), dtype=np.uint8)
+    for bit in range(8):
+        for channel in range(3):
+            lut[:, channel] |= (((ids >> (3 * bit + channel)) & 1) << (7 - bit)).astype(np.uint8)
+    return lut
+
 
 class ClassDomain(metaclass=ClassDomainMeta):
     @classmethod
@@ -56,19 +270,21 @@ class ClassDomain(metaclass=ClassDomainMeta):
 
     @classmethod
     def get_label_names(cls):
-        labels = cls.get_labels()
-        return [_.name for _ in labels]
+        """
+        所有类别名组成的列表，在创建类别域时计算并缓存，不要修改返回的列表。
+        """
+        return cls.__label_names__
 
     @classmethod
     def get_label(cls, name):
         if isinstance(name, str):
-            container = getattr(cls, "__mapping__")
-            if name in container:
-                return container[name]
+            ind = cls.__name_to_id__.get(name)
+            if ind is not None:
+                return cls.__list__[ind - 1]
             else:
                 raise KeyError(f"`{cls.__name__}` Domain doesn't have `{name}` category.")
         elif isinstance(name, int):
-            container = getattr(cls, "__list__")
+            container = cls.__list__
             if 1 <= name <= len(container):
                 return container[name - 1]
             else:
@@ -76,6 +292,139 @@ class ClassDomain(metaclass=ClassDomainMeta):
         else:
             raise RuntimeError(f"Invalid key {name}, only int/str keys are permitted.")
 
+    @classmethod
+    def get_name_to_id(cls):
+        """
+        类别名到序号（从1开始）的只读字典。
+        """
+        return cls.__name_to_id__
+
+    @classmethod
+    def get_label_array(cls):
+        """
+        序号到Label的只读object数组，第0项为None（表示缺失的类别），可以直接用序号数组索引。
+        """
+        return cls.__label_array__
+
+    @classmethod
+    def get_vocabulary(cls):
+        """
+        序号到类别名的只读numpy字符串数组，第0项为空字符串。
+        """
+        return cls.__vocabulary__
+
+    @classmethod
+    def get_label_lookup(cls):
+        """
+        序号（int）和类别名（str）到Label的只读字典，命中时与 `get_label` 的结果一致。
+        """
+        return cls.__lookup__
+
+    @classmethod
+    def get_color_lut(cls):
+        """
+        序号到可视化颜色的只读 (N + 1, 3) uint8颜色表，第0项为黑色，可以直接用序号数组（如分割图）索引。
+        """
+        return cls.__color_lut__
+
+    @classmethod
+    def get_label_ids(cls, values):
+        """
+        将一组类别名或序号（可以混合）批量转换为序号（从1开始）组成的int32数组，
+        不存在的类别名和超出范围的序号与 `get_label` 一样抛出KeyError/IndexError。
+        """
+        if isinstance(values, np.ndarray) and values.dtype.kind in "biuU":
+            arr = values
+        else:
+            values = values.reshape(-1).tolist() if isinstance(values, np.ndarray) else list(values)
+            try:
+                # 全部为类别名时直接在C层面逐个查表
+                return np.fromiter(map(cls.__name_to_id__.__getitem__, values), np.int32, len(values))
+            except (KeyError, TypeError):
+                pass
+            if not set(map(type, values)) <= {int, bool}:
+                # 混合类型、非法的值逐个查找，抛出与get_label相同的异常
+                return np.array([cls._get_label_id(value) for value in values], dtype=np.int32)
+            arr = np.array(values, dtype=np.int64)
+        if arr.dtype.kind in "biu":
+            num = len(cls.__list__)
+            if arr.size and ((arr < 1) | (arr > num)).any():
+                raise IndexError(f"There are only {num} categories in `{cls.__name__}` domain.")
+            return arr.astype(np.int32)
+        if arr.size == 0:
+            return np.zeros(arr.shape, dtype=np.int32)
+        sorted_names = cls.__sorted_names__
+        if len(sorted_names) == 0:
+            raise KeyError(f"`{cls.__name__}` Domain doesn't have `{arr.flat[0]}` category.")
+        pos = np.searchsorted(sorted_names, arr)
+        np.minimum(pos, len(sorted_names) - 1, out=pos)
+        found = sorted_names[pos] == arr
+        if not found.all():
+            raise KeyError(f"`{cls.__name__}` Domain doesn't have `{arr[~found].flat[0]}` category.")
+        return cls.__sorted_ids__[pos]
+
+    @classmethod
+    def _get_label_id(cls, value):
+        label = cls.get_label(value)  # 非法的值抛出与get_label相同的异常
+        return cls.__name_to_id__[label.name] if isinstance(value, str) else int(value)
+
+    @classmethod
+    def get_labels_by_ids(cls, ids):
+        """
+        将序号数组批量转换为Label组成的object数组，序号0对应None，超出范围的序号（包括负数）抛出IndexError。
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        labels = cls.__list__
+        num = len(labels)
+        if ids.size and ((ids < 0) | (ids > num)).any():
+            raise IndexError(f"There are only {num} categories in `{cls.__name__}` domain.")
+        if isinstance(labels, _LazyLabelList) and "__label_array__" not in cls.__dict__:
+            # 只创建用到的Label
+            return labels.take(ids)
+        return cls.__label_array__[ids]
+
+    @classmethod
+    def get_ancestors(cls, name):
+        """
+        类别（类别名或序号）的所有上级类别，按层级由近到远排列。
+        """
+        label_id = cls._get_label_id(name)
+        offsets = cls.__ancestor_offsets__
+        return cls.__ancestor_labels__[offsets[label_id]:offsets[label_id + 1]].tolist()
+
+    @classmethod
+    def get_descendant_ids(cls, label):
+        """
+        本类别域中以label（可以属于其他类别域）为上级类别的所有类别的序号组成的int32数组。
+        """
+        return cls.__descendants__.get(label.registry_name, _EMPTY_IDS)
+
+    @classmethod
+    def is_a(cls, ids, label):
+        """
+        批量判断序号数组中的类别是否为label或label的下级类别（如 `COCO2017ClassDom.is_a(ids, food)`），
+        返回与ids形状相同的bool数组，序号0为False。
+        """
+        mask = np.zeros(len(cls.__list__) + 1, dtype=bool)
+        mask[cls.get_descendant_ids(label)] = True
+        if label.domain_name == cls.__name__ and label.label_id is not None:
+            mask[label.label_id] = True
+        return mask[np.asarray(ids, dtype=np.int64)]
+
+    @classmethod
+    def roll_up(cls, ids, domain):
+        """
+        将序号数组中的类别批量映射为其在上级类别域domain（类别域或类别域名）中最近的上级类别的序号，
+        没有属于该类别域的上级类别时为0。
+        """
+        domain_name = domain if isinstance(domain, str) else domain.__name__
+        ids = np.asarray(ids, dtype=np.int64)
+        if domain_name == cls.__name__:
+            return ids.astype(np.int32)
+        if domain_name not in cls.__roll_up__:
+            raise KeyError(f"`{domain_name}` is not a super domain of `{cls.__name__}`.")
+        return cls.__roll_up__[domain_name][ids]
+
     @classmethod
     def get_attribute(cls, attr_name):
         attr_dic = getattr(cls, "__attributes__")
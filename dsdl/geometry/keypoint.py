@@ -51,24 +51,53 @@ class Coord2D(BaseGeometry):
 
 
 class KeyPoints(BaseGeometry):
+    """
+    关键点：保存为 (N, 3) 的float32数组（每行为 x, y, visiable），N为类别域中关键点的数量，
+    每个关键点的 `Coord2D` 在第一次访问时才创建。
+    """
+
     def __init__(self, keypoints: List[Coord2D], domain: ClassDomain):
+        self._array = np.array([_.value for _ in keypoints], dtype=np.float32).reshape(-1, 3)
         self._keypoints = keypoints
         self._dom = domain
 
+    @classmethod
+    def from_array(cls, array: np.ndarray, domain: ClassDomain):
+        """
+        直接使用 (N, 3) 的float32数组创建KeyPoints（不复制）。
+        """
+        if array.dtype != np.float32 or array.ndim != 2 or array.shape[1] != 3:
+            raise ValueError(f"Expect a float32 array of shape (N, 3), got {array.dtype} array of shape {array.shape}.")
+        keypoints = cls.__new__(cls)
+        keypoints._array = array
+        keypoints._keypoints = None
+        keypoints._dom = domain
+        return keypoints
+
+    @property
+    def array(self) -> np.ndarray:
+        return self._array
+
     @property
     def value(self):
-        return [_.value for _ in self._keypoints]
+        return [[x, y, int(v)] for x, y, v in self._array.tolist()]
 
     @property
     def points(self):
-        return [_.point for _ in self._keypoints]
+        return self._array[:, :2].tolist()
 
     @property
     def visables(self):
-        return [_.visiable for _ in self._keypoints]
+        return [int(_) for _ in self._array[:, 2].tolist()]
 
     @property
     def keypoints(self):
+        if self._keypoints is None:
+            labels = self._dom.get_labels()
+            self._keypoints = [
+                Coord2D(x=x, y=y, visiable=int(v), label=label)
+                for (x, y, v), label in zip(self._array.tolist(), labels)
+            ]
         return self._keypoints
 
     @property
@@ -77,16 +106,19 @@ class KeyPoints(BaseGeometry):
 
     @property
     def names(self):
-        return [_.name for _ in self._keypoints]
+        return [_.name for _ in self.keypoints]
+
+    def __len__(self):
+        return len(self._array)
 
     def __getitem__(self, item):
         assert isinstance(item, (str, int)), "The index must be str or int type value."
         if isinstance(item, int):
-            return self._keypoints[item]
+            return self.keypoints[item]
         elif isinstance(item, str):
-            for ind, label_name in enumerate(self._dom.get_label_names()):
-                if label_name == item:
-                    return self._keypoints[ind]
+            ind = self._dom.get_name_to_id().get(item)
+            if ind is not None and ind <= len(self._array):
+                return self.keypoints[ind - 1]
         raise ClassNotFoundError(f"Category '{item}' not defined in domain {self._dom.__name__}.")
 
     def visualize(self, image, palette, **kwargs):
@@ -100,7 +132,7 @@ class KeyPoints(BaseGeometry):
                 p1, p2 = point_pair[:2]
                 if p1.visiable > 0 and p2.visiable:
                     draw_obj.line([*p1.point, *p2.point], width=2, fill=(*line_color, 255))
-        for point in self._keypoints:
+        for point in self.keypoints:
             if point.visiable > 0:
                 label_ = point.label.category_name
                 if label_ not in palette:
@@ -6,10 +6,17 @@ from .registry import CLASSDOMAIN
 
 
 class Label(BaseGeometry):
+    """
+    类别。加入类别域后每个类别都是唯一的对象，并获得在类别域中的序号 `label_id`（从1开始），
+    相等比较和哈希只依赖类别域名和类别名，反序列化时返回当前进程中类别域里的同一个对象。
+    """
+
     def __init__(self, name, supercategories=(), domain_name=None):
         self._name = name
         self._supercategories = [_ for _ in supercategories if isinstance(_, Label)]
         self._domain_name = domain_name
+        self._label_id = None
+        self._closure = None
 
     @property
     def supercategories(self):
@@ -39,9 +46,47 @@ class Label(BaseGeometry):
     def registry_name(self):
         return f"{self._domain_name}__{self._name}"
 
-    def set_domain(self, domain_name):
+    @property
+    def label_id(self):
+        """
+        在类别域中的序号（从1开始，与 `ClassDomain.get_label(int)` 一致），未加入类别域时为None。
+        """
+        return self._label_id
+
+    @property
+    def ancestors(self):
+        """
+        所有上级类别（supercategories以及它们的上级类别），按层级由近到远排列、去重，第一次访问后缓存。
+        """
+        return self._get_closure()[0]
+
+    def is_a(self, other):
+        """
+        该类别是否为other或other的下级类别（如 `apple.is_a(food)`），第一次调用后为O(1)的查找。
+        """
+        return self == other or other.registry_name in self._get_closure()[1]
+
+    def _get_closure(self):
+        if self._closure is None:
+            ancestors, names = [], set()
+            level = self._supercategories
+            while level:
+                next_level = []
+                for label in level:
+                    registry_name = label.registry_name
+                    if registry_name not in names:
+                        names.add(registry_name)
+                        ancestors.append(label)
+                        next_level.extend(label.supercategories)
+                level = next_level
+            self._closure = (tuple(ancestors), frozenset(names))
+        return self._closure
+
+    def set_domain(self, domain_name, label_id=None):
         if self._domain_name is None:
             self._domain_name = domain_name
+        if self._label_id is None and self._domain_name == domain_name:
+            self._label_id = label_id
 
     @property
     def category_name(self):
@@ -56,17 +101,20 @@ class Label(BaseGeometry):
         return CLASSDOMAIN.get(self.domain_name)
 
     def __eq__(self, other):
-        if self.domain_name != other.domain_name:
-            return False
-        if self.name != other.name:
-            return False
-        if len(self.parents) != len(self.parents):
-            return False
-        for p1 in self.parents:
-            for p2 in other.parents:
-                if p1 != p2:
-                    return False
-        return True
+        if self is other:
+            return True
+        if not isinstance(other, Label):
+            return NotImplemented
+        # 类别域中的类别名是唯一的，属于类别域的类别只需要比较类别域名和类别名
+        if self._domain_name is not None or other._domain_name is not None:
+            return self._domain_name == other._domain_name and self._name == other._name
+        return self._name == other._name and self._supercategories == other._supercategories
+
+    def __hash__(self):
+        return hash(self._name)
+
+    def __reduce__(self):
+        return _rebuild_label, (self._name, self._supercategories, self._domain_name, self._label_id)
 
     def visualize(self, image, palette, **kwargs):
         draw_obj = ImageDraw.Draw(image)
@@ -78,8 +126,8 @@ class Label(BaseGeometry):
         if "bbox" in kwargs:
             coords = np.array([[item.xyxy[0], item.xyxy[1] + 0.2 * label_size[1]] for item in kwargs["bbox"].values()])
         elif "polygon" in kwargs:
-            coords = np.array([[item.point_for_draw[0], item.point_for_draw[1] + 0.2 * label_size[1]] for item in
-                               kwargs["polygon"].values()])
+            points = [item.point_for_draw for item in kwargs["polygon"].values()]
+            coords = np.array([[x, y + 0.2 * label_size[1]] for x, y in points])
         else:
             coords = np.array([[0, 0.2 * label_size[1]]])
         for coord in coords:
@@ -92,6 +140,18 @@ class Label(BaseGeometry):
         return self.category_name
 
 
+def _rebuild_label(name, supercategories, domain_name, label_id):
+    # 与 `StructRecord` 的反序列化相同，优先使用当前进程中类别域里的Label（按类别名列表创建的类别域中可能尚未创建），
+    # 使反序列化后的Label仍是唯一的对象
+    if domain_name is not None and domain_name in CLASSDOMAIN:
+        domain = CLASSDOMAIN.get(domain_name)
+        if name in domain:
+            return domain.get_label(name)
+    label = Label(name, supercategories, domain_name)
+    label._label_id = label_id
+    return label
+
+
 class LabelList(BaseGeometry):
 
     def __init__(self, label_list):
@@ -131,9 +191,8 @@ class LabelList(BaseGeometry):
                 coords = y_offset + np.array(
                     [[item.xyxy[0], item.xyxy[1] + 0.2 * label_size[1]] for item in kwargs["bbox"].values()])
             elif "polygon" in kwargs:
-                coords = y_offset + np.array(
-                    [[item.point_for_draw[0], item.point_for_draw[1] + 0.2 * label_size[1]] for item in
-                     kwargs["polygon"].values()])
+                points = [item.point_for_draw for item in kwargs["polygon"].values()]
+                coords = y_offset + np.array([[x, y + 0.2 * label_size[1]] for x, y in points])
             elif "image_label_list" not in kwargs:
                 coords = y_offset + np.array([[0, 0.2 * label_size[1]]])
             else:
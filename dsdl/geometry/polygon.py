@@ -1,69 +1,163 @@
-from typing import List
+from itertools import accumulate
+from typing import List, Sequence, Union
 
 import numpy as np
 from PIL import Image, ImageDraw
 
 from .base_geometry import BaseGeometry
+from .box import BBox, BBoxArray
+from .polygon_ops import clip_rings, group_sums, ring_areas, ring_bounds, simplify_rings
 
 
 class PolygonItem(BaseGeometry):
+    """
+    多边形的一个环，点保存为 (N, 2) 的float32数组，在Polygon中为其坐标缓冲区的视图（不复制）。
+    `points`、`points_x`、`points_y` 和 `openmmlabformat` 返回列表，需要数组时使用 `points_array` 和 `flat_array`。
+    """
 
     def __init__(
             self,
-            points: List[List[float]]
+            points: Union[List[List[float]], np.ndarray]
     ):
+        if not (isinstance(points, np.ndarray) and points.dtype == np.float32 and points.ndim == 2):
+            points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
         self._data = points
 
     @property
     def points(self) -> List[List[float]]:
+        return self._data.tolist()
+
+    @property
+    def points_array(self) -> np.ndarray:
+        """
+        (N, 2) 的float32数组（不复制）。
+        """
         return self._data
 
+    @property
+    def flat_array(self) -> np.ndarray:
+        """
+        展平为 [x1, y1, x2, y2, ...] 的float32数组（不复制）。
+        """
+        return self._data.reshape(-1)
+
     @property
     def points_x(self) -> List[float]:
-        return [_[0] for _ in self._data]
+        return self._data[:, 0].tolist()
 
     @property
     def points_y(self) -> List[float]:
-        return [_[1] for _ in self._data]
+        return self._data[:, 1].tolist()
 
     @property
     def point_for_draw(self) -> List[int]:
-        p = min(self._data, key=lambda x: x[0] + x[1])
-        p = [int(_) for _ in p]
-        return p
+        return _point_for_draw(self._data)
 
     @property
     def openmmlabformat(self) -> List[float]:
         return self._flatten()
 
     def to_tuple(self):
-        return tuple([(_[0], _[1]) for _ in self._data])
+        return tuple(map(tuple, self._data.tolist()))
 
     def _flatten(self) -> List[float]:
-        return [_ for point in self._data for _ in point]
+        return self._data.reshape(-1).tolist()
+
+    def __len__(self):
+        return len(self._data)
 
     def __repr__(self):
-        return str(self._data)
+        return str(self._data.tolist())
 
 
 class Polygon(BaseGeometry):
+    """
+    由若干环组成的多边形：所有环的点连续地保存在一个 (P, 2) 的float32数组 `coords` 中，
+    `ring_offsets` 为长度为环数+1的int64数组，第i个环的点为 `coords[ring_offsets[i]:ring_offsets[i + 1]]`。
+    """
 
     def __init__(self, polygons: List[PolygonItem]):
-        self._data = polygons
+        points = [_.points_array for _ in polygons]
+        lengths = [len(_) for _ in points]
+        self._coords = np.concatenate(points) if points else np.zeros((0, 2), dtype=np.float32)
+        self._ring_offsets = _lengths_to_offsets(lengths)
+        self._data = None
+        self._draw_point = None
+
+    @classmethod
+    def from_arrays(cls, coords: np.ndarray, ring_offsets: np.ndarray):
+        """
+        直接使用已有的坐标和偏移量数组创建Polygon（不复制），coords为 (P, 2) 的float32数组，ring_offsets从0开始。
+        """
+        polygon = cls.__new__(cls)
+        polygon._coords = coords
+        polygon._ring_offsets = ring_offsets
+        polygon._data = None
+        polygon._draw_point = None
+        return polygon
 
     @property
-    def polygons(self):
+    def coords(self) -> np.ndarray:
+        return self._coords
+
+    @property
+    def ring_offsets(self) -> np.ndarray:
+        return self._ring_offsets
+
+    @property
+    def polygons(self) -> List[PolygonItem]:
+        if self._data is None:
+            offsets = self._ring_offsets.tolist()
+            self._data = [PolygonItem(self._coords[start:stop]) for start, stop in zip(offsets[:-1], offsets[1:])]
         return self._data
 
     @property
     def openmmlabformat(self) -> List[List[float]]:
-        return [_.openmmlabformat for _ in self._data]
+        return [_.openmmlabformat for _ in self.polygons]
 
     @property
     def point_for_draw(self) -> [int, int]:
-        p = min(self._data, key=lambda x: x.point_for_draw[0] + x.point_for_draw[1])
-        p = [int(_) for _ in p.point_for_draw]
-        return p
+        # 所有环中x + y最小的点，直接在坐标数组上计算一次后缓存
+        if self._draw_point is None:
+            self._draw_point = _point_for_draw(self._coords[:self._ring_offsets[-1]])
+        return self._draw_point
+
+    @property
+    def area(self) -> float:
+        """
+        所有环的面积之和（各个环视为互不重叠的部分）。
+        """
+        return float(ring_areas(self._coords, self._ring_offsets).sum())
+
+    @property
+    def bbox(self) -> BBox:
+        """
+        所有环的外接矩形，没有点时为 BBox(0, 0, 0, 0)。
+        """
+        x1, y1, x2, y2 = ring_bounds(self._coords, self._ring_offsets[[0, -1]]).tolist()[0]
+        return BBox(x1, y1, x2 - x1, y2 - y1)
+
+    def clip(self, width, height):
+        """
+        将多边形裁剪到 [0, width] x [0, height] 的图像范围内，参考 `PolygonArray.clip`。
+        """
+        return self._as_array().clip(width, height)[0]
+
+    def crop(self, x, y, width, height):
+        """
+        裁剪出左上角为 (x, y)、大小为 width x height 的窗口，坐标相对于窗口的左上角，参考 `PolygonArray.crop`。
+        """
+        return self._as_array().crop(x, y, width, height)[0]
+
+    def simplify(self, tolerance):
+        """
+        删除与简化后的边距离不超过tolerance的点，参考 `PolygonArray.simplify`。
+        """
+        return self._as_array().simplify(tolerance)[0]
+
+    def _as_array(self):
+        return PolygonArray.from_arrays(
+            self._coords, self._ring_offsets, np.array([0, len(self._ring_offsets) - 1], dtype=np.int64))
 
     def visualize(self, image, palette, **kwargs):
         color = (0, 255, 0)
@@ -83,4 +177,138 @@ class Polygon(BaseGeometry):
         return image
 
     def __repr__(self):
-        return str(self._data)
+        return str(self.polygons)
+
+
+class PolygonArray(BaseGeometry):
+    """
+    多个Polygon（如一张图像中的所有多边形）组成的数组：所有环的点连续地保存在一个 (P, 2) 的float32数组 `coords` 中，
+    `ring_offsets` 为所有环的偏移量，第i个Polygon由第 `polygon_offsets[i]` 到 `polygon_offsets[i + 1]` 个环组成。
+    面积、外接矩形、裁剪和简化对所有Polygon一次性向量化地计算。
+    按整数下标访问时返回共享坐标数组的 `Polygon`，按切片访问时返回新的PolygonArray。
+    """
+
+    def __init__(self, polygons: Sequence[Polygon]):
+        coords = [polygon.coords[:polygon.ring_offsets[-1]] for polygon in polygons]
+        self._coords = np.concatenate(coords) if coords else np.zeros((0, 2), dtype=np.float32)
+        point_starts = _lengths_to_offsets([len(_) for _ in coords])
+        ring_offsets = [polygon.ring_offsets[1:] + start for polygon, start in zip(polygons, point_starts.tolist())]
+        self._ring_offsets = np.concatenate([np.zeros(1, dtype=np.int64), *ring_offsets])
+        self._polygon_offsets = _lengths_to_offsets([len(polygon.ring_offsets) - 1 for polygon in polygons])
+
+    @classmethod
+    def from_arrays(cls, coords: np.ndarray, ring_offsets: np.ndarray, polygon_offsets: np.ndarray):
+        """
+        直接使用已有的坐标和偏移量数组创建PolygonArray（不复制），ring_offsets和polygon_offsets都从0开始。
+        """
+        polygons = cls.__new__(cls)
+        polygons._coords = coords
+        polygons._ring_offsets = ring_offsets
+        polygons._polygon_offsets = polygon_offsets
+        return polygons
+
+    @property
+    def coords(self) -> np.ndarray:
+        return self._coords
+
+    @property
+    def ring_offsets(self) -> np.ndarray:
+        return self._ring_offsets
+
+    @property
+    def polygon_offsets(self) -> np.ndarray:
+        return self._polygon_offsets
+
+    @property
+    def polygons(self) -> List[Polygon]:
+        return list(self)
+
+    @property
+    def area(self) -> np.ndarray:
+        """
+        每个Polygon所有环的面积之和，(N,) 的float64数组。
+        """
+        return group_sums(ring_areas(self._coords, self._ring_offsets), self._polygon_offsets)
+
+    @property
+    def bboxes(self) -> BBoxArray:
+        """
+        每个Polygon的外接矩形，没有点的Polygon对应的box为0。
+        """
+        return BBoxArray.from_xyxy(ring_bounds(self._coords, self._ring_offsets[self._polygon_offsets]))
+
+    @property
+    def openmmlabformat(self) -> List[List[List[float]]]:
+        return [polygon.openmmlabformat for polygon in self]
+
+    def clip(self, width, height):
+        """
+        将所有Polygon裁剪到 [0, width] x [0, height] 的图像范围内，返回新的PolygonArray。
+        跨越边界的环在边界上插入交点，裁剪后少于3个点的环被删除，完全位于图像外的Polygon变为没有环的Polygon。
+        """
+        return self._clip([0, 0, width, height])
+
+    def crop(self, x, y, width, height):
+        """
+        将所有Polygon裁剪到左上角为 (x, y)、大小为 width x height 的窗口内，并将坐标平移到相对于窗口的左上角，
+        返回新的PolygonArray。
+        """
+        cropped = self._clip([x, y, x + width, y + height])
+        cropped._coords -= np.array([x, y], dtype=cropped._coords.dtype)
+        return cropped
+
+    def simplify(self, tolerance):
+        """
+        使用Douglas-Peucker算法删除所有环中与简化后的边距离不超过tolerance的点，返回新的PolygonArray。
+        """
+        coords, ring_offsets = simplify_rings(self._coords, self._ring_offsets, tolerance)
+        return PolygonArray.from_arrays(coords, ring_offsets, self._polygon_offsets)
+
+    def _clip(self, window):
+        coords, ring_offsets = clip_rings(self._coords, self._ring_offsets, window)
+        lengths = np.diff(ring_offsets)
+        valid = lengths >= 3
+        if valid.all():
+            return PolygonArray.from_arrays(coords, ring_offsets, self._polygon_offsets.copy())
+        # 删除退化的环，并重新计算每个Polygon的环数
+        coords = coords[np.repeat(valid, lengths)]
+        ring_counts = group_sums(valid.astype(np.int64), self._polygon_offsets)
+        return PolygonArray.from_arrays(
+            coords, _lengths_to_offsets(lengths[valid].tolist()), _lengths_to_offsets(ring_counts.tolist()))
+
+    def __len__(self):
+        return len(self._polygon_offsets) - 1
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            item = range(len(self))[item]
+            first, last = self._polygon_offsets[item:item + 2].tolist()
+            ring_offsets = self._ring_offsets[first:last + 1]
+            start, stop = int(ring_offsets[0]), int(ring_offsets[-1])
+            return Polygon.from_arrays(self._coords[start:stop], ring_offsets - start)
+        if isinstance(item, slice):
+            return PolygonArray(list(map(self.__getitem__, range(len(self))[item])))
+        raise TypeError(f"PolygonArray indices must be integers or slices, not {type(item).__name__}.")
+
+    def __iter__(self):
+        for ind in range(len(self)):
+            yield self[ind]
+
+    def visualize(self, image, palette, **kwargs):
+        for polygon in self:
+            image = polygon.visualize(image, palette, **kwargs)
+        return image
+
+    def __repr__(self):
+        return f"PolygonArray({self.polygons})"
+
+
+def _lengths_to_offsets(lengths):
+    return np.array([0, *accumulate(lengths)], dtype=np.int64)
+
+
+def _point_for_draw(coords):
+    # x + y最小的点，用来放置类别名称；没有点时为 [0, 0]
+    if not len(coords):
+        return [0, 0]
+    return [int(_) for _ in coords[np.argmin(coords[:, 0] + coords[:, 1])].tolist()]
@@ -0,0 +1,194 @@
+"""
+多边形的向量化计算，所有函数都作用于展平的环：`coords` 为所有环的点连续组成的 (P, 2) 数组，
+`ring_offsets` 为长度为环数+1的偏移量数组，第i个环的点为 `coords[ring_offsets[i]:ring_offsets[i + 1]]`。
+一张图像中所有多边形的环都可以放在同一组数组中，一次NumPy运算处理完。
+"""
+from typing import Sequence, Tuple
+
+import numpy as np
+
+
+def group_sums(values: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    按offsets分组求和（`values[offsets[i]:offsets[i + 1]].sum()`），空的组为0。
+    """
+    lengths = np.diff(offsets)
+    sums = np.zeros(len(lengths), dtype=np.result_type(values.dtype, np.int64))
+    nonempty = lengths > 0
+    if nonempty.any():
+        sums[nonempty] = np.add.reduceat(values[:offsets[-1]], offsets[:-1][nonempty])
+    return sums
+
+
+def _group_argmax(values, starts):
+    # 每个分组（从starts中的下标开始到下一个start为止）中最大值第一次出现的下标，starts必须从0开始且递增
+    group_max = np.maximum.reduceat(values, starts)
+    groups = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(values))))
+    candidates = np.flatnonzero(values == group_max[groups])
+    candidate_groups = groups[candidates]
+    first = np.concatenate([[True], candidate_groups[1:] != candidate_groups[:-1]])
+    return candidates[first], group_max
+
+
+def _next_index(ring_offsets, n):
+    # 每个点在其所在环中的下一个点（环的最后一个点的下一个点为第一个点）
+    nxt = np.arange(1, n + 1)
+    lengths = np.diff(ring_offsets)
+    nonempty = lengths > 0
+    nxt[ring_offsets[1:][nonempty] - 1] = ring_offsets[:-1][nonempty]
+    return nxt
+
+
+def ring_areas(coords: np.ndarray, ring_offsets: np.ndarray, signed: bool = False) -> np.ndarray:
+    """
+    使用鞋带公式计算每个环的面积（float64），signed为True时返回有向面积（在y轴向下的图像坐标系中顺时针为正）。
+    """
+    coords = coords[:ring_offsets[-1]].astype(np.float64)
+    x, y = coords[:, 0], coords[:, 1]
+    nxt = _next_index(ring_offsets, len(coords))
+    areas = group_sums(x * y[nxt] - x[nxt] * y, ring_offsets) / 2
+    return areas if signed else np.abs(areas)
+
+
+def ring_bounds(coords: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    按点的偏移量offsets分组计算外接矩形，返回 (N, 4) 的float32 xyxy数组，没有点的组为0。
+    """
+    lengths = np.diff(offsets)
+    xyxy = np.zeros((len(lengths), 4), dtype=np.float32)
+    nonempty = lengths > 0
+    if nonempty.any():
+        coords = coords[:offsets[-1]]
+        starts = offsets[:-1][nonempty]
+        xyxy[nonempty, :2] = np.minimum.reduceat(coords, starts)
+        xyxy[nonempty, 2:] = np.maximum.reduceat(coords, starts)
+    return xyxy
+
+
+def _clip_half_plane(columns, ring_offsets, axis, value, keep_greater):
+    # Sutherland–Hodgman算法中用一条裁剪边裁剪所有环：每个点输出它本身（在内侧时）以及它与下一个点的连线和裁剪边的交点（跨越裁剪边时）
+    if not len(columns[0]):
+        return columns, ring_offsets
+    nxt = _next_index(ring_offsets, len(columns[0]))
+    clipped, other = columns[axis], columns[1 - axis]
+    inside = clipped >= value if keep_greater else clipped <= value
+    crossing = inside != inside[nxt]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (value - clipped[crossing]) / (clipped[nxt[crossing]] - clipped[crossing])
+    other_crossing = other[crossing]
+    intersection = other_crossing + t * (other[nxt[crossing]] - other_crossing)
+    counts = inside.astype(np.int64) + crossing
+    ends = np.cumsum(counts)
+    # 跨越裁剪边的点输出的最后一个点为交点，在内侧的点输出的第一个点为它本身
+    new_clipped = np.full(ends[-1] if len(ends) else 0, value, dtype=np.float64)
+    new_other = np.empty_like(new_clipped)
+    new_other[ends[crossing] - 1] = intersection
+    new_clipped[(ends - counts)[inside]] = clipped[inside]
+    new_other[(ends - counts)[inside]] = other[inside]
+    ring_counts = group_sums(counts, ring_offsets)
+    new_columns = (new_clipped, new_other) if axis == 0 else (new_other, new_clipped)
+    return new_columns, np.concatenate([[0], np.cumsum(ring_counts)])
+
+
+def clip_rings(
+        coords: np.ndarray,
+        ring_offsets: np.ndarray,
+        window: Sequence[float]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    将所有环裁剪到矩形窗口 `window = [x1, y1, x2, y2]` 内，返回新的 (coords, ring_offsets)。
+    完全位于窗口外的环变为空环，跨越窗口边界的环在边界上插入交点。
+    """
+    x1, y1, x2, y2 = window
+    coords = coords[:ring_offsets[-1]]
+    columns = (coords[:, 0].astype(np.float64), coords[:, 1].astype(np.float64))
+    for axis, value, keep_greater in ((0, x1, True), (0, x2, False), (1, y1, True), (1, y2, False)):
+        columns, ring_offsets = _clip_half_plane(columns, ring_offsets, axis, value, keep_greater)
+    return np.stack(columns, axis=1).astype(coords.dtype), ring_offsets
+
+
+def _segment_distances(x, y, start_x, start_y, stop_x, stop_y):
+    # 每个点到对应线段的距离
+    dx, dy = stop_x - start_x, stop_y - start_y
+    rx, ry = x - start_x, y - start_y
+    squared = dx * dx + dy * dy
+    t = np.divide(rx * dx + ry * dy, squared, out=np.zeros(len(x)), where=squared > 0)
+    np.clip(t, 0, 1, out=t)
+    return np.hypot(rx - t * dx, ry - t * dy)
+
+
+def simplify_rings(
+        coords: np.ndarray,
+        ring_offsets: np.ndarray,
+        tolerance: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    使用Douglas-Peucker算法删除所有环中与简化后的边距离不超过tolerance的点，返回新的 (coords, ring_offsets)。
+    每一轮迭代在一次向量化运算中同时细分所有环的所有线段（每条线段保留其中距离最远的点），
+    而不是逐个环递归。点数大于3的环至少保留3个点，点数不超过3的环保持不变。
+    """
+    coords = coords[:ring_offsets[-1]]
+    lengths = np.diff(ring_offsets)
+    nonempty = lengths > 0
+    if not nonempty.any():
+        return coords, ring_offsets
+    starts, ends = ring_offsets[:-1][nonempty], ring_offsets[1:][nonempty]
+    # 在每个环的末尾加上它的第一个点作为闭合点，环变成首尾相同的折线
+    work = np.insert(coords, ends, coords[starts], axis=0).astype(np.float64)
+    wx, wy = work[:, 0].copy(), work[:, 1].copy()
+    closing = np.insert(np.zeros(len(coords), dtype=bool), ends, True)
+    work_starts = starts + np.arange(len(starts))
+    work_lengths = lengths[nonempty] + 1
+    position = np.arange(len(work))
+
+    kept = closing.copy()
+    kept[work_starts] = True
+    kept[np.repeat(work_lengths <= 4, work_lengths)] = True
+    # 初始的分割点为每个环中离第一个点最远的点
+    first = np.repeat(work_starts, work_lengths)
+    farthest, _ = _group_argmax(np.hypot(wx - wx[first], wy - wy[first]), work_starts)
+    kept[farthest] = True
+
+    def distances():
+        # 所有点到其前后两个保留点之间线段的距离，保留点的距离为0
+        previous = np.maximum.accumulate(np.where(kept, position, 0))
+        following = np.minimum.accumulate(np.where(kept, position, len(work) - 1)[::-1])[::-1]
+        result = _segment_distances(wx, wy, wx[previous], wy[previous], wx[following], wy[following])
+        result[kept] = 0
+        return result, previous, following
+
+    # 只迭代尚未确定的点：没有被细分的线段中的点全部删除，不再参与之后的迭代
+    _, previous, following = distances()
+    active = np.flatnonzero(~kept)
+    previous, following = previous[active], following[active]
+    split_of = np.full(len(work), -1, dtype=np.int64)
+    while len(active):
+        segment_starts = np.flatnonzero(np.concatenate([[True], previous[1:] != previous[:-1]]))
+        d = _segment_distances(wx[active], wy[active], wx[previous], wy[previous], wx[following], wy[following])
+        farthest, segment_max = _group_argmax(d, segment_starts)
+        farthest = farthest[segment_max > tolerance]
+        if not len(farthest):
+            break
+        split = active[farthest]
+        kept[split] = True
+        split_of[previous[farthest]] = split
+        point_split = split_of[previous]
+        split_of[previous[farthest]] = -1
+        remaining = (point_split >= 0) & (active != point_split)
+        before = active < point_split
+        following = np.where(remaining & before, point_split, following)[remaining]
+        previous = np.where(remaining & ~before, point_split, previous)[remaining]
+        active = active[remaining]
+
+    # 只剩下第一个点和最远点的环再保留一个离这两点连线最远的点
+    ring_kept = np.add.reduceat((kept & ~closing).astype(np.int64), work_starts)
+    short = (ring_kept < 3) & (work_lengths > 4)
+    if short.any():
+        farthest, _ = _group_argmax(distances()[0], work_starts)
+        kept[farthest[short]] = True
+        ring_kept = np.add.reduceat((kept & ~closing).astype(np.int64), work_starts)
+
+    new_lengths = np.zeros(len(lengths), dtype=np.int64)
+    new_lengths[nonempty] = ring_kept
+    simplified = work[kept & ~closing].astype(coords.dtype)
+    return simplified, np.concatenate([[0], np.cumsum(new_lengths)])
@@ -24,6 +24,9 @@ class Registry:
             raise ClassNotFoundError(f"Class '{name}' is not defined.")
         return self._map[name]
 
+    def __contains__(self, name):
+        return name in self._map
+
 
 STRUCT = Registry("struct")
 CLASSDOMAIN = Registry("class domain")
@@ -0,0 +1,196 @@
+from typing import List, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from .base_geometry import BaseGeometry
+from .box import BBox
+from .polygon import Polygon
+
+
+class RlePolygon(BaseGeometry):
+    """
+    游程编码（RLE）表示的mask，格式与COCO相同：按列优先（Fortran顺序）展开的 H x W 的mask中，
+    从0开始交替的背景/前景像素的游程长度，保存为uint32数组。
+    面积和外接矩形直接根据游程计算，不需要解码出mask。
+    """
+
+    def __init__(self, counts: Union[List[int], str, bytes], size: Sequence[int]):
+        if isinstance(counts, (str, bytes)):
+            counts = decode_counts_string(counts)
+        self._counts = np.asarray(counts, dtype=np.uint32)
+        self._size = (int(size[0]), int(size[1]))
+
+    @classmethod
+    def from_counts(cls, counts: np.ndarray, size: Tuple[int, int]):
+        """
+        直接使用uint32的游程数组创建RlePolygon（不复制）。
+        """
+        rle = cls.__new__(cls)
+        rle._counts = counts
+        rle._size = size
+        return rle
+
+    @classmethod
+    def from_mask(cls, mask: np.ndarray):
+        """
+        对 (H, W) 的mask（非0为前景）进行编码。
+        """
+        flat = np.asarray(mask).ravel(order="F") != 0
+        changes = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+        bounds = np.concatenate([[0], changes, [flat.size]])
+        counts = np.diff(bounds)
+        if flat.size and flat[0]:
+            counts = np.concatenate([[0], counts])
+        return cls.from_counts(counts.astype(np.uint32), mask.shape[:2])
+
+    @classmethod
+    def from_polygon(cls, polygon: Polygon, height: int, width: int):
+        """
+        将Polygon的所有环栅格化到 height x width 的mask中（环之间取并集）并进行编码。
+        """
+        canvas = Image.new("L", (width, height), 0)
+        draw = ImageDraw.Draw(canvas)
+        offsets = polygon.ring_offsets
+        coords = polygon.coords
+        for start, stop in zip(offsets[:-1].tolist(), offsets[1:].tolist()):
+            if stop - start >= 2:
+                draw.polygon(coords[start:stop].ravel().tolist(), fill=1, outline=1)
+        del draw
+        return cls.from_mask(np.asarray(canvas))
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self._counts
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self._size
+
+    @property
+    def height(self) -> int:
+        return self._size[0]
+
+    @property
+    def width(self) -> int:
+        return self._size[1]
+
+    @property
+    def area(self) -> int:
+        return int(self._counts[1::2].sum(dtype=np.int64))
+
+    @property
+    def bbox(self) -> BBox:
+        """
+        前景的外接矩形（与pycocotools的 `toBbox` 相同），没有前景时为 BBox(0, 0, 0, 0)。
+        """
+        height = self._size[0]
+        ends = np.cumsum(self._counts, dtype=np.int64)
+        starts = ends - self._counts
+        fg_starts, fg_ends = starts[1::2], ends[1::2] - 1
+        nonempty = fg_ends >= fg_starts
+        fg_starts, fg_ends = fg_starts[nonempty], fg_ends[nonempty]
+        if not len(fg_starts) or height == 0:
+            return BBox(0, 0, 0, 0)
+        first_col, last_col = fg_starts // height, fg_ends // height
+        # 跨越多列的游程覆盖了这些列之间的整列
+        multi = first_col != last_col
+        ymin = np.where(multi, 0, fg_starts % height).min()
+        ymax = np.where(multi, height - 1, fg_ends % height).max()
+        xmin, xmax = first_col.min(), last_col.max()
+        return BBox(int(xmin), int(ymin), int(xmax - xmin + 1), int(ymax - ymin + 1))
+
+    def to_mask(self) -> np.ndarray:
+        """
+        解码为 (H, W) 的uint8 mask。
+        """
+        height, width = self._size
+        values = np.zeros(len(self._counts), dtype=np.uint8)
+        values[1::2] = 1
+        return np.repeat(values, self._counts).reshape(width, height).T
+
+    def to_string(self) -> str:
+        """
+        编码为COCO的压缩字符串格式（pycocotools的 `counts`）。
+        """
+        return encode_counts_string(self._counts)
+
+    @property
+    def openmmlabformat(self) -> dict:
+        return {"size": list(self._size), "counts": self._counts.tolist()}
+
+    def visualize(self, image, palette, **kwargs):
+        color = (0, 255, 0)
+        if "label" in kwargs:
+            for label in kwargs["label"].values():
+                if label.category_name not in palette:
+                    palette[label.category_name] = tuple(np.random.randint(0, 255, size=[3]))
+
+                color = palette[label.category_name]
+
+        mask = Image.fromarray(self.to_mask() * 127)
+        overlay = Image.new("RGBA", mask.size, (*color, 255))
+        image.paste(overlay, mask=mask)
+        return image
+
+    def __repr__(self):
+        return f"RlePolygon(size={list(self._size)}, area={self.area})"
+
+
+def decode_rle_masks(rles: Sequence[RlePolygon], packed: bool = True) -> np.ndarray:
+    """
+    将同一张图像的多个RLE解码为 (N, H, W) 的mask。packed为True时按位压缩最后一维，
+    返回 (N, H, ceil(W / 8)) 的uint8数组（`np.unpackbits(masks, axis=-1, count=W)` 可以还原），内存为未压缩时的1/8。
+    """
+    if not len(rles):
+        return np.zeros((0, 0, 0), dtype=np.uint8)
+    height, width = rles[0].size
+    for rle in rles:
+        if rle.size != (height, width):
+            raise ValueError(f"All masks must have the same size, got {rle.size} and {(height, width)}.")
+    if not packed:
+        return np.stack([rle.to_mask() for rle in rles])
+    masks = np.zeros((len(rles), height, (width + 7) // 8), dtype=np.uint8)
+    for ind, rle in enumerate(rles):
+        masks[ind] = np.packbits(rle.to_mask(), axis=1)
+    return masks
+
+
+def decode_counts_string(string: Union[str, bytes]) -> List[int]:
+    """
+    解码COCO的压缩RLE字符串（每个字符保存5位，游程与其前两个游程的差值按有符号数编码）。
+    """
+    if isinstance(string, bytes):
+        string = string.decode("ascii")
+    counts = []
+    value = shift = 0
+    for char in string:
+        code = ord(char) - 48
+        value |= (code & 0x1f) << shift
+        shift += 5
+        if code & 0x20:
+            continue
+        if code & 0x10:
+            value |= -1 << shift
+        if len(counts) > 2:
+            value += counts[-2]
+        counts.append(value)
+        value = shift = 0
+    return counts
+
+
+def encode_counts_string(counts: Sequence[int]) -> str:
+    chars = []
+    counts = [int(_) for _ in counts]
+    for ind, value in enumerate(counts):
+        if ind > 2:
+            value -= counts[ind - 2]
+        more = True
+        while more:
+            code = value & 0x1f
+            value >>= 5
+            more = value != -1 if code & 0x10 else value != 0
+            if more:
+                code |= 0x20
+            chars.append(chr(code + 48))
+    return "".join(chars)
@@ -46,22 +46,43 @@ class SegmentationMap(BaseGeometry):
 
     def to_array(self):
         """
-        turn SegmentationMap object to numpy.ndarray
+        turn SegmentationMap object to numpy.ndarray, palette (`P` mode) images are decoded to class indices directly
         """
         return bytes_to_numpy(self.to_bytes())
 
-    def visualize(self, image, palette, **kwargs):
-        seg = self.to_array()
-        color_seg = np.zeros((seg.shape[0], seg.shape[1], 3), dtype=np.uint8)
-        category_ids = np.unique(seg)
-        label_lst = []
-        for category_id in category_ids:
-            label = self._dom.get_label(int(category_id))
-            category_name = label.category_name
-            if category_name not in palette:
-                palette[category_name] = tuple(np.random.randint(0, 255, size=[3]))
-            label_lst.append(label)
-            color_seg[seg == category_id, :] = np.array(palette[category_name])
+    def colorize(self, palette=None, seg=None):
+        """
+        map the segmentation map (or an already decoded `seg`) to an (H, W, 3) uint8 color image in a single
+        lookup table indexing pass, and return it together with the labels present in the map.
+        colors come from the class domain's `get_color_lut`; categories already in `palette` use the palette color,
+        and the colors of the other present categories are written into `palette`.
+        pixels with value 0 or values outside the class domain (including negative values) are black.
+        """
+        seg = self.to_array() if seg is None else np.asarray(seg)
+        num = len(self._dom) + 1
+        if not np.issubdtype(seg.dtype, np.integer):
+            seg = seg.astype(np.int64)
+        if seg.size and (seg.min() < 0 or seg.max() >= num):
+            seg = np.where((seg >= 0) & (seg < num), seg, 0)
+        counts = np.bincount(seg.ravel(), minlength=num)
+        lut = np.array(self._dom.get_color_lut(), dtype=np.uint8)
+        present = np.flatnonzero(counts[1:]) + 1
+        label_lst = self._dom.get_labels_by_ids(present).tolist()
+        if palette is not None:
+            for ind, label in zip(present.tolist(), label_lst):
+                category_name = label.category_name
+                if category_name in palette:
+                    lut[ind] = palette[category_name]
+                else:
+                    palette[category_name] = tuple(lut[ind].tolist())
+        return lut[seg], label_lst
+
+    def visualize(self, image, palette, seg=None, **kwargs):
+        """
+        blend the colorized map onto `image`; pass `seg` when the map has already been decoded to avoid decoding it
+        again.
+        """
+        color_seg, label_lst = self.colorize(palette, seg)
         overlay = Image.fromarray(color_seg).convert("RGBA")
         overlayed = Image.blend(image, overlay, 0.5)
         LabelList(label_lst).visualize(image=overlayed, palette=palette, bbox={"temp": BBox(0, 0, 0, 0)})
@@ -66,5 +66,6 @@ def bytes_to_numpy(bytes_: io.BytesIO) -> np.ndarray:  # type: ignore[type-arg]
         dtype = np.uint8
     else:
         raise FileReadError("Currently unsupported image type")
-    image_ = np.array(image.getdata(), dtype=dtype).reshape(*shape)
+    # 通过数组接口直接复制像素缓冲区（P模式得到的是调色板序号，不转换为RGB），避免 `getdata` 逐个像素生成Python对象
+    image_ = np.array(image, dtype=dtype).reshape(*shape)
     return image_
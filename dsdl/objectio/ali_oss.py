@@ -9,13 +9,29 @@ from .base import BaseFileReader
 class AliOSSFileReader(BaseFileReader):
     """
     该类的作用为读取 阿里云OSS上面的文件
+
+    access_key_id/access_key_secret为None时从环境变量 `OSS_ACCESS_KEY_ID`/`OSS_ACCESS_KEY_SECRET` 中读取。
+    pickle（如DataLoader的子进程、数据集的pickle）时只保存显式传入的密钥，从环境变量读取的密钥不会写入pickle，
+    反序列化时重新从环境变量中读取。
     """
 
-    def __init__(self, working_dir, bucket_name, access_key_id, access_key_secret, endpoint):
+    def __init__(self, working_dir, bucket_name, access_key_id=None, access_key_secret=None, endpoint=None):
         super().__init__(working_dir)
+        if endpoint is None:
+            raise ValueError("`endpoint` of the aliyun oss bucket is required.")
+        self._config = dict(bucket_name=bucket_name, access_key_id=access_key_id,
+                            access_key_secret=access_key_secret, endpoint=endpoint)
+        if access_key_id is None:
+            access_key_id = _getenv("OSS_ACCESS_KEY_ID")
+        if access_key_secret is None:
+            access_key_secret = _getenv("OSS_ACCESS_KEY_SECRET")
         auth = oss2.Auth(access_key_id, access_key_secret)
         self.bucket = oss2.Bucket(auth, endpoint, bucket_name)
 
+    def __reduce__(self):
+        # oss2.Bucket 无法pickle，在反序列化时根据配置重新创建（未显式传入的密钥为None）
+        return self.__class__, (self.working_dir, *self._config.values())
+
     @contextmanager
     def load(self, file):
         fp = os.path.join(self.working_dir, file)
@@ -25,3 +41,10 @@ class AliOSSFileReader(BaseFileReader):
         finally:
             if object_stream.client_crc != object_stream.server_crc:
                 print("The CRC checksum between client and server is inconsistent!")
+
+
+def _getenv(name):
+    value = os.environ.get(name)
+    if value is None:
+        raise ValueError(f"Aliyun oss credential is not configured, pass it explicitly or set ${name}.")
+    return value
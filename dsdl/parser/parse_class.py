@@ -89,7 +89,8 @@ class ParserClass:
                 class_field.append(ele_class)
         else:
             for value in class_value:
-                super_class_value = re.findall(r"\[(.*?)\]", value)
+                # 大多数类别名中没有 `[`，不需要用正则表达式查找
+                super_class_value = re.findall(r"\[(.*?)\]", value) if "[" in value else ()
                 assert (
                         len(super_class_value) == 0
                 ), f"length of {value} must equal to nums of super_categories."
@@ -15,6 +15,7 @@ from .parse_class import EleClass, ParserClass
 from .parse_field import EleStruct, ParserField
 from .parse_params import ParserParam
 from .utils import *
+from .utils import COMPACT_CLASS_DOMAIN_SIZE
 
 try:
     from yaml import CSafeLoader as YAMLSafeLoader
@@ -272,14 +273,17 @@ class DSDLParser(Parser, ABC):
                     dsdl_py += f"""    {field_list.name} = {field_list.type}\n"""
             if val.type == TypeEnum.CLASS_DOMAIN:
                 dsdl_py += f"class {key}(ClassDomain):\n"
-                dsdl_py += "    Classes = [\n"
-                for ele_class in val.field_list:
-                    if ele_class.super_categories:
-                        temp = ", ".join(ele_class.super_categories)
-                        dsdl_py += f"""        Label("{ele_class.label_value}", supercategories=[{temp}]),\n"""
-                    else:
-                        dsdl_py += f"""        Label("{ele_class.label_value}"),\n"""
-                dsdl_py += "    ]\n"
+                if self._is_compact_class_domain(val):
+                    dsdl_py += self._generate_class_names(val)
+                else:
+                    dsdl_py += "    Classes = [\n"
+                    for ele_class in val.field_list:
+                        if ele_class.super_categories:
+                            temp = ", ".join(ele_class.super_categories)
+                            dsdl_py += f"""        Label("{ele_class.label_value}", supercategories=[{temp}]),\n"""
+                        else:
+                            dsdl_py += f"""        Label("{ele_class.label_value}"),\n"""
+                    dsdl_py += "    ]\n"
                 if val.skeleton:
                     dsdl_py += f"""    Skeleton = {val.skeleton}\n"""
             if idx != len(ordered_keys) - 1:
@@ -291,6 +295,24 @@ class DSDLParser(Parser, ABC):
         else:
             return dsdl_py
 
+    @staticmethod
+    def _is_compact_class_domain(val: StructORClassDomain) -> bool:
+        if len(val.field_list) < COMPACT_CLASS_DOMAIN_SIZE:
+            return False
+        return all(not ele.super_categories and "\n" not in ele.label_value for ele in val.field_list)
+
+    @staticmethod
+    def _generate_class_names(val: StructORClassDomain) -> str:
+        """
+        生成类别名列表：相邻的字符串字面量在编译时就被拼接为一个常量，再一次性split，
+        比逐个生成 `Label("...")` 的代码编译和执行都快得多。
+        """
+        names = [ele.label_value for ele in val.field_list]
+        lines = [repr(name + "\n") for name in names[:-1]]
+        lines.append(repr(names[-1]))
+        body = "".join(f"        {line}\n" for line in lines)
+        return f"    Names = (\n{body}    ).split(\"\\n\")\n"
+
 
 def dsdl_parse(
     dsdl_yaml: str,
@@ -21,6 +21,8 @@ TYPES_TIME = ["Date", "Time"]
 TYPES_LABEL = ["Label", "SegMap", "Keypoint"]
 TYPES_LIST = ["List"]
 TYPES_ALL = TYPES_WITHOUT_PARS + TYPES_TIME + TYPES_LABEL + TYPES_LIST
+# 类别数量不少于该值且没有上级类别的class_domain只生成类别名列表（`Names`），Label在使用时才创建
+COMPACT_CLASS_DOMAIN_SIZE = 1000
 
 
 def sanitize_variable_name(varstr: str) -> str:
@@ -1,16 +1,8 @@
-import os
 from typing import Sequence, Union
 
 import click
 
-try:
-    from yaml import CSafeLoader as YAMLSafeLoader
-except ImportError:
-    from yaml import SafeLoader as YAMLSafeLoader
-
-import json
-
-from yaml import load as yaml_load
+from dsdl.dataset import Util
 
 
 class OptionEatAll(click.Option):
@@ -60,33 +52,8 @@ class OptionEatAll(click.Option):
         return retval
 
 
-YAML_VALID_SUFFIX = ('.yaml', '.YAML')
-JSON_VALID_SUFFIX = ('.json', '.JSON')
-VALID_SUFFIX = YAML_VALID_SUFFIX + JSON_VALID_SUFFIX
-
-
 def load_samples(dsdl_path: str, path: Union[str, Sequence[str]]):
     samples = []
-    paths = []
-    dsdl_dir = os.path.split(dsdl_path)[0]
-    if isinstance(path, str):
-        path = os.path.join(dsdl_dir, path)
-        if os.path.isdir(path):
-            paths = [os.path.join(path, _) for _ in os.listdir(path) if _.endswith(VALID_SUFFIX)]
-        elif os.path.isfile(path):
-            if path.endswith(VALID_SUFFIX):
-                paths = [path]
-    elif isinstance(path, (list, tuple)):
-        paths = [os.path.join(dsdl_dir, _) for _ in path if os.path.isfile(_) and _.endswith(VALID_SUFFIX)]
-    for p in paths:
-        if p.endswith(YAML_VALID_SUFFIX):
-            with open(p, "r") as f:
-                data = yaml_load(f, YAMLSafeLoader)['samples']
-            samples.extend(data)
-        else:
-            with open(p, "r") as f:
-                data = json.load(f)['samples']
-            samples.extend(data)
+    for p in Util.list_sample_files(dsdl_path, path):
+        samples.extend(Util.load_sample_file(p))
     return samples
-
-
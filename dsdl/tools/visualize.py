@@ -30,30 +30,40 @@ from .commons import OptionEatAll, load_samples
 @click.option("-t", "--task", type=str, help="the task to visualize")
 @click.option("-p", "--position", type=str, required=False, help='the directory of dsdl define file')
 @click.option("-m", "--multistage", is_flag=True, help="whether to use the generated python file")
-def view(dsdl_yaml, config, location, num, random, visualize, fields, task, position, multistage):
-    with open(dsdl_yaml, "r") as f:
-        dsdl_info = yaml_load(f, Loader=YAMLSafeLoader)['data']
-        sample_type = dsdl_info['sample-type']
-        sample_path = dsdl_info["sample-path"]
-        if sample_path == "$local" or sample_path == "local":
-            samples = dsdl_info['samples']
-        else:
-            samples = load_samples(dsdl_yaml, sample_path)
-    if multistage:
-        dsdl_py = os.path.splitext(dsdl_yaml)[0] + ".py"
-        with open(dsdl_py, encoding='utf-8') as dsdl_file:
-            exec(dsdl_file.read(), {})
-    else:
-        if position:
-            dsdl_py = dsdl_parse(dsdl_yaml, position)
-        else:
-            dsdl_py = dsdl_parse(dsdl_yaml)
-        exec(dsdl_py, {})
+@click.option("--cache-dir", "cache_dir", type=str, required=False,
+              help="the directory to cache the compiled dataset, reused until the dsdl/sample files change")
+def view(dsdl_yaml, config, location, num, random, visualize, fields, task, position, multistage, cache_dir):
     config_dic = {}
     with open(config, encoding='utf-8') as config_file:
         exec(config_file.read(), config_dic)
     location_config = config_dic["local" if location == "local" else "ali_oss"]
-    dataset = Dataset(samples, sample_type, location_config)
+    if cache_dir and multistage:
+        raise ValueError("`--cache-dir` compiles the dsdl yaml itself and cannot be combined with `--multistage`.")
+    if cache_dir:
+        if position:
+            dataset = Dataset.from_yaml(dsdl_yaml, location_config, position, cache_dir=cache_dir)
+        else:
+            dataset = Dataset.from_yaml(dsdl_yaml, location_config, cache_dir=cache_dir)
+    else:
+        with open(dsdl_yaml, "r") as f:
+            dsdl_info = yaml_load(f, Loader=YAMLSafeLoader)['data']
+            sample_type = dsdl_info['sample-type']
+            sample_path = dsdl_info["sample-path"]
+            if sample_path == "$local" or sample_path == "local":
+                samples = dsdl_info['samples']
+            else:
+                samples = load_samples(dsdl_yaml, sample_path)
+        if multistage:
+            dsdl_py = os.path.splitext(dsdl_yaml)[0] + ".py"
+            with open(dsdl_py, encoding='utf-8') as dsdl_file:
+                exec(dsdl_file.read(), {})
+        else:
+            if position:
+                dsdl_py = dsdl_parse(dsdl_yaml, position)
+            else:
+                dsdl_py = dsdl_parse(dsdl_yaml)
+            exec(dsdl_py, {})
+        dataset = Dataset(samples, sample_type, location_config)
 
     palette = {}
     if task:
@@ -8,13 +8,16 @@ from .special import (
     KeypointField,
     LabelField,
     PolygonField,
+    RlePolygonField,
     TimeField,
 )
-from .struct import Struct
+from .struct import VALIDATION_LEVELS, Struct, StructRecord
 from .unstructure import ImageField, SegMapField
 
 __all__ = [
+    "VALIDATION_LEVELS",
     "Struct",
+    "StructRecord",
     "StrField",
     "IntField",
     "BoolField",
@@ -27,6 +30,7 @@ __all__ = [
     "IntervalField",
     "BBoxField",
     "PolygonField",
+    "RlePolygonField",
     "DateField",
     "TimeField",
     "SegMapField",
@@ -0,0 +1,222 @@
+from itertools import chain
+
+import numpy as np
+
+from ..geometry import Attributes, BBox, KeyPoints
+from .generic import BoolField, IntField, NumField
+from .special import LABEL_KEY_TYPES, BBoxField, Coord3DField, CoordField, IntervalField, KeypointField, LabelField
+
+# 元素中缺失某个字段时，该字段列中对应位置的占位值
+MISSING = object()
+
+
+class BatchFailed(Exception):
+    """
+    批量校验无法处理这批元素（存在非法的值或无法向量化的类型），需要回退到逐个元素校验。
+    """
+    pass
+
+
+def _numeric_array(values, shape_tail):
+    try:
+        arr = np.asarray(values)
+    except (ValueError, TypeError, OverflowError):
+        raise BatchFailed
+    if arr.dtype.kind not in "biuf" or arr.shape[1:] != shape_tail:
+        raise BatchFailed
+    return arr
+
+
+def _convert_int(field, values):
+    # 与 `int(value)` 一致：浮点数向0截断，非有限值和超出int64范围的值回退到逐个校验；
+    # 整数与浮点数混合时NumPy会将整数转换为float64（超过2**53的整数会丢失精度），同样回退到逐个校验
+    arr = _numeric_array(values, ())
+    if arr.dtype.kind == "f":
+        if any(type(value) is not float for value in values):
+            raise BatchFailed
+        if not (np.isfinite(arr).all() and (np.abs(arr) < 2.0 ** 63).all()):
+            raise BatchFailed
+        arr = arr.astype(np.int64)
+    elif arr.dtype.kind == "b":
+        arr = arr.astype(np.int64)
+    return arr.tolist()
+
+
+def _convert_num(field, values):
+    return _numeric_array(values, ()).astype(np.float64).tolist()
+
+
+def _convert_bool(field, values):
+    # BoolField只检查 `value in [True, False]`，保留原始的值
+    arr = _numeric_array(values, ())
+    if arr.dtype.kind != "b" and not ((arr == 0) | (arr == 1)).all():
+        raise BatchFailed
+    return values
+
+
+def _number_lists(values, size):
+    # 与 `validate_list_of_number` 一致，要求每个值都是长度为size的list
+    for value in values:
+        if type(value) is not list:
+            raise BatchFailed
+    return _numeric_array(values, (size,)).astype(np.float64)
+
+
+def _convert_coord(field, values):
+    return _number_lists(values, 2).tolist()
+
+
+def _convert_coord3d(field, values):
+    return _number_lists(values, 3).tolist()
+
+
+def _convert_interval(field, values):
+    arr = _number_lists(values, 2)
+    if (arr[:, 0] > arr[:, 1]).any():
+        raise BatchFailed
+    return arr.tolist()
+
+
+def _convert_bbox(field, values):
+    return [BBox(*row) for row in _number_lists(values, 4).tolist()]
+
+
+def _convert_keypoint(field, values):
+    # 与 `KeypointField.validate` 一致，所有元素的关键点保存在同一个 (M, N, 3) 的float32数组中
+    num = len(field.dom)
+    for value in values:
+        if type(value) is not list or len(value) != num:
+            raise BatchFailed
+    points = list(chain.from_iterable(values))
+    for point in points:
+        if type(point) is not list:
+            raise BatchFailed
+    arr = _numeric_array(points, (3,)).astype(np.float32).reshape(len(values), num, 3)
+    return [KeyPoints.from_array(row, field.dom) for row in arr]
+
+
+def _convert_label(field, values):
+    try:
+        ids = field.dom.get_label_ids(values)
+    except (KeyError, IndexError, RuntimeError):
+        raise BatchFailed
+    return field.dom.get_labels_by_ids(ids).tolist()
+
+
+# 字段类型 -> 批量转换函数，只有元素Struct的所有字段都是这些类型时才能批量校验
+CONVERTERS = {
+    IntField: _convert_int,
+    NumField: _convert_num,
+    BoolField: _convert_bool,
+    CoordField: _convert_coord,
+    Coord3DField: _convert_coord3d,
+    IntervalField: _convert_interval,
+    BBoxField: _convert_bbox,
+    LabelField: _convert_label,
+    KeypointField: _convert_keypoint,
+}
+
+
+class BatchValidator:
+    """
+    将ListField中由同一Struct组成的元素按字段转换为数组，一次性完成类型转换、形状和取值范围的检查，
+    再直接组装出与逐个构造完全相同的Struct（或 `StructRecord`）。任意一个值无法通过批量校验时返回None，
+    由调用方回退到逐个元素校验，从而得到与原来相同的异常信息。
+    """
+
+    def __init__(self, struct_cls):
+        self.struct_cls = struct_cls
+        self.order = list(struct_cls.__required__) + list(struct_cls.__optional__)
+        self.converters = {k: CONVERTERS[type(struct_cls.__mappings__[k])] for k in self.order}
+        self._builders = {}
+
+    @classmethod
+    def supports(cls, struct_cls):
+        # 自定义了__init__的Struct的构造方式未知，不能批量组装
+        if not hasattr(struct_cls.__init__, "__source__"):
+            return False
+        return all(type(field) in CONVERTERS for field in struct_cls.__mappings__.values())
+
+    def __call__(self, items, file_reader, record=False):
+        for item in items:
+            if type(item) is not dict:
+                return None
+        columns = {}
+        sparse = []  # 存在缺失值的字段
+        try:
+            for k in self.order:
+                column = [item.get(k, MISSING) for item in items]
+                present = [value for value in column if value is not MISSING]
+                if not present:
+                    sparse.append(k)
+                    columns[k] = column
+                    continue
+                converted = self.converters[k](self.struct_cls.__mappings__[k], present)
+                if len(present) != len(column):
+                    sparse.append(k)
+                    converted = iter(converted)
+                    converted = [MISSING if value is MISSING else next(converted) for value in column]
+                columns[k] = converted
+        except BatchFailed:
+            return None
+        return self._builder(record, tuple(sparse))(file_reader, len(items), columns)
+
+    def _builder(self, record, sparse):
+        key = (record, sparse)
+        if key not in self._builders:
+            self._builders[key] = _generate_builder(self.struct_cls, self.order, record, sparse)
+        return self._builders[key]
+
+
+def _generate_builder(struct_cls, order, record, sparse=()):
+    """
+    生成按列组装元素的函数，字典中key的顺序、`_keys` 和 `Attributes` 与生成的 `Struct.__init__` 一致。
+    只有sparse中的字段需要逐个判断是否缺失。
+    """
+    attr = struct_cls.__attr__
+    target_cls = struct_cls.record_type() if record else struct_cls
+    namespace = {"cls": target_cls, "Attributes": Attributes, "MISSING": MISSING}
+    lines = ["def build(file_reader, n, columns):"]
+    lines += [f"    c_{k} = columns[{k!r}]" for k in order]
+    lines += [
+        "    new = cls.__new__",
+        "    result = []",
+        "    for i in range(n):",
+        "        obj = new(cls)",
+    ]
+    if record:
+        lines.append("        obj._projection = None")
+    else:
+        lines += [
+            "        attributes = Attributes()",
+            "        container = attributes.container",
+            "        _keys = []",
+            "        obj['_projection'] = None",
+            "        obj['attributes'] = attributes",
+            "        obj['file_reader'] = file_reader",
+            "        obj['_keys'] = _keys",
+        ]
+    for k in order:
+        if record:
+            body = [f"obj.{k} = c_{k}[i]"]
+        elif k in attr:
+            body = [f"container[{k!r}] = c_{k}[i]"]
+        else:
+            body = [f"obj[{k!r}] = c_{k}[i]", f"_keys.append({k!r})"]
+        if k in sparse:
+            lines.append(f"        if c_{k}[i] is not MISSING:")
+            lines += [f"            {line}" for line in body]
+        else:
+            lines += [f"        {line}" for line in body]
+    if not record:
+        lines += [
+            "        obj['$attributes'] = attributes",
+            "        _keys.append('$attributes')",
+        ]
+    lines += [
+        "        result.append(obj)",
+        "    return result",
+    ]
+    source = "\n".join(lines) + "\n"
+    exec(compile(source, f"<batch {struct_cls.__name__}>", "exec"), namespace)
+    return namespace["build"]
@@ -19,3 +19,10 @@ class Field:
         Validate value and raise ValidationError if necessary.
         """
         return value
+
+    def coerce(self, value):
+        """
+        Convert value like `validate` but skip the checks that do not change the result
+        (used by the `fast` and `trusted` validation levels, see `Struct`).
+        """
+        return self.validate(value)
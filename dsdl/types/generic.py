@@ -2,6 +2,9 @@ from ..exception import ValidationError
 from .field import Field
 from .struct import Struct
 
+# ListField中由Struct组成的元素数量不少于该值时才尝试批量校验（参考 `Struct.batch_validator`）
+BATCH_MIN_SIZE = 8
+
 
 class BoolField(Field):
     def validate(self, value):
@@ -35,20 +38,59 @@ class StrField(Field):
 
 
 class ListField(Field):
-    def __init__(self, ele_type, ordered=False, *args, **kwargs):
+    def __init__(self, ele_type, ordered=False, *args, as_array=False, **kwargs):
         self.ordered = ordered
         self.ele_type = ele_type
+        # 为True时校验结果为元素Field对应的数组类型（如BBoxField对应 `BBoxArray`），而不是元素组成的列表
+        self.as_array = as_array
         self.file_reader = None
+        if as_array and not hasattr(ele_type, "validate_array"):
+            raise ValueError(f"`as_array` is not supported for elements of type {ele_type}.")
         super().__init__(*args, **kwargs)
 
-    def validate(self, value):
+    def validate(self, value, projection=None, record=False):
         if hasattr(self.ele_type, "set_file_reader"):
             self.ele_type.set_file_reader(self.file_reader)
+        if self.as_array:
+            return self._validate_array(value, self.ele_type.validate)
         if isinstance(self.ele_type, Field):
-            value = [self.ele_type.validate(item) for item in value]
+            return [self.ele_type.validate(item) for item in value]
         elif isinstance(self.ele_type, Struct):
-            value = [self.ele_type.__class__(file_reader=self.file_reader, **item) for item in value]
+            return self._build_structs(value, projection, record, "strict")
         return value
 
+    def coerce(self, value, projection=None, record=False, validation="fast"):
+        if hasattr(self.ele_type, "set_file_reader"):
+            self.ele_type.set_file_reader(self.file_reader)
+        if self.as_array:
+            return self._validate_array(value, self.ele_type.coerce)
+        if isinstance(self.ele_type, Field):
+            return [self.ele_type.coerce(item) for item in value]
+        elif isinstance(self.ele_type, Struct):
+            return self._build_structs(value, projection, record, validation)
+        return value
+
+    def _validate_array(self, value, validate):
+        try:
+            return self.ele_type.validate_array(value)
+        except (TypeError, ValueError) as _:
+            pass
+        # 逐个元素校验，得到与原来相同的异常信息
+        return self.ele_type.stack([validate(item) for item in value])
+
+    def _build_structs(self, value, projection, record, validation):
+        ele_cls = self.ele_type.__class__
+        if projection is None and self.file_reader is not None and len(value) >= BATCH_MIN_SIZE:
+            batch_validator = ele_cls.batch_validator()
+            if batch_validator is not None:
+                result = batch_validator(value, self.file_reader, record)
+                if result is not None:
+                    return result
+        if record:
+            ele_cls = ele_cls.record_type()
+        file_reader = self.file_reader
+        return [ele_cls(file_reader=file_reader, projection=projection, validation=validation, **item)
+                for item in value]
+
     def set_file_reader(self, file_reader):
         self.file_reader = file_reader
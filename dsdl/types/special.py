@@ -1,10 +1,22 @@
 from datetime import date, datetime, time
+from itertools import accumulate, chain
+
+import numpy as np
 
 from ..exception import ValidationError
-from ..geometry import BBox, Coord2D, KeyPoints, Polygon, PolygonItem
+from ..geometry import BBox, BBoxArray, KeyPoints, Polygon, RlePolygon
+from ..geometry.rle import decode_counts_string
 from .field import Field
 
 
+# 可以直接在 `ClassDomain.get_label_lookup()` 中查找的类别值类型（其他类型如float需要按get_label的规则处理）
+LABEL_KEY_TYPES = (int, bool, str)
+# 可以直接批量转换为浮点数组的坐标类型，其他类型（如字符串形式的数字）逐个通过float转换
+NUMBER_TYPES = {int, float, bool}
+# RLE的游程保存为uint32
+RLE_COUNT_MAX = 0xffffffff
+
+
 def validate_list_of_number(value, size_limit, item_type):
     if type(value) is not list:
         raise ValidationError(f"expect list of num, got {value}")
@@ -16,15 +28,44 @@ def validate_list_of_number(value, size_limit, item_type):
         raise ValidationError(f"expect type of list item is float, got {value}")
 
 
+def number_array(points, size):
+    """
+    将由长度为size的list组成的列表一次性转换为 (len(points), size) 的float32数组，
+    存在其他类型或长度的值时抛出TypeError/ValueError，由调用方回退到逐个校验。
+    """
+    if points and (set(map(type, points)) != {list} or set(map(len, points)) != {size}):
+        raise ValueError(f"expect lists of {size} numbers")
+    values = list(chain.from_iterable(points))
+    if not set(map(type, values)) <= NUMBER_TYPES:
+        raise TypeError("expect int/float values")
+    return np.fromiter(values, dtype=np.float32, count=len(values)).reshape(-1, size)
+
+
+def coerce_list_of_number(value, size_limit, item_type):
+    # 长度不对时BBox等会得到错误的结果（或抛出TypeError），fast模式下同样需要检查
+    try:
+        if len(value) != size_limit:
+            raise ValidationError(f"expect size of list is {size_limit}, got {len(value)}")
+        return [item_type(item) for item in value]
+    except (TypeError, ValueError) as _:
+        raise ValidationError(f"expect type of list item is float, got {value}")
+
+
 class CoordField(Field):
     def validate(self, value):
         return validate_list_of_number(value, 2, float)
 
+    def coerce(self, value):
+        return coerce_list_of_number(value, 2, float)
+
 
 class Coord3DField(Field):
     def validate(self, value):
         return validate_list_of_number(value, 3, float)
 
+    def coerce(self, value):
+        return coerce_list_of_number(value, 3, float)
+
 
 class IntervalField(Field):
     def validate(self, value):
@@ -35,20 +76,80 @@ class IntervalField(Field):
             )
         return value
 
+    def coerce(self, value):
+        return coerce_list_of_number(value, 2, float)
+
 
 class BBoxField(Field):
     def validate(self, value):
         return BBox(*validate_list_of_number(value, 4, float))
 
+    def coerce(self, value):
+        return BBox(*coerce_list_of_number(value, 4, float))
+
+    def validate_array(self, value):
+        """
+        将由BBox组成的列表一次性校验为 `BBoxArray`（参考 `ListField` 的as_array），
+        存在无法批量转换的值时抛出TypeError/ValueError，由调用方回退到逐个校验。
+        """
+        if type(value) is not list:
+            raise TypeError("expect list of bbox")
+        return BBoxArray.from_array(number_array(value, 4))
+
+    def stack(self, items):
+        return BBoxArray.from_bboxes(items)
+
 
 class PolygonField(Field):
     def validate(self, value):
-        polygon_lst = []
-        for idx, points in enumerate(value):
-            for point in points:
-                validate_list_of_number(point, 2, float)
-            polygon_lst.append(PolygonItem(points))
-        return Polygon(polygon_lst)
+        try:
+            return _polygon_from_rings(value)
+        except (TypeError, ValueError) as _:
+            pass
+        # 逐个点校验，得到与原来相同的异常信息
+        rings = [[validate_list_of_number(point, 2, float) for point in points] for points in value]
+        return _polygon_from_rings(rings)
+
+
+def _polygon_from_rings(value):
+    """
+    将 [[[x, y], ...], ...] 形式的多边形一次性转换为连续的坐标数组，参考 `number_array`。
+    """
+    lengths = list(map(len, value))
+    coords = number_array(list(chain.from_iterable(value)), 2)
+    ring_offsets = np.array([0, *accumulate(lengths)], dtype=np.int64)
+    return Polygon.from_arrays(coords, ring_offsets)
+
+
+class RlePolygonField(Field):
+    """
+    COCO格式的RLE：{"size": [height, width], "counts": 游程长度的列表或压缩字符串}，参考 `RlePolygon`。
+    """
+
+    def validate(self, value):
+        rle = self.coerce(value)
+        height, width = rle.size
+        if height < 0 or width < 0:
+            raise ValidationError(f"expect non-negative size of rle, got {value['size']}")
+        if int(rle.counts.sum(dtype=np.int64)) != height * width:
+            raise ValidationError(f"expect sum of rle counts equal to {height} * {width}, got {value['counts']}")
+        return rle
+
+    def coerce(self, value):
+        if not isinstance(value, dict) or "size" not in value or "counts" not in value:
+            raise ValidationError(f"expect dict with 'size' and 'counts', got {value}")
+        size = validate_list_of_number(value["size"], 2, int)
+        counts = value["counts"]
+        if isinstance(counts, (str, bytes)):
+            try:
+                counts = decode_counts_string(counts)
+            except UnicodeDecodeError as _:
+                raise ValidationError(f"expect ascii rle counts string, got {counts}")
+        elif not (type(counts) is list and set(map(type, counts)) <= {int}):
+            raise ValidationError(f"expect list of int or str as rle counts, got {counts}")
+        if counts and (min(counts) < 0 or max(counts) > RLE_COUNT_MAX):
+            raise ValidationError(f"expect rle counts in [0, {RLE_COUNT_MAX}], got {value['counts']}")
+        return RlePolygon(counts, size)
 
 
 class KeypointField(Field):
@@ -58,15 +159,19 @@ class KeypointField(Field):
         self.dom = dom
 
     def validate(self, value):
+        if type(value) is list and len(value) == len(self.dom):
+            try:
+                return KeyPoints.from_array(number_array(value, 3), self.dom)
+            except (TypeError, ValueError) as _:
+                pass
+        # 逐个关键点校验，得到与原来相同的异常信息
         value = validate_list_of_number(value, len(self.dom), list)
-        keypoints = []
-        for class_ind, p in enumerate(value, start=1):
-            p = validate_list_of_number(p, 3, float)
-            label = self.dom.get_label(class_ind)
-            coord2d = Coord2D(x=p[0], y=p[1], visiable=int(p[2]), label=label)
-            keypoints.append(coord2d)
+        points = [validate_list_of_number(p, 3, float) for p in value]
+        return KeyPoints.from_array(np.array(points, dtype=np.float32).reshape(-1, 3), self.dom)
 
-        return KeyPoints(keypoints=keypoints, domain=self.dom)
+    def coerce(self, value):
+        points = [coerce_list_of_number(p, 3, float) for p in value]
+        return KeyPoints.from_array(np.array(points, dtype=np.float32).reshape(-1, 3), self.dom)
 
 
 class LabelField(Field):
@@ -75,6 +180,10 @@ class LabelField(Field):
         self.dom = dom
 
     def validate(self, value):
+        if value.__class__ in LABEL_KEY_TYPES:
+            label = self.dom.__lookup__.get(value)
+            if label is not None:
+                return label
         try:
             if isinstance(value, (int, str)):
                 return self.dom.get_label(value)
@@ -83,6 +192,13 @@ class LabelField(Field):
         except:
             raise RuntimeError(f"The label {value} is not valid.")
 
+    def coerce(self, value):
+        if value.__class__ in LABEL_KEY_TYPES:
+            label = self.dom.__lookup__.get(value)
+            if label is not None:
+                return label
+        return self.dom.get_label(value)
+
 
 class DateField(Field):
     def __init__(self, fmt: str = "", *args, **kwargs):
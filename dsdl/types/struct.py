@@ -1,4 +1,4 @@
-from ..exception import ValidationError
+from ..exception import FieldNotProjectedError, ValidationError
 from ..geometry import STRUCT, Attributes
 from ..warning import FieldNotFoundWarning
 from .field import Field
@@ -38,39 +38,219 @@ class StructMetaclass(type):
         attributes["__attr__"] = attr
         attributes["__optional__"] = optional
         attributes["__mappings__"] = mappings
+        if not RESERVED_NAMES & (mappings.keys() | attributes.keys()):
+            attributes["__init__"] = _generate_init(name, required, optional, attr)
 
         new_class = super_new(mcs, name, bases, attributes)
         STRUCT.register(name, new_class)
         return new_class
 
 
+# Struct.__init__中作为字典的key保存的内部状态，以及会改变字段赋值方式的方法。
+# Struct中定义了这些名字时不生成专用的__init__，仍使用通用的Struct.__init__。
+RESERVED_NAMES = {"_projection", "attributes", "file_reader", "_keys", "__init__", "__setattr__", "_set_field"}
+
+# 校验级别：
+#   strict  - 完整的校验（默认）；
+#   fast    - 只做类型转换（`Field.coerce`）和定长列表的长度检查，跳过取值范围等不改变结果的检查；
+#   trusted - 在fast的基础上不再检查缺失的必填字段，也不再为异常补充字段名，只应用于已经通过strict校验的数据。
+VALIDATION_LEVELS = ("strict", "fast", "trusted")
+
+
+def _generate_init(name, required, optional, attr, record_types=None, validation="strict"):
+    """
+    为Struct生成专用的__init__：展开字段的顺序、required/optional/attribute的划分以及各字段的校验调用，
+    行为（包括字典中key的顺序、警告和异常信息）与通用的 `Struct.__init__` 完全一致。指定projection时调用通用的实现。
+
+    record_types不为None时生成 `StructRecord` 的__init__：字段保存在__slots__中，由Struct组成的ListField的元素
+    使用record_types中对应的记录类型。
+
+    validation为strict时生成的__init__在其他校验级别下调用 `_level_init` 生成的对应实现。
+    """
+    record = record_types is not None
+    nested = {
+        k for k, field in list(required.items()) + list(optional.items())
+        if isinstance(getattr(field, "ele_type", None), Struct)
+    }
+    namespace = {
+        "Struct": Struct,
+        "Attributes": Attributes,
+        "ValidationError": ValidationError,
+        "FieldNotFoundWarning": FieldNotFoundWarning,
+        "_level_init": _level_init,
+    }
+    lines = [f"def __init__(self, file_reader=None, projection=None, validation={validation!r}, **kwargs):"]
+    if record:
+        lines += [
+            "    if projection is not None:",
+            "        return self._init_from_struct(self.__struct__(file_reader, projection, validation, **kwargs))",
+        ]
+    else:
+        lines += [
+            "    if projection is not None:",
+            "        return Struct.__init__(self, file_reader, projection, validation, **kwargs)",
+        ]
+    if validation == "strict":
+        lines += [
+            "    if validation != 'strict':",
+            "        return _level_init(type(self), validation)(self, file_reader, None, validation, **kwargs)",
+        ]
+    if record:
+        lines.append("    self._projection = None")
+    else:
+        lines += [
+            "    attributes = Attributes()",
+            "    _keys = []",
+            "    self['_projection'] = None",
+            "    self['attributes'] = attributes",
+            "    self['file_reader'] = file_reader",
+            "    self['_keys'] = _keys",
+        ]
+
+    def assign(k, field, indent):
+        ind = " " * indent
+        namespace[f"field_{k}"] = field
+        code = []
+        if hasattr(field, "set_file_reader"):
+            code.append(f"{ind}field_{k}.set_file_reader(file_reader)")
+        if validation == "strict":
+            value = f"field_{k}.validate(kwargs[{k!r}]{', record=True' if record and k in nested else ''})"
+        elif k in nested:
+            value = f"field_{k}.coerce(kwargs[{k!r}], record={record}, validation={validation!r})"
+        else:
+            value = f"field_{k}.coerce(kwargs[{k!r}])"
+        if record:
+            target = f"self.{k}"
+        else:
+            target = f"attributes[{k!r}]" if k in attr else f"self[{k!r}]"
+        if validation == "trusted":
+            code.append(f"{ind}{target} = {value}")
+        else:
+            code += [
+                f"{ind}try:",
+                f"{ind}    {target} = {value}",
+                f"{ind}except ValidationError as error:",
+                f"{ind}    raise ValidationError(f\"Field {k!r} validation error: {{error}}.\")",
+            ]
+        if k not in attr and not record:
+            code.append(f"{ind}_keys.append({k!r})")
+        return code
+
+    if required:
+        lines.append("    if file_reader is not None:")
+        for k, field in required.items():
+            lines.append(f"        if {k!r} in kwargs:")
+            lines += assign(k, field, 12)
+            if validation != "trusted":
+                lines.append("        else:")
+                lines.append(f"            FieldNotFoundWarning({f'Required field {k} is missing.'!r})")
+    for k, field in optional.items():
+        lines.append(f"    if {k!r} in kwargs:")
+        lines += assign(k, field, 8)
+    if not record:
+        lines += [
+            "    self['$attributes'] = attributes",
+            "    _keys.append('$attributes')",
+        ]
+    source = "\n".join(lines) + "\n"
+    filename = f"<struct {name}>" if validation == "strict" else f"<struct {name} ({validation})>"
+    exec(compile(source, filename, "exec"), namespace)
+    init = namespace["__init__"]
+    init.__qualname__ = f"{name}.__init__"
+    init.__source__ = source
+    return init
+
+
+def _level_init(cls, validation):
+    """
+    返回Struct（或StructRecord）类型cls在fast/trusted校验级别下的__init__，在第一次使用时生成。
+    """
+    inits = cls.__dict__.get("__level_inits__")
+    if inits is None:
+        inits = {}
+        cls.__level_inits__ = inits
+    if validation not in inits:
+        if validation not in VALIDATION_LEVELS:
+            raise ValueError(f"Unknown validation level '{validation}', expect one of {VALIDATION_LEVELS}.")
+        struct_cls = cls.__struct__ if issubclass(cls, StructRecord) else cls
+        inits[validation] = _generate_init(cls.__name__, struct_cls.__required__, struct_cls.__optional__,
+                                           struct_cls.__attr__, getattr(cls, "__record_types__", None), validation)
+    return inits[validation]
+
+
 class Struct(dict, metaclass=StructMetaclass):
-    def __init__(self, file_reader=None, **kwargs):
+    def __init__(self, file_reader=None, projection=None, validation="strict", **kwargs):
 
         super().__init__()
+        if validation not in VALIDATION_LEVELS:
+            raise ValueError(f"Unknown validation level '{validation}', expect one of {VALIDATION_LEVELS}.")
+        if projection is not None and not isinstance(projection, dict):
+            projection = self.compile_projection(projection)
+        self._projection = projection
         self.attributes = Attributes()
         self.file_reader = file_reader
         self._keys = []
         if file_reader is not None:  # 说明是在赋值
             for k in self.__required__:
+                if projection is not None and k not in projection:
+                    continue
                 if k not in kwargs:
-                    FieldNotFoundWarning(f"Required field {k} is missing.")
+                    if validation != "trusted":
+                        FieldNotFoundWarning(f"Required field {k} is missing.")
                     continue
-                setattr(self, k, kwargs[k])
+                self._set_field(k, kwargs[k], None if projection is None else projection[k], validation)
                 if k not in self.__attr__:
                     self._keys.append(k)
         for k in self.__optional__:
+            if projection is not None and k not in projection:
+                continue
             if k in kwargs:
-                setattr(self, k, kwargs[k])
+                self._set_field(k, kwargs[k], None if projection is None else projection[k], validation)
                 if k not in self.__attr__:
                     self._keys.append(k)
 
         self["$attributes"] = self.attributes
         self._keys.append("$attributes")
 
+    @classmethod
+    def compile_projection(cls, fields):
+        """
+        Turn field paths like ["image", "objects/label"] into a nested dict {"image": None, "objects": {"label": None}},
+        where None means the whole field is kept.
+        """
+        projection = {}
+        for path in fields:
+            name, _, rest = path.partition("/")
+            if name not in cls.__mappings__:
+                raise ValueError(f"Field '{name}' is not defined in struct '{cls.__name__}'.")
+            if not rest:
+                projection[name] = None
+                continue
+            ele_type = getattr(cls.__mappings__[name], "ele_type", None)
+            if not isinstance(ele_type, Struct):
+                raise ValueError(f"Field '{name}' of struct '{cls.__name__}' has no sub-fields, got '{path}'.")
+            if name in projection and projection[name] is None:
+                continue
+            sub_fields = projection.setdefault(name, [])
+            sub_fields.append(rest)
+        for name, sub_fields in projection.items():
+            if sub_fields is not None:
+                projection[name] = cls.__mappings__[name].ele_type.compile_projection(sub_fields)
+        return projection
+
+    def __missing__(self, key):
+        projection = dict.get(self, "_projection")
+        if projection is not None and key in self.__mappings__ and key not in projection:
+            raise FieldNotProjectedError(
+                f"Field '{key}' of struct '{self.__class__.__name__}' is not in the projection {list(projection)}."
+            )
+        raise KeyError(key)
+
     def __getattr__(self, key):
         try:
             return self[key]
+        except FieldNotProjectedError as error:
+            raise AttributeError(str(error))
         except KeyError:
             raise AttributeError(r"'Model' object has no attribute '%s'" % key)
 
@@ -78,19 +258,172 @@ class Struct(dict, metaclass=StructMetaclass):
         if key not in self.__mappings__:
             self[key] = value
             return
+        self._set_field(key, value)
 
-        if hasattr(self.__mappings__[key], "set_file_reader"):
-            self.__mappings__[key].set_file_reader(self.file_reader)
+    def _set_field(self, key, value, projection=None, validation="strict"):
+        field = self.__mappings__[key]
+        if hasattr(field, "set_file_reader"):
+            field.set_file_reader(self.file_reader)
         try:
+            if validation != "strict":
+                if hasattr(field, "ele_type"):
+                    value = field.coerce(value, projection=projection, validation=validation)
+                else:
+                    value = field.coerce(value)
+            elif projection is not None:
+                value = field.validate(value, projection=projection)
+            else:
+                value = field.validate(value)
             if key in self.__attr__:
-                self.attributes[key] = self.__mappings__[key].validate(value)
+                self.attributes[key] = value
                 return
-            self[key] = self.__mappings__[key].validate(value)
+            self[key] = value
         except ValidationError as error:
             raise ValidationError(f"Field '{key}' validation error: {error}.")
 
     def get_mapping(self):
         return self.__mappings__
 
+    def get_projection(self):
+        return dict.get(self, "_projection")
+
     def keys(self):
         return tuple(self._keys)
+
+    @classmethod
+    def record_type(cls):
+        """
+        返回该Struct对应的紧凑记录类型（`StructRecord` 的子类），在第一次调用时生成。
+        """
+        record_cls = cls.__dict__.get("__record_type__")
+        if record_cls is None:
+            record_cls = _generate_record_type(cls)
+            cls.__record_type__ = record_cls
+        return record_cls
+
+    @classmethod
+    def batch_validator(cls):
+        """
+        返回批量校验由该Struct组成的ListField元素的 `BatchValidator`，Struct中存在无法批量校验的字段时返回None。
+        """
+        if "__batch_validator__" not in cls.__dict__:
+            from .batch import BatchValidator
+            cls.__batch_validator__ = BatchValidator(cls) if BatchValidator.supports(cls) else None
+        return cls.__batch_validator__
+
+
+class StructRecord:
+    """
+    Struct的紧凑表示：字段直接保存在__slots__中，不再为每个对象创建字典、`Attributes` 和key列表，
+    保留 `getattr`、`keys()`、`get_mapping()` 等接口，`Dataset._parse_struct` 和 `StructTable` 可以像处理Struct一样处理它。
+    通过 `Struct.record_type()` 获取具体Struct的记录类型，构造参数与对应的Struct相同。
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_struct(cls, struct):
+        record = cls.__new__(cls)
+        record._init_from_struct(struct)
+        return record
+
+    def _init_from_struct(self, struct):
+        self._projection = struct.get_projection()
+        for k in struct.keys():
+            if k == "$attributes":
+                continue
+            value = struct[k]
+            if k in self.__record_types__:
+                value = [self.__record_types__[k].from_struct(item) for item in value]
+            setattr(self, k, value)
+        for k in struct.attributes.keys():
+            setattr(self, k, struct.attributes[k])
+
+    def _has(self, key):
+        try:
+            object.__getattribute__(self, key)
+        except AttributeError:
+            return False
+        return True
+
+    def _missing(self, key):
+        projection = self.get_projection()
+        if projection is not None and key in self.__mappings__ and key not in projection:
+            raise FieldNotProjectedError(
+                f"Field '{key}' of struct '{self.__struct__.__name__}' is not in the projection {list(projection)}."
+            )
+        raise KeyError(key)
+
+    def __getattr__(self, key):
+        if key == "$attributes":
+            return self.attributes
+        try:
+            self._missing(key)
+        except FieldNotProjectedError as error:
+            raise AttributeError(str(error))
+        except KeyError:
+            raise AttributeError(r"'Model' object has no attribute '%s'" % key)
+
+    def __getitem__(self, key):
+        if key == "$attributes":
+            return self.attributes
+        if key in self.__mappings__ and key not in self.__attr__ and self._has(key):
+            return object.__getattribute__(self, key)
+        self._missing(key)
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    @property
+    def attributes(self):
+        attributes = Attributes()
+        for k in self.__attr__:
+            if self._has(k):
+                attributes[k] = object.__getattribute__(self, k)
+        return attributes
+
+    def get_mapping(self):
+        return self.__mappings__
+
+    def get_projection(self):
+        return self._projection if self._has("_projection") else None
+
+    def keys(self):
+        return tuple(k for k in self.__key_order__ if self._has(k)) + ("$attributes",)
+
+    def __reduce__(self):
+        state = {k: object.__getattribute__(self, k) for k in self.__slots__ if self._has(k)}
+        return _rebuild_record, (self.__struct__.__name__, state)
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={object.__getattribute__(self, k)!r}" for k in self.__mappings__ if self._has(k))
+        return f"{self.__class__.__name__}({fields})"
+
+
+def _generate_record_type(struct_cls):
+    mappings = struct_cls.__mappings__
+    conflicts = set(mappings) & set(dir(StructRecord))
+    if conflicts:
+        raise ValueError(f"Fields {sorted(conflicts)} of struct '{struct_cls.__name__}' conflict with StructRecord.")
+    record_types = {
+        k: field.ele_type.__class__.record_type()
+        for k, field in mappings.items() if isinstance(getattr(field, "ele_type", None), Struct)
+    }
+    name = f"{struct_cls.__name__}Record"
+    required, optional, attr = struct_cls.__required__, struct_cls.__optional__, struct_cls.__attr__
+    return type(name, (StructRecord,), {
+        "__slots__": tuple(mappings) + ("_projection",),
+        "__struct__": struct_cls,
+        "__mappings__": mappings,
+        "__attr__": attr,
+        "__record_types__": record_types,
+        "__key_order__": tuple(k for k in list(required) + list(optional) if k not in attr),
+        "__init__": _generate_init(name, required, optional, attr, record_types),
+    })
+
+
+def _rebuild_record(struct_name, state):
+    record_cls = STRUCT.get(struct_name).record_type()
+    record = record_cls.__new__(record_cls)
+    for k, v in state.items():
+        setattr(record, k, v)
+    return record
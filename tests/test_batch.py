@@ -0,0 +1,174 @@
+import copy
+import random
+
+import pytest
+
+import dsdl.types.generic as generic
+from dsdl.dataset.profile import FieldProfiler, field_paths
+from dsdl.exception import ValidationError
+from dsdl.geometry import ClassDomain, Label
+from dsdl.objectio import LocalFileReader
+from dsdl.types import *
+
+
+class BatchTestDom(ClassDomain):
+    Classes = [
+        Label("apple"),
+        Label("hammer"),
+        Label("person"),
+    ]
+
+
+class BatchTestEntry(Struct):
+    bbox = BBoxField()
+    label = LabelField(dom=BatchTestDom)
+    iscrowd = BoolField(is_attr=True)
+    area = NumField(is_attr=True, optional=True)
+    idx = IntField(optional=True)
+    point = CoordField(optional=True)
+    interval = IntervalField(optional=True)
+
+
+class BatchTestImage(Struct):
+    objects = ListField(ele_type=BatchTestEntry())
+
+
+file_reader = LocalFileReader(working_dir="")
+
+
+def make_items(n=100, seed=0):
+    r = random.Random(seed)
+    items = []
+    for i in range(n):
+        item = {"bbox": [r.random() * 100, r.randint(0, 5), 3, 4.5],
+                "label": r.choice(["apple", "hammer", 3, 1]),
+                "iscrowd": r.choice([True, False, 0, 1, 1.0])}
+        if i % 3:
+            item["area"] = r.choice([1, 2.5, True])
+        if i % 4:
+            item["idx"] = r.choice([1, 2.9, -3.7, False])
+        if i % 5:
+            item["point"] = [1, 2.0]
+        if i % 7:
+            item["interval"] = [1, 2]
+        items.append(item)
+    return items
+
+
+def dump(value):
+    if isinstance(value, Struct):
+        return [(k, dump(v)) for k, v in dict.items(value) if k != "file_reader"] + [list(value.keys())]
+    if isinstance(value, StructRecord):
+        return [(k, dump(getattr(value, k))) for k in value.__slots__ if value._has(k)] + [list(value.keys())]
+    if isinstance(value, list):
+        return [dump(v) for v in value]
+    return type(value).__name__, repr(value)
+
+
+def build(items, batch, record=False, validation="strict"):
+    saved = generic.BATCH_MIN_SIZE
+    generic.BATCH_MIN_SIZE = 8 if batch else 10 ** 9
+    try:
+        struct_cls = BatchTestImage.record_type() if record else BatchTestImage
+        return struct_cls(file_reader=file_reader, validation=validation, objects=items)
+    finally:
+        generic.BATCH_MIN_SIZE = saved
+
+
+def build_error(items, batch):
+    with pytest.raises(RuntimeError) as info:
+        build(items, batch)
+    return type(info.value), str(info.value)
+
+
+@pytest.mark.parametrize("record", [False, True])
+def test_batch_equals_per_element(record):
+    items = make_items()
+    assert dump(build(items, True, record)) == dump(build(items, False, record))
+
+
+@pytest.mark.parametrize("mutate", [
+    lambda items: items[57].__setitem__("bbox", [1, 2]),
+    lambda items: items[12].__setitem__("label", "zebra"),
+    lambda items: items[3].__setitem__("iscrowd", 2),
+    lambda items: items[20].__setitem__("interval", [3, 1]),
+    lambda items: items[9].__setitem__("idx", "x"),
+])
+def test_batch_errors_equal_per_element(mutate):
+    items = make_items()
+    mutate(items)
+    error = build_error(items, True)
+    assert error == build_error(items, False)
+    assert "element" not in error[1]
+
+
+def test_batch_keeps_large_int_precision():
+    items = make_items(20)
+    for item in items:
+        item["idx"] = 2.5
+    items[0]["idx"] = 2 ** 53 + 1
+    expected = build(copy.deepcopy(items), False)
+    result = build(items, True)
+    assert result.objects[0].idx == 2 ** 53 + 1
+    assert dump(result) == dump(expected)
+
+
+@pytest.mark.parametrize("validation", ["fast", "trusted"])
+@pytest.mark.parametrize("batch", [False, True])
+def test_validation_levels_agree(validation, batch):
+    items = make_items()
+    assert dump(build(copy.deepcopy(items), batch, validation=validation)) == dump(build(items, False))
+
+
+@pytest.mark.parametrize("validation", ["strict", "fast", "trusted"])
+@pytest.mark.parametrize("mutate", [
+    lambda items: items[57].__setitem__("bbox", [1, 2, 3]),
+    lambda items: items[3].__setitem__("iscrowd", "yes"),
+    lambda items: items[5].__setitem__("point", [1, 2, 3]),
+])
+def test_fast_validation_checks_values(validation, mutate):
+    items = make_items()
+    mutate(items)
+    for batch in (False, True):
+        with pytest.raises(ValidationError):
+            build(copy.deepcopy(items), batch, validation=validation)
+
+
+def patched_methods():
+    patched = [(path, name) for path, field in field_paths(BatchTestImage)
+               for name in ("validate", "coerce") if name in vars(field)]
+    converters = BatchTestEntry.batch_validator().converters
+    return patched + [k for k, converter in converters.items() if hasattr(converter, "__wrapped__")]
+
+
+@pytest.mark.parametrize("batch", [False, True])
+def test_field_profiler_restores_methods(batch):
+    items = make_items(20)
+    first, second = FieldProfiler(BatchTestImage), FieldProfiler(BatchTestImage)
+    with first:
+        with first:
+            build(copy.deepcopy(items), batch)
+    assert first.stats["objects"].time > 0 and first.stats["objects/bbox"].time > 0
+    assert patched_methods() == []
+
+    # 两个profiler同时统计共享的Field，退出的顺序与进入的顺序相同
+    first.__enter__()
+    second.__enter__()
+    build(copy.deepcopy(items), batch)
+    first.__exit__(None, None, None)
+    time = first.stats["objects/bbox"].time
+    build(copy.deepcopy(items), batch)
+    assert first.stats["objects/bbox"].time == time and second.stats["objects/bbox"].time > 0
+    assert patched_methods() != []
+    second.__exit__(None, None, None)
+    assert patched_methods() == []
+
+    items[3]["bbox"] = [1, 2]
+    with pytest.raises(ValidationError):
+        with first:
+            build(items, batch)
+    assert patched_methods() == []
+    with pytest.raises(ValidationError):
+        with first, second:
+            build(items, batch)
+    assert patched_methods() == []
@@ -0,0 +1,141 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import dsdl.geometry.box_ops as box_ops
+from dsdl.exception import ValidationError
+from dsdl.geometry import BBox, BBoxArray, batched_nms, box_iou, match_boxes, nms
+from dsdl.types import BBoxField, ListField
+
+
+def random_boxes(rng, n, size=300):
+    xy = rng.random((n, 2)) * size
+    wh = rng.random((n, 2)) * 80 + 1
+    return BBoxArray(np.concatenate([xy, wh], 1))
+
+
+def brute_force_iou(boxes1, boxes2):
+    result = np.zeros((len(boxes1), len(boxes2)))
+    for i, a in enumerate(boxes1):
+        for j, b in enumerate(boxes2):
+            w = max(0, min(a.xmax, b.xmax) - max(a.xmin, b.xmin))
+            h = max(0, min(a.ymax, b.ymax) - max(a.ymin, b.ymin))
+            union = a.area + b.area - w * h
+            result[i, j] = w * h / union if union > 0 else 0
+    return result
+
+
+def brute_force_nms(xyxy, scores, iou_threshold):
+    keep = []
+    for i in sorted(range(len(scores)), key=lambda i: -scores[i]):
+        if all(box_iou(xyxy[i:i + 1], xyxy[k:k + 1])[0, 0] <= iou_threshold for k in keep):
+            keep.append(i)
+    return keep
+
+
+def test_box_iou():
+    rng = np.random.default_rng(0)
+    a, b = random_boxes(rng, 30), random_boxes(rng, 40)
+    expected = brute_force_iou(list(a), list(b))
+    assert np.allclose(box_iou(a, b), expected, atol=1e-5)
+    assert np.allclose(box_iou(list(a), b.xyxy, chunk_elements=100), expected, atol=1e-5)
+    assert box_iou([], b).shape == (0, 40)
+    assert box_iou([BBox(0, 0, 0, 0)], [BBox(0, 0, 0, 0)]).tolist() == [[0]]
+
+
+@pytest.mark.parametrize("block", [16, 256])
+def test_nms(monkeypatch, block):
+    monkeypatch.setattr(box_ops, "NMS_BLOCK", block)
+    rng = np.random.default_rng(1)
+    boxes, scores = random_boxes(rng, 300), rng.random(300)
+    assert list(nms(boxes, scores, 0.3)) == brute_force_nms(boxes.xyxy, scores, 0.3)
+    assert len(nms([], [], 0.5)) == 0
+
+
+def test_batched_nms():
+    rng = np.random.default_rng(2)
+    boxes, scores, groups = random_boxes(rng, 300), rng.random(300), rng.integers(0, 4, 300)
+    expected = []
+    for group in range(4):
+        ids = np.flatnonzero(groups == group)
+        expected.extend(ids[brute_force_nms(boxes.xyxy[ids], scores[ids], 0.3)])
+    expected.sort(key=lambda i: -scores[i])
+    assert list(batched_nms(boxes, scores, groups, 0.3)) == expected
+    assert len(batched_nms([], [], [], 0.5)) == 0
+
+
+def test_linear_sum_assignment_fallback():
+    rng = np.random.default_rng(3)
+    for _ in range(30):
+        n, m = rng.integers(1, 6, 2).tolist()
+        cost = rng.random((n, m))
+        if n <= m:
+            rows, cols = box_ops._linear_sum_assignment(cost)
+            best = min(cost[range(n), list(perm)].sum() for perm in itertools.permutations(range(m), n))
+        else:
+            cols, rows = box_ops._linear_sum_assignment(cost.T)
+            best = min(cost[list(perm), range(m)].sum() for perm in itertools.permutations(range(n), m))
+        assert len(set(rows.tolist())) == len(rows) == min(n, m)
+        assert abs(cost[rows, cols].sum() - best) < 1e-9
+
+
+def test_match_boxes(monkeypatch):
+    # 不依赖scipy：使用NumPy实现的匈牙利算法
+    monkeypatch.setattr(box_ops, "linear_sum_assignment", None)
+    rng = np.random.default_rng(4)
+    for _ in range(10):
+        gt = random_boxes(rng, 40, 150)
+        noisy = gt.array[:30] + rng.normal(0, 6, (30, 4)).astype(np.float32)
+        pred = BBoxArray(np.concatenate([noisy, random_boxes(rng, 15, 150).array]))
+        gt_ids, pred_ids, ious = match_boxes(gt, pred, 0.3, method="bipartite")
+        assert len(set(gt_ids.tolist())) == len(gt_ids) and len(set(pred_ids.tolist())) == len(pred_ids)
+        assert (ious >= 0.3).all()
+        weight = box_iou(gt, pred)
+        weight = np.where(weight >= 0.3, weight, 0).astype(np.float64)
+        rows, cols = box_ops._linear_sum_assignment(-weight)
+        assert abs(ious.sum() - weight[rows, cols].sum()) < 1e-4
+
+        gt_ids, pred_ids, ious = match_boxes(gt, pred, 0.3)
+        assert len(set(pred_ids.tolist())) == len(pred_ids) and (ious >= 0.3).all()
+    with pytest.raises(ValueError):
+        match_boxes(gt, pred, method="unknown")
+
+
+def test_bbox_array_round_trip():
+    data = np.array([[1, 2, 3, 4], [0.5, 0, 10, 2.25]], dtype=np.float32)
+    boxes = BBoxArray.from_array(data)
+    assert boxes.array is data and len(boxes) == 2
+    assert boxes.xyxy.tolist() == [[1, 2, 4, 6], [0.5, 0, 10.5, 2.25]] and boxes.area.tolist() == [12, 22.5]
+    assert BBoxArray.from_xyxy(boxes.xyxy).array.tolist() == data.tolist()
+    assert BBoxArray.from_bboxes(list(boxes)).array.tolist() == data.tolist()
+    assert BBoxArray(data.tolist()).array.dtype == np.float32
+    bbox = boxes[1]
+    assert isinstance(bbox, BBox) and np.shares_memory(bbox._data, data)
+    assert bbox.xywh == BBox(0.5, 0, 10, 2.25).xywh and bbox.xyxy == [0.5, 0, 10.5, 2.25]
+    assert BBox.from_array(data[0]).area == 12
+    assert boxes[[1, 0]].array.tolist() == data[::-1].tolist() and len(boxes[boxes.area > 20]) == 1
+    assert boxes.scale(2, 0.5).array.tolist() == [[2, 1, 6, 2], [1, 0, 20, 1.125]]
+    assert boxes.clip(5, 5).xyxy.tolist() == [[1, 2, 4, 5], [0.5, 0, 5, 2.25]]
+    assert len(BBoxArray.from_array(np.zeros((0, 4), np.float32))) == 0
+
+
+def test_bbox_array_invalid_input():
+    for array in (np.zeros((2, 3), np.float32), np.zeros(4, np.float32), np.zeros((2, 4)), np.zeros((2, 4), int)):
+        with pytest.raises(ValueError):
+            BBoxArray.from_array(array)
+    for array in (np.zeros(3), np.zeros((1, 4))):
+        with pytest.raises(ValueError):
+            BBox.from_array(array)
+    with pytest.raises(ValueError):
+        BBoxArray([1, 2, 3])
+
+
+def test_list_field_as_array():
+    field = ListField(ele_type=BBoxField(), as_array=True)
+    for validate in (field.validate, field.coerce):
+        assert validate([[1, 2, 3, 4], [0, 0.5, 1, 1]]).array.tolist() == [[1, 2, 3, 4], [0, 0.5, 1, 1]]
+        # 无法批量转换时逐个校验
+        assert validate([["1", 2, 3, 4]]).array.tolist() == [[1, 2, 3, 4]]
+        with pytest.raises(ValidationError):
+            validate([[1, 2, 3]])
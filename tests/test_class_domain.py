@@ -0,0 +1,215 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from dsdl.geometry import ClassDomain, Label
+from dsdl.objectio import LocalFileReader
+
+
+class HierarchyRootDom(ClassDomain):
+    Classes = [
+        Label("food"),
+        Label("tool"),
+    ]
+
+
+class HierarchyMiddleDom(ClassDomain):
+    Classes = [
+        Label("fruit", supercategories=[HierarchyRootDom.get_label("food")]),
+        Label("sports tool", supercategories=[HierarchyRootDom.get_label("tool")]),
+        Label("snack", supercategories=[HierarchyRootDom.get_label("food")]),
+    ]
+
+
+class HierarchyLeafDom(ClassDomain):
+    Classes = [
+        Label("airplane", supercategories=[HierarchyMiddleDom.get_label("sports tool")]),
+        Label("apple", supercategories=[HierarchyMiddleDom.get_label("fruit")]),
+        Label("backpack"),
+        Label("banana", supercategories=[HierarchyMiddleDom.get_label("fruit"), HierarchyRootDom.get_label("food")]),
+        Label("chips", supercategories=[HierarchyMiddleDom.get_label("snack")]),
+    ]
+
+
+def brute_force_ancestors(label):
+    # 广度优先遍历supercategories，按registry_name去重
+    result, seen, queue = [], set(), list(label.supercategories)
+    while queue:
+        parent = queue.pop(0)
+        if parent.registry_name in seen:
+            continue
+        seen.add(parent.registry_name)
+        result.append(parent)
+        queue.extend(parent.supercategories)
+    return result
+
+
+def test_label_ids():
+    assert [label.label_id for label in HierarchyLeafDom.get_labels()] == [1, 2, 3, 4, 5]
+    assert HierarchyLeafDom.get_label(4) is HierarchyLeafDom.get_label("banana")
+
+
+def test_ancestor_closure():
+    food, tool = HierarchyRootDom.get_label("food"), HierarchyRootDom.get_label("tool")
+    for label in HierarchyLeafDom.get_labels():
+        expected = brute_force_ancestors(label)
+        assert list(label.ancestors) == expected
+        assert HierarchyLeafDom.get_ancestors(label.name) == expected
+        assert HierarchyLeafDom.get_ancestors(label.label_id) == expected
+        for other in (food, tool, *HierarchyMiddleDom.get_labels()):
+            assert label.is_a(other) == (other in expected)
+        assert label.is_a(label)
+    assert HierarchyLeafDom.get_ancestors("backpack") == []
+
+
+def test_vectorized_hierarchy_queries():
+    food = HierarchyRootDom.get_label("food")
+    labels = HierarchyLeafDom.get_labels()
+    assert list(HierarchyLeafDom.get_descendant_ids(food)) == [l.label_id for l in labels if l.is_a(food)]
+    ids = np.array([[1, 2], [3, 5]])
+    assert HierarchyLeafDom.is_a(ids, food).tolist() == [[False, True], [False, True]]
+    assert HierarchyLeafDom.is_a([1, 2, 3], HierarchyLeafDom.get_label("backpack")).tolist() == [False, False, True]
+    # 0表示没有类别，没有祖先属于目标类别域的类别映射为0
+    assert HierarchyLeafDom.roll_up([0, 1, 2, 3, 4, 5], HierarchyRootDom).tolist() == [0, 2, 1, 0, 1, 1]
+    assert HierarchyLeafDom.roll_up([1, 2, 5], "HierarchyMiddleDom").tolist() == [2, 1, 3]
+    assert HierarchyLeafDom.roll_up([1, 2], HierarchyLeafDom).tolist() == [1, 2]
+    with pytest.raises(KeyError):
+        HierarchyRootDom.roll_up([1], HierarchyLeafDom)
+
+
+def test_label_equality_and_pickling():
+    food, tool = HierarchyRootDom.get_label("food"), HierarchyRootDom.get_label("tool")
+    apple = HierarchyLeafDom.get_label("apple")
+    assert apple == Label("apple", domain_name="HierarchyLeafDom")
+    assert apple != Label("apple", domain_name="Other")
+    assert apple != HierarchyLeafDom.get_label("banana")
+    assert (apple == "apple") is False
+    assert Label("x", [food]) == Label("x", [food]) and Label("x", [food]) != Label("x", [tool])
+    assert len({apple, Label("apple", domain_name="HierarchyLeafDom"), food}) == 2
+    assert pickle.loads(pickle.dumps(apple)) is apple
+    loose = pickle.loads(pickle.dumps(Label("x", [food])))
+    assert loose.name == "x" and loose.supercategories[0] is food
+
+
+NAMES = [f"n{i:05d}" for i in range(2000)] + ["café ☕", "quote \"x\" and 'y'"]
+
+
+class CompactDom(ClassDomain):
+    Names = NAMES
+
+
+def test_compact_domain_lookups():
+    assert len(CompactDom) == len(NAMES)
+    assert CompactDom.get_label_names() == NAMES
+    label = CompactDom.get_label(NAMES[7])
+    assert label.label_id == 8 and label.domain_name == "CompactDom"
+    assert CompactDom.get_label(8) is label and CompactDom.get_labels()[7] is label
+    assert CompactDom.get_label("café ☕").label_id == 2001
+    assert NAMES[9] in CompactDom and "nope" not in CompactDom
+    assert CompactDom.get_label_ids(np.array(NAMES[100:110])).tolist() == list(range(101, 111))
+    labels = CompactDom.get_labels_by_ids([0, 3, 101])
+    assert labels[0] is None and [l.name for l in labels[1:]] == [NAMES[2], NAMES[100]]
+    assert CompactDom.get_label_array()[8] is label
+    assert CompactDom.get_color_lut().shape == (len(NAMES) + 1, 3)
+    assert CompactDom.get_ancestors(3) == [] and not CompactDom.is_a([1, 2], label).any()
+    with pytest.raises(KeyError):
+        CompactDom.get_label("nope")
+    with pytest.raises(IndexError):
+        CompactDom.get_label(len(NAMES) + 1)
+
+
+def test_compact_domain_equality_and_pickling():
+    label = CompactDom.get_label(NAMES[42])
+    assert label == Label(NAMES[42], domain_name="CompactDom")
+    assert label != CompactDom.get_label(NAMES[43])
+    assert hash(label) == hash(Label(NAMES[42], domain_name="CompactDom"))
+    assert pickle.loads(pickle.dumps(label)) is label
+    # 反序列化时尚未创建的类别同样通过类别域创建
+    assert pickle.loads(pickle.dumps(Label(NAMES[1500], domain_name="CompactDom"))) is CompactDom.get_label(1501)
+
+
+def test_compact_domain_duplicate_names():
+    class DuplicateNamesDom(ClassDomain):
+        Names = np.array(["a", "b", "a"])
+
+    assert DuplicateNamesDom.get_label("a").label_id == 3
+    assert DuplicateNamesDom.get_label(1).name == "a"
+    assert DuplicateNamesDom.get_label_ids(["a", "b"]).tolist() == [3, 2]
+
+
+def test_parser_generates_compact_domain(tmp_path, monkeypatch):
+    import dsdl.parser.parser as parser_module
+    from dsdl.parser import dsdl_parse
+
+    monkeypatch.setattr(parser_module, "COMPACT_CLASS_DOMAIN_SIZE", 3)
+    dsdl_yaml = tmp_path / "dataset.yaml"
+    dsdl_yaml.write_text("\n".join([
+        '$dsdl-version: "0.5.0"',
+        "meta:",
+        "  name: compact",
+        "defs:",
+        "  ParsedCompactDom:",
+        "    $def: class_domain",
+        "    classes:",
+        *[f"      - {name}" for name in ("cat", "dog", "café", "it's")],
+        "  ParsedCompactSample:",
+        "    $def: struct",
+        "    $fields:",
+        "      label: Label[dom=ParsedCompactDom]",
+        "data:",
+        "  sample-type: ParsedCompactSample",
+        "  sample-path: $local",
+        "  samples: []",
+    ]) + "\n")
+    source = dsdl_parse(str(dsdl_yaml), str(tmp_path))
+    assert "Names = (" in source
+    namespace = {}
+    exec(source, namespace)
+    dom = namespace["ParsedCompactDom"]
+    assert dom.get_label_names() == ["cat", "dog", "café", "it's"]
+    sample = namespace["ParsedCompactSample"](label="it's", file_reader=LocalFileReader(working_dir=""))
+    assert sample.label is dom.get_label(4)
+
+
+def test_compact_domain_creates_labels_lazily():
+    class LazyNamesDom(ClassDomain):
+        Names = [f"lazy{i}" for i in range(5000)]
+
+    assert "__label_array__" not in LazyNamesDom.__dict__
+    assert len(LazyNamesDom.__lookup__) == 0
+    label = LazyNamesDom.get_label("lazy10")
+    assert LazyNamesDom.__lookup__.get(11) is label and LazyNamesDom.__lookup__.get("lazy10") is label
+    assert len(LazyNamesDom.__lookup__) == 2
+
+
+@pytest.mark.parametrize("dom", [HierarchyLeafDom, CompactDom])
+def test_bulk_lookup_round_trip(dom):
+    labels = list(dom.get_labels())
+    names = [label.name for label in labels]
+    ids = np.arange(len(labels), 0, -1).reshape(-1, 1)
+    assert dom.get_label_ids(names).tolist() == list(range(1, len(labels) + 1))
+    assert dom.get_label_ids(np.array(names)).dtype == np.int32
+    assert dom.get_label_ids(ids).tolist() == ids.tolist()
+    assert dom.get_label_ids([names[1], 1, 3]).tolist() == [2, 1, 3]
+    assert dom.get_label_ids([]).tolist() == [] and dom.get_label_ids(np.array([], dtype=str)).tolist() == []
+    result = dom.get_labels_by_ids(ids)
+    assert result.shape == ids.shape and all(result[i, 0] is labels[id_ - 1] for i, id_ in enumerate(ids[:, 0]))
+    assert dom.get_labels_by_ids(dom.get_label_ids(names)).tolist() == labels
+    assert dom.get_labels_by_ids([0]).tolist() == [None]
+
+
+@pytest.mark.parametrize("dom", [HierarchyLeafDom, CompactDom])
+def test_bulk_lookup_invalid_input(dom):
+    num = len(dom.get_labels())
+    for values in (["nope"], np.array(["nope"]), [dom.get_labels()[0].name, "nope"]):
+        with pytest.raises(KeyError):
+            dom.get_label_ids(values)
+    for values in ([0], [num + 1], np.array([-1]), [1, num + 1]):
+        with pytest.raises(IndexError):
+            dom.get_label_ids(values)
+    with pytest.raises(RuntimeError):
+        dom.get_label_ids([1.5])
+    for ids in ([-1], [num + 1], np.array([[1], [2 ** 40]])):
+        with pytest.raises(IndexError):
+            dom.get_labels_by_ids(ids)
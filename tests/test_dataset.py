@@ -0,0 +1,478 @@
+import os
+import pickle
+import random
+
+import numpy as np
+import pytest
+import torch.utils.data
+from PIL import Image
+
+import dsdl
+from dsdl.dataset import Dataset, StreamingDataset, StructCollate
+from dsdl.dataset.cache import DatasetCache, hash_files
+from dsdl.dataset.columnar import ColumnarSampleList
+from dsdl.exception import FieldNotProjectedError, UntrustedDataError
+from dsdl.geometry import STRUCT, ClassDomain, Label
+from dsdl.types import *
+
+local = dict(
+    type="LocalFileReader",
+    working_dir="",
+)
+
+
+class DatasetTestDom(ClassDomain):
+    Classes = [
+        Label("apple"),
+        Label("hammer"),
+        Label("person"),
+    ]
+
+
+class DatasetTestObject(Struct):
+    bbox = BBoxField()
+    label = LabelField(dom=DatasetTestDom, optional=True)
+    is_crowd = BoolField()
+    area = NumField(optional=True)
+
+
+class DatasetTestSample(Struct):
+    image = ImageField()
+    name = StrField(optional=True)
+    count = IntField(optional=True)
+    tags = ListField(ele_type=IntField(), optional=True)
+    objects = ListField(ele_type=DatasetTestObject())
+
+
+def make_samples(n=20, seed=0):
+    r = random.Random(seed)
+    samples = []
+    for i in range(n):
+        objects = []
+        for _ in range(r.randint(0, 4)):
+            obj = {"bbox": [r.random() * 100, r.random() * 100, r.random() * 50, r.random() * 50],
+                   "is_crowd": r.random() < 0.3}
+            if r.random() < 0.8:
+                obj["label"] = r.choice([1, 2, 3, "apple", "person"])
+            if r.random() < 0.5:
+                obj["area"] = r.random() * 1000
+            objects.append(obj)
+        sample = {"image": f"img_{i}.jpg", "objects": objects}
+        if i % 2:
+            sample["name"] = f"sample_{i}"
+        if i % 3:
+            sample["count"] = r.randint(0, 5)
+        if i % 4:
+            sample["tags"] = [r.randint(0, 9) for _ in range(r.randint(0, 3))]
+        samples.append(sample)
+    return samples
+
+
+class CountingDataset(Dataset):
+    builds = 0
+
+    def _build_struct(self, sample):
+        CountingDataset.builds += 1
+        return super()._build_struct(sample)
+
+
+def test_lazy_validates_each_sample_once():
+    samples = make_samples(10)
+    CountingDataset.builds = 0
+    dataset = CountingDataset(samples, "DatasetTestSample", local, lazy=True)
+    for _ in range(3):
+        for i in range(len(dataset)):
+            dataset[i]
+    assert CountingDataset.builds == len(samples)
+    assert dataset[3] is dataset[3]
+    assert repr(dataset[3]) == repr(Dataset(samples, "DatasetTestSample", local)[3])
+
+
+def test_lazy_cache_size():
+    samples = make_samples(10)
+    CountingDataset.builds = 0
+    dataset = CountingDataset(samples, "DatasetTestSample", local, lazy=True, cache_size=0)
+    dataset[0]
+    dataset[0]
+    assert CountingDataset.builds == 2
+
+    dataset = CountingDataset(samples, "DatasetTestSample", local, lazy=True, cache_size=3)
+    for i in range(len(dataset)):
+        dataset[i]
+    assert len(dataset.sample_list._cache) == 3
+
+
+def test_lazy_raises_on_access():
+    samples = make_samples(3)
+    samples[1]["objects"] = [{"bbox": [1, 2, 3], "is_crowd": False}]
+    dataset = Dataset(samples, "DatasetTestSample", local, lazy=True)
+    dataset[0]
+    with pytest.raises(Exception):
+        dataset[1]
+
+
+@pytest.mark.parametrize("option", [dict(lazy=True), dict(compact=True), dict(columnar=False)])
+def test_cache_dir_rejects_incompatible_modes(tmp_path, option):
+    with pytest.raises(ValueError, match="cache_dir"):
+        Dataset.from_yaml(str(tmp_path / "dataset.yaml"), local, cache_dir=str(tmp_path / "cache"), **option)
+
+
+@pytest.mark.parametrize("option", [dict(), dict(lazy=True), dict(columnar=True), dict(compact=True)])
+def test_validation_levels_agree(tmp_path, option):
+    samples = make_samples(30)
+    record = str(tmp_path / "record.json")
+    expected = dump(Dataset(samples, "DatasetTestSample", local, validation_record=record, **option))
+    Dataset(samples, "DatasetTestSample", local, validation_record=record)
+    fast = Dataset(samples, "DatasetTestSample", local, validation="fast", **option)
+    trusted = Dataset(samples, "DatasetTestSample", local, validation="trusted", validation_record=record, **option)
+    assert dump(fast) == expected
+    assert dump(trusted) == expected
+
+
+def test_trusted_rejects_stale_record(tmp_path):
+    samples = make_samples(10)
+    record = str(tmp_path / "record.json")
+    with pytest.raises(UntrustedDataError, match="does not exist"):
+        Dataset(samples, "DatasetTestSample", local, validation="trusted", validation_record=record)
+    Dataset(samples, "DatasetTestSample", local, validation_record=record)
+    Dataset(samples, "DatasetTestSample", local, validation="trusted", validation_record=record)
+    samples[4]["objects"] = [{"bbox": [1, 2, 3], "is_crowd": False}]
+    with pytest.raises(UntrustedDataError, match="changed"):
+        Dataset(samples, "DatasetTestSample", local, validation="trusted", validation_record=record)
+    # 记录中只校验了部分字段时不能信任其他字段
+    Dataset(make_samples(10), "DatasetTestSample", local, validation_record=record, fields=["image"])
+    with pytest.raises(UntrustedDataError, match="cover"):
+        Dataset(make_samples(10), "DatasetTestSample", local, validation="trusted", validation_record=record)
+
+
+@pytest.mark.parametrize("option", [dict(), dict(lazy=True), dict(compact=True), dict(columnar=True),
+                                    dict(num_workers=3), dict(columnar=True, num_workers=3)])
+def test_projection_raises_field_not_projected(option):
+    samples = make_samples(30)
+    fields = ["image", "objects/bbox"]
+    dataset = Dataset(samples, "DatasetTestSample", local, fields=fields, **option)
+    if not option.get("columnar"):
+        assert dump(dataset) == dump(Dataset(samples, "DatasetTestSample", local, fields=fields))
+    sample = next(sample for sample in dataset if sample["$list"]["objects"])
+    assert sample["$image"]["image"].location.startswith("img_")
+    obj = sample["$list"]["objects"][0]
+    assert len(obj["$bbox"]["bbox"].xywh) == 4
+    for container, key, name in [(sample, "$str", "name"), (sample, "$int", "count"), (sample["$list"], "tags", "tags"),
+                                 (obj, "$label", "label"), (obj, "$bool", "is_crowd")]:
+        with pytest.raises(FieldNotProjectedError, match=f"'{name}'"):
+            container[key]
+    with pytest.raises(KeyError):
+        sample["$polygon"]
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_index_subset_query(columnar):
+    samples = make_samples(40)
+    dataset = Dataset(samples, "DatasetTestSample", local, columnar=columnar)
+    index = dataset.index
+    assert ("is_crowd", True) in index.attributes
+    subset = dataset.subset(index.label("person") & ~index.attribute("is_crowd", True))
+
+    def is_person(obj):
+        return obj.get("label") in (3, "person")
+
+    expected = [i for i, sample in enumerate(samples)
+                if any(is_person(obj) for obj in sample["objects"])
+                and not any(obj["is_crowd"] for obj in sample["objects"])]
+    assert len(expected) > 0
+    assert list(subset.indices) == expected
+    assert list(index.attribute("name", "sample_3")) == [3]
+
+
+def test_index_builders_agree():
+    samples = make_samples(40)
+    items = Dataset(samples, "DatasetTestSample", local).index
+    table = Dataset(samples, "DatasetTestSample", local, columnar=True).index
+    assert set(items.postings) == set(table.postings)
+    for key, ids in items.postings.items():
+        assert list(ids) == list(table.postings[key])
+
+
+def dump(dataset):
+    return [repr(sample) for sample in dataset]
+
+
+def test_columnar_equals_list():
+    samples = make_samples(40)
+    dataset = Dataset(samples, "DatasetTestSample", local)
+    columnar = Dataset(samples, "DatasetTestSample", local, columnar=True)
+    assert isinstance(columnar.sample_list, ColumnarSampleList)
+    assert len(columnar) == len(dataset)
+    # float64存储时与逐个样本解析的结果完全一致
+    struct_cls = STRUCT.get("DatasetTestSample")
+    exact = ColumnarSampleList.from_structs(
+        (struct_cls(file_reader=dataset.file_reader, **sample) for sample in samples), struct_cls,
+        dataset.file_reader, np.float64)
+    assert dump(exact) == dump(dataset)
+    for expected, sample in zip(dataset, columnar):
+        assert sample.get("$str") == expected.get("$str")
+        objects, expected_objects = sample["$list"]["objects"], expected["$list"]["objects"]
+        assert [obj.get("$label") for obj in objects] == [obj.get("$label") for obj in expected_objects]
+        for obj, expected_obj in zip(objects, expected_objects):
+            assert np.allclose(obj["$bbox"]["bbox"].xywh, expected_obj["$bbox"]["bbox"].xywh, rtol=1e-6)
+    assert len(Dataset([], "DatasetTestSample", local, columnar=True)) == 0
+
+
+def test_columnar_int_overflow():
+    samples = make_samples(20)
+    samples[4]["count"] = 2 ** 63
+    samples[8]["count"] = -2 ** 70
+    dataset = Dataset(samples, "DatasetTestSample", local)
+    columnar = Dataset(samples, "DatasetTestSample", local, columnar=True)
+    assert [sample.get("$int") for sample in columnar] == [sample.get("$int") for sample in dataset]
+    assert columnar[4]["$int"]["count"] == 2 ** 63
+    assert list(columnar.index.attribute("count", 2 ** 63)) == [4]
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_parallel_equals_serial(columnar):
+    samples = make_samples(60)
+    samples[7]["image"] = {"$loc": "img_7.jpg", "frame": 3}
+    samples[50]["count"] = 2 ** 64
+    serial = Dataset(samples, "DatasetTestSample", local, columnar=columnar)
+    parallel = Dataset(samples, "DatasetTestSample", local, columnar=columnar, num_workers=3)
+    assert dump(parallel) == dump(serial)
+    assert parallel[50]["$int"]["count"] == 2 ** 64
+    if not columnar:
+        assert parallel[7]["$image"]["image"]._reader.args == {"$loc": "img_7.jpg", "frame": 3}
+
+
+def test_parallel_errors_equal_serial():
+    samples = make_samples(60)
+    samples[20]["objects"] = [{"bbox": [1, 2, 3], "is_crowd": False}]
+    samples[45]["objects"] = [{"bbox": "x", "is_crowd": False}]
+    errors = []
+    for num_workers in (0, 3):
+        with pytest.raises(Exception) as info:
+            Dataset(samples, "DatasetTestSample", local, num_workers=num_workers)
+        errors.append((type(info.value), str(info.value)))
+    assert errors[0] == errors[1]
+
+
+def write_images(root, samples):
+    rng = np.random.default_rng(0)
+    for sample in samples:
+        location = sample["image"]["$loc"] if isinstance(sample["image"], dict) else sample["image"]
+        Image.fromarray(rng.integers(0, 255, (6, 8, 3), dtype=np.uint8)).save(root / location, format="PNG")
+    return dict(type="LocalFileReader", working_dir=str(root))
+
+
+def assert_batches_equal(batch, expected):
+    assert list(batch) == list(expected)
+    for key, value in expected.items():
+        if isinstance(value, np.ndarray):
+            assert value.dtype == batch[key].dtype and np.array_equal(batch[key], value)
+        else:
+            assert len(batch[key]) == len(value)
+            for item, expected_item in zip(batch[key], value):
+                assert np.array_equal(item, expected_item)
+
+
+@pytest.mark.parametrize("option", [dict(), dict(lazy=True), dict(compact=True)])
+def test_get_batch(tmp_path, option):
+    samples = make_samples(20)
+    config = write_images(tmp_path, samples)
+    columnar = Dataset(samples, "DatasetTestSample", config, columnar=True, batched=True)
+    # 非columnar模式下对取出的样本重新校验和编码，结果与columnar模式一致
+    dataset = Dataset(samples, "DatasetTestSample", config, batched=True, **option)
+    indices = [3, 1, -1, 8]
+    batch = dataset.get_batch(indices)
+    assert_batches_equal(batch, columnar.get_batch(indices))
+    assert_batches_equal(dataset.__getitems__(indices), batch)
+
+    rows = [3, 1, 19, 8]
+    objects = [obj for i in rows for obj in dataset[i]["$list"]["objects"]]
+    assert batch["objects/$offsets"].tolist() == np.cumsum([0] + [len(samples[i]["objects"]) for i in rows]).tolist()
+    assert np.array_equal(batch["objects/bbox"], np.array([obj["$bbox"]["bbox"].xywh for obj in objects],
+                                                          dtype=np.float32).reshape(-1, 4))
+    assert [obj["$bool"]["is_crowd"] for obj in objects] == batch["objects/is_crowd"].tolist()
+    for image, i in zip(batch["image"], rows):
+        assert np.array_equal(image, dataset[i]["$image"]["image"].to_array())
+    with pytest.raises(IndexError):
+        dataset.get_batch([20])
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_collate_samples_equals_columns(tmp_path, columnar):
+    samples = make_samples(20)
+    samples[2]["objects"] = []
+    dataset = Dataset(samples, "DatasetTestSample", write_images(tmp_path, samples), columnar=columnar)
+    collate = StructCollate(dataset.sample_type, to_tensor=False)
+    for indices in ([0, 1, 2, 3], [2], [5, 7, 9]):
+        expected = collate([dataset[i] for i in indices])
+        batch = collate(dataset.get_batch(indices))
+        assert list(batch) == list(expected)
+        assert "name/$mask" in batch and "objects/$offsets" not in batch
+        assert_batches_equal(batch, expected)
+
+
+def test_get_batch_validates_samples(tmp_path):
+    samples = make_samples(5)
+    samples[2]["objects"] = [{"bbox": [1, 2, 3], "is_crowd": False}]
+    dataset = Dataset(samples, "DatasetTestSample", write_images(tmp_path, samples), lazy=True, batched=True)
+    dataset.get_batch([0, 1])
+    with pytest.raises(Exception, match="bbox"):
+        dataset.get_batch([1, 2])
+
+
+def test_getitems(tmp_path):
+    samples = make_samples(10)
+    config = write_images(tmp_path, samples)
+    dataset = Dataset(samples, "DatasetTestSample", config, pipeline=lambda data: data["$list"])
+    assert dataset.__getitems__([2, 5]) == [dataset[2], dataset[5]]
+    with pytest.raises(ValueError, match="pipeline"):
+        Dataset(samples, "DatasetTestSample", config, pipeline=lambda data: data, batched=True)
+
+    batched = Dataset(samples, "DatasetTestSample", config, columnar=True, batched=True)
+    loader = torch.utils.data.DataLoader(batched, batch_size=4, collate_fn=lambda batch: batch)
+    batches = list(loader)
+    assert [len(batch["image"]) for batch in batches] == [4, 4, 2]
+    assert_batches_equal(batches[1], batched.get_batch([4, 5, 6, 7]))
+    # 线程池只创建一次，且不会被pickle
+    executor = batched._media_executor
+    batched.get_batch([0])
+    assert batched._media_executor is executor
+    assert pickle.loads(pickle.dumps(batched))._media_executor is None
+
+
+DSDL_YAML = """$dsdl-version: "0.5.0"
+meta:
+  name: "cache-test"
+defs:
+  CacheTestDom:
+    $def: class_domain
+    classes:
+      - apple
+      - person
+  CacheTestObject:
+    $def: struct
+    $fields:
+      bbox: BBox
+      label: Label[dom=CacheTestDom]
+      is_crowd: Bool
+  CacheTestSample:
+    $def: struct
+    $fields:
+      image: Image
+      objects: List[etype=CacheTestObject]
+data:
+  sample-type: CacheTestSample
+  sample-path: samples
+"""
+
+
+def write_dataset(root, num_samples, num_files=1):
+    samples = root / "samples"
+    samples.mkdir(exist_ok=True)
+    parts = [["samples:"] for _ in range(num_files)]
+    for i in range(num_samples):
+        # 样本按顺序连续地分到各个样本文件中
+        lines = parts[i * num_files // num_samples]
+        lines.append(f"- image: img_{i}.jpg")
+        lines.append("  objects:" if i % 3 else "  objects: []")
+        for j in range(i % 3):
+            lines.append(f"  - bbox: [{i}, {j}, 10.5, 20.25]")
+            lines.append(f"    label: {j % 2 + 1}")
+            lines.append(f"    is_crowd: {'true' if j else 'false'}")
+    for ind, lines in enumerate(parts):
+        (samples / f"part{ind}.yaml").write_text("\n".join(lines) + "\n")
+    dsdl_yaml = root / "dataset.yaml"
+    dsdl_yaml.write_text(DSDL_YAML)
+    return str(dsdl_yaml)
+
+
+@pytest.fixture
+def dsdl_library():
+    return os.path.join(os.path.dirname(dsdl.__file__), "dsdl_library")
+
+
+def test_cache_reuse_and_invalidation(tmp_path, dsdl_library):
+    dsdl_yaml = write_dataset(tmp_path, 10)
+    cache_dir = str(tmp_path / "cache")
+    cache = DatasetCache(cache_dir)
+    assert cache.load(dsdl_yaml, dsdl_library) is None
+
+    expected = Dataset.from_yaml(dsdl_yaml, local, dsdl_library, columnar=True)
+    built = Dataset.from_yaml(dsdl_yaml, local, dsdl_library, cache_dir=cache_dir)
+    assert cache.load(dsdl_yaml, dsdl_library) is not None
+    cached = Dataset.from_yaml(dsdl_yaml, local, dsdl_library, cache_dir=cache_dir)
+    assert dump(built) == dump(expected)
+    assert dump(cached) == dump(expected)
+
+    # 样本文件变化后缓存失效，重新加载的是新的样本
+    write_dataset(tmp_path, 12)
+    assert cache.load(dsdl_yaml, dsdl_library) is None
+    reloaded = Dataset.from_yaml(dsdl_yaml, local, dsdl_library, cache_dir=cache_dir)
+    assert len(reloaded) == 12
+    assert dump(reloaded) == dump(Dataset.from_yaml(dsdl_yaml, local, dsdl_library, columnar=True))
+
+    # 字段投影不同时重新加载
+    projected = Dataset.from_yaml(dsdl_yaml, local, dsdl_library, cache_dir=cache_dir, fields=["image"])
+    assert dump(projected) == dump(Dataset.from_yaml(dsdl_yaml, local, dsdl_library, columnar=True,
+                                                     fields=["image"]))
+
+
+def test_hash_files_framing(tmp_path):
+    def digest(*files):
+        paths = []
+        for name, content in files:
+            (tmp_path / name).write_bytes(content)
+            paths.append(str(tmp_path / name))
+        return hash_files(paths).hexdigest()
+
+    assert digest(("a", b"bc")) != digest(("ab", b"c"))
+    assert digest(("a", b"xy"), ("b", b"")) != digest(("a", b"x"), ("b", b"y"))
+    assert digest(("a", b"x")) == digest(("a", b"x"))
+
+
+def test_cache_rejects_modified_definition(tmp_path, dsdl_library):
+    dsdl_yaml = write_dataset(tmp_path, 5)
+    cache_dir = str(tmp_path / "cache")
+    cache = DatasetCache(cache_dir)
+    expected = dump(Dataset.from_yaml(dsdl_yaml, local, dsdl_library, cache_dir=cache_dir))
+    definition = os.path.join(cache.entry_dir(dsdl_yaml, dsdl_library), "dsdl.py")
+    with open(definition, "a") as f:
+        f.write("\nraise RuntimeError('modified definition')\n")
+    assert cache.load(dsdl_yaml, dsdl_library) is None
+    assert dump(Dataset.from_yaml(dsdl_yaml, local, dsdl_library, cache_dir=cache_dir)) == expected
+    assert cache.load(dsdl_yaml, dsdl_library) is not None
+
+
+def test_pickle_round_trip(tmp_path, dsdl_library):
+    dsdl_yaml = write_dataset(tmp_path, 300)
+    cache_dir = str(tmp_path / "cache")
+    Dataset.from_yaml(dsdl_yaml, local, dsdl_library, cache_dir=cache_dir)
+    cached = Dataset.from_yaml(dsdl_yaml, local, dsdl_library, cache_dir=cache_dir)
+    columnar = Dataset.from_yaml(dsdl_yaml, local, dsdl_library, columnar=True)
+    plain = Dataset.from_yaml(dsdl_yaml, local, dsdl_library)
+    for dataset in (cached, columnar, plain):
+        assert dump(pickle.loads(pickle.dumps(dataset))) == dump(dataset)
+    # mmap打开的缓存数组只序列化文件路径和偏移量
+    assert len(pickle.dumps(cached)) < len(pickle.dumps(columnar))
+
+
+def test_streaming_equals_dataset(tmp_path, dsdl_library):
+    dsdl_yaml = write_dataset(tmp_path, 23, num_files=5)
+    expected = dump(Dataset.from_yaml(dsdl_yaml, local, dsdl_library))
+    streaming = StreamingDataset.from_yaml(dsdl_yaml, local, dsdl_library)
+    assert len(streaming.sample_files) == 5
+    assert dump(streaming) == expected
+    projected = StreamingDataset.from_yaml(dsdl_yaml, local, dsdl_library, fields=["image", "objects/label"])
+    assert dump(projected) == dump(Dataset.from_yaml(dsdl_yaml, local, dsdl_library, fields=["image", "objects/label"]))
+
+    # 每个分片只被一个rank/worker读取，合起来为完整的数据集
+    for shuffle in (False, True):
+        shards = []
+        for rank in range(2):
+            dataset = StreamingDataset.from_yaml(dsdl_yaml, local, dsdl_library, rank=rank, world_size=2,
+                                                 shuffle=shuffle)
+            dataset.set_epoch(3)
+            loader = torch.utils.data.DataLoader(dataset, batch_size=None, num_workers=2, collate_fn=lambda x: x)
+            shards.append(dump(loader))
+        assert sorted(shards[0] + shards[1]) == sorted(expected)
+        assert 0 < len(shards[0]) < len(expected)
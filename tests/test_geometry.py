@@ -0,0 +1,306 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from dsdl.exception import ClassNotFoundError, ValidationError
+from dsdl.geometry import (ClassDomain, KeyPoints, Label, LabelList, Polygon, PolygonArray, PolygonItem, RlePolygon,
+                           SegmentationMap)
+from dsdl.objectio import LocalFileReader
+from dsdl.types import KeypointField
+from dsdl.types.unstructure import FileReader
+from dsdl.geometry.rle import decode_counts_string, decode_rle_masks, encode_counts_string
+
+
+def test_polygon_item_returns_lists():
+    item = PolygonItem([[1, 2], [3, 4], [0, 5]])
+    assert item.points == [[1.0, 2.0], [3.0, 4.0], [0.0, 5.0]]
+    assert item.points_x == [1.0, 3.0, 0.0]
+    assert item.points_y == [2.0, 4.0, 5.0]
+    assert item.openmmlabformat == [1.0, 2.0, 3.0, 4.0, 0.0, 5.0]
+    assert item.to_tuple() == ((1.0, 2.0), (3.0, 4.0), (0.0, 5.0))
+    assert item.points_array.dtype == np.float32 and item.points_array.shape == (3, 2)
+    assert item.flat_array.tolist() == item.openmmlabformat
+
+
+def test_polygon_openmmlabformat():
+    polygon = Polygon([PolygonItem([[1, 2], [3, 4], [0, 5]]), PolygonItem([[9, 9], [8, 1], [1, 1]])])
+    assert polygon.openmmlabformat == [[1.0, 2.0, 3.0, 4.0, 0.0, 5.0], [9.0, 9.0, 8.0, 1.0, 1.0, 1.0]]
+    assert polygon.point_for_draw == [1, 1]
+    assert PolygonArray([polygon]).openmmlabformat == [polygon.openmmlabformat]
+    # Polygon中的环共享同一个坐标数组
+    assert np.shares_memory(polygon.polygons[1].points_array, polygon.coords)
+
+
+def test_empty_polygon():
+    polygon = Polygon([])
+    assert polygon.point_for_draw == [0, 0]
+    assert PolygonItem([]).point_for_draw == [0, 0]
+    assert polygon.openmmlabformat == []
+    assert polygon.area == 0
+
+
+def random_masks(rng, count=20):
+    masks = []
+    for _ in range(count):
+        height, width = rng.integers(1, 30, 2).tolist()
+        mask = (rng.random((height, width)) < rng.random()).astype(np.uint8)
+        masks.append(mask)
+    masks.append(np.zeros((5, 7), dtype=np.uint8))
+    masks.append(np.ones((5, 7), dtype=np.uint8))
+    return masks
+
+
+def test_rle_counts_string():
+    # 手工按COCO的压缩格式编码的结果
+    assert encode_counts_string([3, 2]) == "32"
+    assert encode_counts_string([100]) == "T3"
+    assert encode_counts_string([1, 2, 3, 1]) == "123O"
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        counts = rng.integers(0, 5000, rng.integers(1, 40)).tolist()
+        assert decode_counts_string(encode_counts_string(counts)) == counts
+        assert decode_counts_string(encode_counts_string(counts).encode("ascii")) == counts
+
+
+def test_rle_mask_round_trip():
+    rng = np.random.default_rng(1)
+    for mask in random_masks(rng):
+        rle = RlePolygon.from_mask(mask)
+        assert rle.size == mask.shape
+        assert np.array_equal(rle.to_mask(), mask)
+        assert rle.area == mask.sum()
+        decoded = RlePolygon(rle.to_string(), rle.size)
+        assert np.array_equal(decoded.counts, rle.counts)
+        ys, xs = np.nonzero(mask)
+        expected = [0, 0, 0, 0] if not len(xs) else [xs.min(), ys.min(), xs.max() - xs.min() + 1,
+                                                     ys.max() - ys.min() + 1]
+        assert rle.bbox.xywh == expected
+
+
+def test_decode_rle_masks():
+    rng = np.random.default_rng(2)
+    masks = (rng.random((4, 9, 13)) < 0.5).astype(np.uint8)
+    rles = [RlePolygon.from_mask(mask) for mask in masks]
+    assert np.array_equal(decode_rle_masks(rles, packed=False), masks)
+    assert np.array_equal(np.unpackbits(decode_rle_masks(rles), axis=-1, count=13), masks)
+
+
+def test_rle_matches_pycocotools():
+    mask_utils = pytest.importorskip("pycocotools.mask")
+    rng = np.random.default_rng(3)
+    for mask in random_masks(rng):
+        expected = mask_utils.encode(np.asfortranarray(mask))
+        rle = RlePolygon.from_mask(mask)
+        assert rle.to_string() == expected["counts"].decode("ascii")
+        assert rle.area == mask_utils.area(expected)
+        assert np.allclose(rle.bbox.xywh, mask_utils.toBbox(expected))
+
+
+def random_polygons(rng, count=30, size=100):
+    polygons = []
+    for _ in range(count):
+        rings = []
+        for _ in range(rng.integers(1, 4)):
+            center = rng.random(2) * size
+            angles = np.sort(rng.random(rng.integers(3, 25)) * 2 * np.pi)
+            radius = rng.random(len(angles)) * 40 + 1
+            rings.append(PolygonItem(np.stack([center[0] + radius * np.cos(angles),
+                                               center[1] + radius * np.sin(angles)], 1)))
+        polygons.append(Polygon(rings))
+    polygons.append(Polygon([]))
+    return polygons
+
+
+def shoelace(points):
+    x, y = points[:, 0].astype(np.float64), points[:, 1].astype(np.float64)
+    return abs(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y)) / 2
+
+
+def clip_ring(points, window):
+    # Sutherland-Hodgman：依次用窗口的四条边裁剪
+    x1, y1, x2, y2 = window
+    edges = [(0, x1, True), (0, x2, False), (1, y1, True), (1, y2, False)]
+    points = [tuple(map(float, point)) for point in points]
+    for axis, value, keep_greater in edges:
+        result = []
+        for ind, point in enumerate(points):
+            following = points[(ind + 1) % len(points)]
+            inside = point[axis] >= value if keep_greater else point[axis] <= value
+            following_inside = following[axis] >= value if keep_greater else following[axis] <= value
+            if inside:
+                result.append(point)
+            if inside != following_inside:
+                t = (value - point[axis]) / (following[axis] - point[axis])
+                other = point[1 - axis] + t * (following[1 - axis] - point[1 - axis])
+                result.append((value, other) if axis == 0 else (other, value))
+        points = result
+    return points
+
+
+def segment_distance(point, start, stop):
+    d, r = stop - start, point - start
+    squared = np.dot(d, d)
+    t = 0 if squared == 0 else min(max(np.dot(r, d) / squared, 0), 1)
+    return np.hypot(*(r - t * d))
+
+
+def simplify_ring(points, tolerance):
+    # 逐个环递归的Douglas-Peucker：先在离第一个点最远的点处分开，再分别递归细分
+    points = points.astype(np.float64)
+    n = len(points)
+    if n <= 3:
+        return points
+    closed = np.concatenate([points, points[:1]])
+    kept = {0, n}
+
+    def split(start, stop):
+        if stop - start < 2:
+            return
+        distances = [segment_distance(closed[i], closed[start], closed[stop]) for i in range(start + 1, stop)]
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            kept.add(start + 1 + farthest)
+            split(start, start + 1 + farthest)
+            split(start + 1 + farthest, stop)
+
+    farthest = int(np.argmax(np.hypot(*(points - points[0]).T)))
+    kept.add(farthest)
+    split(0, farthest)
+    split(farthest, n)
+    if len(kept) - 1 < 3:
+        bounds = sorted(kept)
+        best, best_ind = -1, None
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            for i in range(start + 1, stop):
+                distance = segment_distance(closed[i], closed[start], closed[stop])
+                if distance > best:
+                    best, best_ind = distance, i
+        kept.add(best_ind)
+    return closed[sorted(kept - {n})]
+
+
+def test_polygon_area_and_bounds():
+    polygons = random_polygons(np.random.default_rng(4))
+    array = PolygonArray(polygons)
+    expected = [sum(shoelace(item.points_array) for item in polygon.polygons) for polygon in polygons]
+    assert np.allclose(array.area, expected)
+    assert np.allclose([polygon.area for polygon in polygons], expected)
+    for polygon, bbox in zip(polygons, array.bboxes):
+        if not len(polygon.coords):
+            assert bbox.xywh == [0, 0, 0, 0]
+            continue
+        (xmin, ymin), (xmax, ymax) = polygon.coords.min(0), polygon.coords.max(0)
+        assert np.allclose(bbox.xywh, [xmin, ymin, xmax - xmin, ymax - ymin])
+
+
+def test_polygon_clip():
+    polygons = random_polygons(np.random.default_rng(5))
+    for window in ([0, 0, 60, 80], [20, 30, 70, 50]):
+        x, y, x2, y2 = window
+        cropped = PolygonArray(polygons).crop(x, y, x2 - x, y2 - y)
+        assert len(cropped) == len(polygons)
+        for polygon, result in zip(polygons, cropped):
+            expected = [clip_ring(item.points_array, window) for item in polygon.polygons]
+            expected = [ring for ring in expected if len(ring) >= 3]
+            assert len(result.polygons) == len(expected)
+            for ring, item in zip(expected, result.polygons):
+                assert np.allclose(item.points_array, np.array(ring) - [x, y], atol=1e-3)
+    square = Polygon([PolygonItem([[-5, -5], [15, -5], [15, 15], [-5, 15]])])
+    assert square.clip(10, 10).area == 100
+    assert square.clip(10, 10).bbox.xywh == [0, 0, 10, 10]
+    assert len(Polygon([PolygonItem([[20, 20], [30, 20], [30, 30]])]).clip(10, 10).polygons) == 0
+
+
+@pytest.mark.parametrize("tolerance", [0, 0.5, 3, 100])
+def test_polygon_simplify(tolerance):
+    polygons = random_polygons(np.random.default_rng(6))
+    simplified = PolygonArray(polygons).simplify(tolerance)
+    for polygon, result in zip(polygons, simplified):
+        assert len(result.polygons) == len(polygon.polygons)
+        for item, simplified_item in zip(polygon.polygons, result.polygons):
+            expected = simplify_ring(item.points_array, tolerance)
+            assert np.array_equal(simplified_item.points_array, expected.astype(np.float32))
+            assert len(simplified_item) >= min(3, len(item))
+
+
+class SegMapTestDom(ClassDomain):
+    Classes = [
+        Label("sky"),
+        Label("road"),
+        Label("car"),
+    ]
+
+
+def segmentation_map(root, image, name="seg.png"):
+    image.save(root / name)
+    reader = FileReader(LocalFileReader(working_dir=str(root)), {"$loc": name})
+    return SegmentationMap(name, reader, SegMapTestDom)
+
+
+def test_segmap_palette_image_to_indices(tmp_path):
+    seg = np.array([[0, 1, 2], [3, 3, 1]], dtype=np.uint8)
+    image = Image.fromarray(seg, mode="P")
+    image.putpalette([0, 0, 0, 255, 0, 0, 0, 255, 0, 0, 0, 255] + [0] * 756)
+    segmap = segmentation_map(tmp_path, image)
+    assert segmap.to_array().tolist() == seg.tolist()
+
+
+def test_segmap_colorize(tmp_path, monkeypatch):
+    seg = np.array([[0, 1, 3], [3, -1, 99]], dtype=np.int32)
+    segmap = segmentation_map(tmp_path, Image.fromarray(seg, mode="I"), "seg.tif")
+    assert segmap.to_array().dtype == np.int32
+    lut = SegMapTestDom.get_color_lut()
+    palette = {"car": (1, 2, 3)}
+    color, labels = segmap.colorize(palette)
+    assert [label.name for label in labels] == ["sky", "car"]
+    # 负数和超出类别域的值与0一样为黑色
+    expected = [[lut[0], lut[1], (1, 2, 3)], [(1, 2, 3), lut[0], lut[0]]]
+    assert color.dtype == np.uint8 and color.tolist() == np.array(expected).tolist()
+    assert palette == {"car": (1, 2, 3), "sky": tuple(lut[1].tolist())}
+    assert SegMapTestDom.get_color_lut()[3].tolist() == lut[3].tolist()
+
+    decoded = np.array([[2, 2], [0, 1]], dtype=np.uint8)
+    color, labels = segmap.colorize(seg=decoded)
+    assert color.tolist() == lut[decoded].tolist() and [label.name for label in labels] == ["sky", "road"]
+
+    # 传入已解码的seg时不再读取文件；类别名的绘制依赖的ImageDraw.textsize在Pillow 10中已被移除，这里不测试
+    monkeypatch.setattr(segmap, "to_array", None)
+    monkeypatch.setattr(LabelList, "visualize", lambda self, image, **kwargs: image)
+    overlay = segmap.visualize(Image.new("RGBA", (2, 2)), {}, seg=decoded)
+    assert np.array(overlay)[1, 1].tolist() == [*(lut[1] // 2).tolist(), 127]
+
+
+class KeyPointTestDom(ClassDomain):
+    Classes = [
+        Label("nose"),
+        Label("left_eye"),
+        Label("right_eye"),
+    ]
+
+
+def test_keypoints_from_array_round_trip():
+    value = [[1, 2.5, 2], [0, 0, 0], [7.25, 3, 1]]
+    array = np.array(value, dtype=np.float32)
+    keypoints = KeyPoints.from_array(array, KeyPointTestDom)
+    assert keypoints.array is array and len(keypoints) == 3
+    assert keypoints.value == value and keypoints.points == [[1, 2.5], [0, 0], [7.25, 3]]
+    assert keypoints.visables == [2, 0, 1] and keypoints.names == ["nose", "left_eye", "right_eye"]
+    assert keypoints["right_eye"].point == [7.25, 3] and keypoints[1].visiable == 0
+    rebuilt = KeyPoints(keypoints.keypoints, KeyPointTestDom)
+    assert rebuilt.array.dtype == np.float32 and rebuilt.array.tolist() == array.tolist()
+    field = KeypointField(dom=KeyPointTestDom)
+    for result in (field.validate(value), field.coerce(value), KeyPoints.from_array(array[:0], KeyPointTestDom)):
+        assert result.array.dtype == np.float32 and result.array.ndim == 2 and result.array.shape[1] == 3
+    assert field.validate(value).value == value
+
+
+def test_keypoints_invalid_input():
+    for array in (np.zeros((3, 2), np.float32), np.zeros(9, np.float32), np.zeros((3, 3)), np.zeros((3, 3), int)):
+        with pytest.raises(ValueError):
+            KeyPoints.from_array(array, KeyPointTestDom)
+    field = KeypointField(dom=KeyPointTestDom)
+    for value in ([[1, 2, 1]] * 2, [[1, 2, 1]] * 4, [[1, 2], [1, 2], [1, 2]], [[1, 2, "x"]] * 3, "abc"):
+        with pytest.raises(ValidationError):
+            field.validate(value)
+    with pytest.raises(ClassNotFoundError):
+        KeyPoints.from_array(np.zeros((3, 3), np.float32), KeyPointTestDom)["mouth"]
@@ -0,0 +1,38 @@
+import pickle
+
+import pytest
+
+from dsdl.objectio import AliOSSFileReader
+
+
+def credentials(reader):
+    creds = reader.bucket.auth.credentials_provider.get_credentials()
+    return creds.get_access_key_id(), creds.get_access_key_secret()
+
+
+def test_ali_oss_reader_pickles_without_env_credentials(monkeypatch):
+    monkeypatch.setenv("OSS_ACCESS_KEY_ID", "env-key-id")
+    monkeypatch.setenv("OSS_ACCESS_KEY_SECRET", "env-key-secret")
+    reader = AliOSSFileReader("media", "bucket", endpoint="https://oss.example.com")
+    assert credentials(reader) == ("env-key-id", "env-key-secret")
+    data = pickle.dumps(reader)
+    assert b"env-key" not in data
+    # 反序列化时重新从环境变量中读取密钥
+    monkeypatch.setenv("OSS_ACCESS_KEY_SECRET", "rotated-secret")
+    restored = pickle.loads(data)
+    assert restored.working_dir == "media" and restored.bucket.bucket_name == "bucket"
+    assert credentials(restored) == ("env-key-id", "rotated-secret")
+
+    monkeypatch.delenv("OSS_ACCESS_KEY_SECRET")
+    with pytest.raises(ValueError, match="OSS_ACCESS_KEY_SECRET"):
+        pickle.loads(data)
+
+
+def test_ali_oss_reader_explicit_credentials(monkeypatch):
+    monkeypatch.delenv("OSS_ACCESS_KEY_ID", raising=False)
+    monkeypatch.delenv("OSS_ACCESS_KEY_SECRET", raising=False)
+    reader = AliOSSFileReader("media", "bucket", "key-id", "key-secret", "https://oss.example.com")
+    restored = pickle.loads(pickle.dumps(reader))
+    assert credentials(restored) == ("key-id", "key-secret")
+    with pytest.raises(ValueError, match="endpoint"):
+        AliOSSFileReader("media", "bucket", "key-id", "key-secret")
@@ -0,0 +1,165 @@
+import pickle
+
+import pytest
+
+from dsdl.exception import FieldNotProjectedError, ValidationError
+from dsdl.geometry import ClassDomain, Label
+from dsdl.objectio import LocalFileReader
+from dsdl.types import *
+
+file_reader = LocalFileReader(working_dir="")
+
+
+class StructTestDom(ClassDomain):
+    Classes = [
+        Label("cat"),
+        Label("dog"),
+    ]
+
+
+class StructTestObject(Struct):
+    bbox = BBoxField()
+    label = LabelField(dom=StructTestDom, optional=True)
+    iscrowd = BoolField(is_attr=True)
+    score = NumField(is_attr=True, optional=True)
+
+
+class StructTestSample(Struct):
+    image = ImageField()
+    width = IntField()
+    caption = StrField(optional=True)
+    source = StrField(is_attr=True, optional=True)
+    objects = ListField(ele_type=StructTestObject(), optional=True)
+
+
+def make_kwargs():
+    return {
+        "image": "a.jpg",
+        "width": 640,
+        "caption": "two cats",
+        "source": "web",
+        "objects": [{"bbox": [1, 2, 3, 4], "label": "cat", "iscrowd": False, "score": 0.5},
+                    {"bbox": [5, 6, 7, 8], "iscrowd": 1}],
+    }
+
+
+def dump(value):
+    if isinstance(value, Struct):
+        return [(k, dump(v)) for k, v in dict.items(value) if k != "file_reader"] + [list(value.keys())]
+    if isinstance(value, list):
+        return [dump(v) for v in value]
+    return type(value).__name__, repr(value)
+
+
+def generic_init(kwargs, **options):
+    # 绕过生成的__init__，直接调用通用的Struct.__init__
+    struct = StructTestSample.__new__(StructTestSample)
+    Struct.__init__(struct, **options, **kwargs)
+    return struct
+
+
+def build_both(kwargs, **options):
+    results = []
+    for build in (lambda: StructTestSample(**options, **kwargs), lambda: generic_init(kwargs, **options)):
+        try:
+            results.append(dump(build()))
+        except Exception as error:
+            results.append((type(error), str(error)))
+    return results
+
+
+def drop(*keys):
+    def mutate(kwargs):
+        for k in keys:
+            kwargs.pop(k)
+    return mutate
+
+
+@pytest.mark.parametrize("mutate", [
+    lambda kwargs: None,
+    drop("width"),  # 缺失required字段
+    drop("image", "width"),
+    drop("caption", "source", "objects"),  # 只有required字段
+    lambda kwargs: kwargs.update(unknown=1, other="x"),  # 未定义的字段被忽略
+    lambda kwargs: kwargs["objects"][0].pop("iscrowd"),  # 缺失attribute
+    lambda kwargs: kwargs["objects"][0].update(score="x"),
+    lambda kwargs: kwargs.update(width="wide"),
+    lambda kwargs: kwargs.update(objects=[{"bbox": [1, 2, 3], "iscrowd": True}]),
+])
+@pytest.mark.parametrize("options", [
+    dict(file_reader=file_reader),
+    dict(file_reader=None),
+    dict(file_reader=file_reader, validation="fast"),
+    dict(file_reader=file_reader, validation="trusted"),
+    dict(file_reader=file_reader, projection=["image", "objects/label"]),
+    dict(file_reader=file_reader, projection=["caption", "source", "objects/iscrowd"]),
+])
+def test_generated_init_equals_generic(mutate, options):
+    kwargs = make_kwargs()
+    mutate(kwargs)
+    generated, generic = build_both(kwargs, **options)
+    if options.get("validation") == "trusted" and isinstance(generic, tuple):
+        # trusted级别生成的__init__不为异常补充字段名
+        generated, generic = generated[0], generic[0]
+    assert generated == generic
+
+
+def test_generated_init_attributes():
+    assert StructTestSample.__init__ is not Struct.__init__
+    struct = StructTestSample(file_reader=file_reader, **make_kwargs())
+    assert struct.keys() == ("image", "width", "caption", "objects", "$attributes")
+    assert list(struct.attributes.keys()) == ["source"] and struct.attributes["source"] == "web"
+    assert struct.objects[1].attributes["iscrowd"] == 1
+    with pytest.raises(ValidationError, match="'objects'.*'bbox'"):
+        StructTestSample(file_reader=file_reader, image="a.jpg", width=1, objects=[{"bbox": [], "iscrowd": True}])
+
+
+def test_record_equals_struct():
+    record_cls = StructTestSample.record_type()
+    assert record_cls is StructTestSample.record_type() and record_cls.__struct__ is StructTestSample
+    struct = StructTestSample(file_reader=file_reader, **make_kwargs())
+    record = record_cls(file_reader=file_reader, **make_kwargs())
+    assert record.keys() == struct.keys() and "caption" in record and "source" not in record
+    assert record.width == 640 and record["caption"] == "two cats"
+    assert record.attributes["source"] == "web" and record["$attributes"]["source"] == "web"
+    obj = record.objects[1]
+    assert type(obj) is StructTestObject.record_type()
+    assert obj.bbox.xywh == [5, 6, 7, 8] and obj.attributes["iscrowd"] == 1 and obj.keys() == ("bbox", "$attributes")
+    assert repr(record.from_struct(struct)) == repr(record)
+    with pytest.raises(AttributeError):
+        obj.label
+    with pytest.raises(KeyError):
+        obj["label"]
+
+
+def test_record_pickle_round_trip():
+    record = StructTestSample.record_type()(file_reader=file_reader, **make_kwargs())
+    restored = pickle.loads(pickle.dumps(record))
+    assert type(restored) is type(record)
+    assert repr(restored) == repr(record) and restored.keys() == record.keys()
+    assert restored.objects[0].label is StructTestDom.get_label("cat")
+    assert restored.get_projection() is None
+
+    projected = StructTestSample.record_type()(file_reader=file_reader, projection=["image", "objects/label"],
+                                               **make_kwargs())
+    restored = pickle.loads(pickle.dumps(projected))
+    assert restored.get_projection() == {"image": None, "objects": {"label": None}}
+    with pytest.raises(FieldNotProjectedError):
+        restored["caption"]
+
+
+def test_record_projection():
+    record = StructTestSample.record_type()(file_reader=file_reader, projection=["image", "objects/label"],
+                                            **make_kwargs())
+    assert record.keys() == ("image", "objects", "$attributes")
+    assert record.objects[0].label.name == "cat"
+    with pytest.raises(FieldNotProjectedError, match="'width'"):
+        record["width"]
+    with pytest.raises(AttributeError, match="not in the projection"):
+        record.caption
+    with pytest.raises(FieldNotProjectedError, match="'bbox'"):
+        record.objects[0]["bbox"]
+    # 投影中的optional字段缺失时仍然是普通的KeyError
+    with pytest.raises(KeyError) as info:
+        record.objects[1]["label"]
+    assert not isinstance(info.value, FieldNotProjectedError)